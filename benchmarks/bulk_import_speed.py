@@ -0,0 +1,62 @@
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bulk import export_rows, import_records, read_records
+from src.config import Config
+from src.database import connect
+from src.migrations import migrate
+from src.validators import ALLOWED_CATEGORIES
+
+
+def make_csv(rows, bad_every):
+    rnd = random.Random(3)
+    stream = io.StringIO()
+    writer = csv.writer(stream, lineterminator='\n')
+    writer.writerow(['title', 'description', 'category', 'contact_info'])
+    for i in range(rows):
+        category = 'unknown' if bad_every and i % bad_every == 0 else rnd.choice(ALLOWED_CATEGORIES)
+        writer.writerow([f'Программа {i}', f'Описание программы помощи номер {i}', category, '+7 900 000-00-00'])
+    stream.seek(0)
+    return stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скорость пакетной загрузки и выгрузки программ фондов')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--bad-every', type=int, default=1000, help='каждая N-я строка с ошибкой, 0 - без ошибок')
+    args = parser.parse_args()
+
+    # Every chunk is slow on purpose; the log would only add noise.
+    Config.SLOW_QUERY_LOG = False
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    conn = connect(path)
+    migrate(conn)
+    conn.execute("INSERT INTO users (email, password_hash, user_type, full_name) VALUES ('fund@example.com', '-', 'fund', 'Фонд')")
+    conn.commit()
+    source = make_csv(args.rows, args.bad_every)
+
+    started = time.perf_counter()
+    imported, failed = import_records(conn, 'fund_programs', read_records(source, 'csv'), 1, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f'import: {imported} строк, {len(failed)} отклонено, {elapsed:.2f} c, {args.rows / elapsed:,.0f} строк/с')
+
+    for format in ('ndjson', 'csv'):
+        sink = open(os.devnull, 'w', encoding='utf-8')
+        started = time.perf_counter()
+        count = export_rows(conn, 'fund_programs', sink, format)
+        elapsed = time.perf_counter() - started
+        sink.close()
+        print(f'export {format}: {count} строк, {elapsed:.2f} c, {count / elapsed:,.0f} строк/с')
+
+
+if __name__ == '__main__':
+    main()
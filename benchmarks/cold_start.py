@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ROUTES = {
+    None: ['/', '/login', '/register'],
+    'needy': ['/dashboard/needy', '/needy/create-request', '/needy/my-requests',
+              '/needy/available-help', '/needy/responses'],
+    'donor': ['/dashboard/donor', '/donor/create-offer', '/donor/my-offers',
+              '/donor/needy-requests', '/donor/fund-programs', '/donor/responses'],
+    'fund': ['/dashboard/fund', '/fund/create-program', '/fund/my-programs',
+             '/fund/needy-requests', '/fund/responses'],
+}
+PASSWORD = 'bench-password'
+
+MODES = {
+    'lazy': 'без кэша, компиляция при первом запросе',
+    'bytecode': 'байткод из JINJA_CACHE_DIR',
+    'preload': 'precompile-templates до первого запроса (как мастер serve)',
+}
+
+
+def configure(workdir, mode):
+    from src.config import Config
+    Config.DATABASE = os.path.join(workdir, 'charity.db')
+    Config.FEED_CACHE_DATABASE = os.path.join(workdir, 'feed_cache.db')
+    Config.JINJA_CACHE_DIR = os.path.join(workdir, 'jinja_cache') if mode != 'lazy' else ''
+    Config.TEMPLATES_AUTO_RELOAD = False
+    Config.DEBUG = False
+    Config.SCRYPT_N = 2 ** 10
+
+
+def setup(workdir):
+    configure(workdir, 'bytecode')
+    from main import create_app
+    from src.database import init_db
+    from src.templating import precompile_templates
+    init_db()
+    app = create_app()
+    client = app.test_client()
+    for user_type in ('needy', 'donor', 'fund'):
+        client.post('/register', data={
+            'email': f'{user_type}@example.com', 'password': PASSWORD,
+            'full_name': 'Bench', 'user_type': user_type,
+        })
+    precompile_templates(app)
+
+
+def child(workdir, mode):
+    # Runs in a fresh interpreter so nothing is compiled or imported yet.
+    configure(workdir, mode)
+    from main import create_app
+    app = create_app()
+    if mode == 'preload':
+        from src.templating import precompile_templates
+        precompile_templates(app)
+
+    timings = {}
+    for user_type, routes in ROUTES.items():
+        client = app.test_client()
+        if user_type:
+            client.post('/login', data={'email': f'{user_type}@example.com', 'password': PASSWORD})
+        for route in routes:
+            started = time.perf_counter()
+            response = client.get(route)
+            response.get_data()
+            timings[route] = (time.perf_counter() - started) * 1000
+            assert response.status_code == 200, (route, response.status_code)
+    json.dump(timings, sys.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Задержка первого запроса к каждому маршруту после старта процесса')
+    parser.add_argument('--runs', type=int, default=5, help='запусков процесса на режим')
+    parser.add_argument('--child', choices=list(MODES))
+    parser.add_argument('--workdir')
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.workdir, args.child)
+        return
+
+    workdir = tempfile.mkdtemp()
+    try:
+        setup(workdir)
+        results = {}
+        for mode in MODES:
+            runs = []
+            for _ in range(args.runs):
+                output = subprocess.run([sys.executable, __file__, '--child', mode, '--workdir', workdir],
+                                        check=True, capture_output=True, text=True, cwd=ROOT).stdout
+                runs.append(json.loads(output))
+            results[mode] = {route: statistics.median(run[route] for run in runs) for route in runs[0]}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'route':<26}" + ''.join(f'{mode + " ms":>12}' for mode in MODES))
+    for route in results['lazy']:
+        print(f'{route:<26}' + ''.join(f'{results[mode][route]:>12.1f}' for mode in MODES))
+    print(f"{'total':<26}" + ''.join(f'{sum(results[mode].values()):>12.1f}' for mode in MODES))
+    for mode, description in MODES.items():
+        print(f'{mode}: {description}')
+
+
+if __name__ == '__main__':
+    main()
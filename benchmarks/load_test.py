@@ -0,0 +1,275 @@
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+from urllib.parse import quote, urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import Config
+
+
+class AppClient:
+    # In-process through the WSGI app, like the other benchmarks. Every
+    # client gets its own address, as separate browsers would have.
+
+    def __init__(self, app, address):
+        self.client = app.test_client()
+        self.client.environ_base['REMOTE_ADDR'] = address
+
+    def request(self, method, path, form=None):
+        response = self.client.open(path, method=method, data=form)
+        # A streamed page is rendered while its body is read.
+        response.get_data()
+        response.close()
+        return response.status_code
+
+
+class HttpClient:
+    # Against a running server, one keep-alive connection per client.
+    # Redirects are not followed, the same as with the test client.
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.connection = None
+        self.cookies = {}
+
+    def request(self, method, path, form=None):
+        headers = {}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            self.connection.request(method, quote(path, safe='/?&=%+'), body, headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            self.connection = None
+            raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return response.status
+
+
+def timed_request(client, method, path, form=None):
+    started = time.perf_counter()
+    try:
+        status = client.request(method, path, form)
+    except (http.client.HTTPException, OSError):
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples, seconds=None):
+    # samples: [(latency in seconds, status)].
+    latencies = sorted(latency for latency, _ in samples)
+    statuses = Counter(status for _, status in samples)
+    if not latencies:
+        return {'requests': 0}
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / seconds, 2) if seconds else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+        'errors': sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        changes = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(changes)
+
+
+def table_sizes(conn):
+    return {
+        table: conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+        for table in ('users', 'needy_requests', 'donor_offers', 'fund_programs', 'responses', 'donations')
+    }
+
+
+def print_report(result, baseline=None):
+    old = (baseline or {}).get('endpoints', {})
+    header = f"{'запросов':>9} {'rps':>8} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'ошибок':>7}"
+    if baseline:
+        header += f" {'p95 было':>9} {'Δ p95':>7}"
+    print(f'{header}  маршрут')
+    for name, stats in sorted(result['endpoints'].items()):
+        if not stats['requests']:
+            continue
+        line = (f"{stats['requests']:>9} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                f"{stats['p99_ms']:>8.1f} {stats['errors']:>7}")
+        if baseline:
+            before = old.get(name, {}).get('p95_ms')
+            if before:
+                line += f" {before:>9.1f} {(stats['p95_ms'] - before) / before * 100:>+6.0f}%"
+            else:
+                line += f" {'-':>9} {'-':>7}"
+        print(f'{line}  {name}')
+    total = result['total']
+    print(f"Всего: {total['requests']} запросов, {total['rps']:.1f} в секунду, p95 {total['p95_ms']:.1f} мс, "
+          f"ошибок {total['errors']}")
+    if baseline and baseline.get('total', {}).get('rps'):
+        print(f"Было: {baseline['total']['rps']:.1f} в секунду, p95 {baseline['total']['p95_ms']:.1f} мс "
+              f"(коммит {baseline.get('commit')})")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный тест: клиенты всех ролей по кругу проходят все маршруты, '
+                    'итог по каждому маршруту пишется в JSON'
+    )
+    parser.add_argument('--database', help='заполненная база (seed_data.py); по умолчанию временная')
+    parser.add_argument('--url', help='адрес запущенного сервера, например http://127.0.0.1:5000; '
+                                      'по умолчанию приложение вызывается в этом же процессе')
+    parser.add_argument('--clients', type=int, default=8, help='одновременных клиентов, роли по кругу')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3, help='первые секунды не учитываются')
+    parser.add_argument('--kinds', default='read,write',
+                        help='шаги сценариев: read, write, close (close закрывает объявления клиента)')
+    parser.add_argument('--rate-limit', action='store_true', help='не отключать ограничение частоты запросов')
+    parser.add_argument('--users', type=int, default=30_000, help='размер временной базы')
+    parser.add_argument('--listings', type=int, default=20_000)
+    parser.add_argument('--responses', type=int, default=60_000)
+    parser.add_argument('--output', help='файл результата; по умолчанию load-<коммит>-<время>.json')
+    parser.add_argument('--compare', help='результат прошлого запуска для сравнения')
+    parser.add_argument('--seed', type=int, default=1, help='выбор пользователей и объявлений')
+    args = parser.parse_args()
+    if args.url and not args.database:
+        parser.error('с --url нужна --database: та же база, с которой работает сервер')
+
+    folder = tempfile.mkdtemp()
+    Config.DATABASE = args.database or os.path.join(folder, 'load.db')
+    Config.FEED_CACHE_DATABASE = os.path.join(folder, 'feed_cache.db')
+    Config.METRICS_STORAGE = 'memory'
+    # Clients answer the same listings over and over; the per-user limits
+    # would turn most writes into 429s.
+    Config.RATE_LIMIT_ENABLED = args.rate_limit
+    # Latency is measured here; under load the slow-query log fires on
+    # lock waits and its output skews the numbers.
+    Config.SLOW_QUERY_LOG = False
+
+    from main import create_app
+    from src.database import connect, init_db
+    from scenarios import FORMS, SCENARIOS, pick_ids, pick_user, steps_for
+    from seed_data import PASSWORD, seed
+
+    kinds = tuple(args.kinds.split(','))
+    conn = connect()
+    if not args.url:
+        init_db()
+        if not args.database:
+            seed(conn, args.users, args.listings, args.responses, args.listings)
+        app = create_app()
+
+    # Logging in is scrypt-bound and happens once per client, so it is
+    # measured separately, before the clock for the routes starts.
+    user_types = list(SCENARIOS)
+    clients = []
+    logins = []
+    for index in range(args.clients):
+        user_type = user_types[index % len(user_types)]
+        rnd = random.Random(f'{args.seed}-{index}')
+        client = HttpClient(args.url) if args.url else AppClient(app, f'10.0.{index // 256}.{index % 256}')
+        ids = {}
+        if user_type != 'guest':
+            user = pick_user(conn, user_type, rnd)
+            logins.append(timed_request(client, 'POST', '/login', {'email': user['email'], 'password': PASSWORD}))
+            ids = pick_ids(conn, user['id'], user_type, rnd)
+        clients.append((client, user_type, ids))
+    sizes = table_sizes(conn)
+    conn.close()
+
+    samples = {}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    deadline = measure_from + args.seconds
+
+    def worker(client, user_type, ids):
+        local = {}
+        steps = steps_for(user_type, kinds)
+        while time.perf_counter() < deadline:
+            for step in steps:
+                path = step.path.format(**ids)
+                begin = time.perf_counter()
+                latency, status = timed_request(client, step.method, path, FORMS[step.form] if step.form else None)
+                if measure_from <= begin < deadline:
+                    local.setdefault(f'{step.method} {step.path}', []).append((latency, status))
+        with lock:
+            for name, values in local.items():
+                samples.setdefault(name, []).extend(values)
+
+    threads = [threading.Thread(target=worker, args=entry, daemon=True) for entry in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    commit, dirty = git_commit()
+    result = {
+        'commit': commit,
+        'dirty': dirty,
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'target': args.url or 'app',
+        'settings': {
+            'clients': args.clients, 'seconds': args.seconds, 'warmup': args.warmup, 'kinds': list(kinds),
+            'rate_limit': args.rate_limit, 'rows': sizes,
+        },
+        'environment': {
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'cpus': os.cpu_count(),
+        },
+        'login': summarize(logins),
+        'total': summarize([sample for values in samples.values() for sample in values], args.seconds),
+        'endpoints': {name: summarize(values, args.seconds) for name, values in samples.items()},
+    }
+
+    output = args.output or f"load-{(commit or 'unknown')[:10]}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f'Результат записан в {output}')
+    if result['total']['requests'] and result['total']['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
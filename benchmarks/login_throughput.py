@@ -0,0 +1,85 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+
+Config.DATABASE = os.path.join(tempfile.mkdtemp(), 'bench.db')
+Config.FEED_CACHE_DATABASE = os.path.join(os.path.dirname(Config.DATABASE), 'feed_cache.db')
+# Every login comes from one address; this measures the hasher, not the limiter.
+Config.RATE_LIMIT_ENABLED = False
+
+from main import create_app
+from src.database import connect, init_db
+import src.utils as utils
+
+
+def run(app, clients, seconds, email, password):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        client = app.test_client()
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/login', data={'email': email, 'password': password})
+            local.append(time.perf_counter() - start)
+            assert response.status_code == 302, response.status_code
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пропускная способность /login при разной стоимости scrypt')
+    parser.add_argument('--costs', default='12,13,14,15,16', help='log2(N) через запятую')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=Config.PASSWORD_HASH_WORKERS)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    Config.PASSWORD_HASH_WORKERS = args.workers
+    init_db()
+    app = create_app()
+    email, password = 'bench@example.com', 'bench-password'
+
+    print(f'clients={args.clients} hash_workers={args.workers} cpus={os.cpu_count()}')
+    print(f"{'N':>8} {'logins/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for cost in (int(value) for value in args.costs.split(',')):
+        Config.SCRYPT_N = 2 ** cost
+        utils._dummy_hash = None
+        app.test_client().post('/register', data={
+            'email': email, 'password': password, 'full_name': 'Bench',
+            'user_type': 'needy',
+        })
+        db = connect()
+        db.execute('UPDATE users SET password_hash = ? WHERE email = ?', (utils.hash_password(password), email))
+        db.commit()
+        db.close()
+        result = run(app, args.clients, args.seconds, email, password)
+        print(f"{2 ** cost:>8} {result['rps']:>10.1f} {result['p50']:>8.1f} {result['p95']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database import connect
+from src.matching import MatchIndex
+from src.migrations import migrate
+from src.validators import ALLOWED_CATEGORIES, ALLOWED_HELP_TYPES, ALLOWED_URGENCY_LEVELS
+
+
+def timestamp(rnd):
+    return f'2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:00'
+
+
+def quantity(rnd):
+    return rnd.choice([None, None, rnd.randint(1, 50)])
+
+
+def seed(conn, rows):
+    rnd = random.Random(11)
+    for user_type in ('needy', 'donor', 'fund'):
+        conn.execute('INSERT INTO users (email, password_hash, user_type, full_name) VALUES (?, ?, ?, ?)',
+                     (f'{user_type}@example.com', '-', user_type, user_type))
+    conn.executemany(
+        'INSERT INTO needy_requests (user_id, title, description, category, urgency, quantity, created_at) '
+        'VALUES (1, ?, ?, ?, ?, ?, ?)',
+        ((f'Запрос {i}', '-', rnd.choice(ALLOWED_CATEGORIES), rnd.choice(ALLOWED_URGENCY_LEVELS),
+          quantity(rnd), timestamp(rnd)) for i in range(rows))
+    )
+    donor_rows = rows * 4 // 5
+    conn.executemany(
+        'INSERT INTO donor_offers (user_id, title, description, category, help_type, quantity, created_at) '
+        'VALUES (2, ?, ?, ?, ?, ?, ?)',
+        ((f'Предложение {i}', '-', rnd.choice(ALLOWED_CATEGORIES), rnd.choice(ALLOWED_HELP_TYPES),
+          quantity(rnd), timestamp(rnd)) for i in range(donor_rows))
+    )
+    conn.executemany(
+        'INSERT INTO fund_programs (user_id, title, description, category, created_at) VALUES (3, ?, ?, ?, ?)',
+        ((f'Программа {i}', '-', rnd.choice(ALLOWED_CATEGORIES), timestamp(rnd)) for i in range(rows - donor_rows))
+    )
+    conn.commit()
+
+
+def sql_offers_for(conn, request, limit):
+    # The same question answered by the database on every call.
+    return conn.execute('''
+        SELECT * FROM (
+            SELECT id, title, created_at, quantity FROM donor_offers
+            WHERE status = 'active' AND category = ? AND (quantity IS NULL OR ? IS NULL OR quantity >= ?)
+            UNION ALL
+            SELECT id, title, created_at, NULL FROM fund_programs
+            WHERE status = 'active' AND category = ?
+        ) ORDER BY created_at DESC LIMIT ?
+    ''', (request['category'], request['quantity'], request['quantity'], request['category'], limit)).fetchall()
+
+
+def sql_requests_for(conn, offer, limit):
+    return conn.execute('''
+        SELECT id, title, urgency, created_at FROM needy_requests
+        WHERE status = 'active' AND category = ? AND (? IS NULL OR quantity IS NULL OR quantity <= ?)
+        ORDER BY CASE urgency WHEN 'critical' THEN 2 WHEN 'urgent' THEN 1 ELSE 0 END DESC, created_at DESC
+        LIMIT ?
+    ''', (offer['category'], offer['quantity'], offer['quantity'], limit)).fetchall()
+
+
+def measure(func, items):
+    timings = []
+    for item in items:
+        started = time.perf_counter()
+        func(item)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Подбор предложений к запросам: индекс в памяти против SQL')
+    parser.add_argument('--rows', type=int, default=100_000, help='открытых строк с каждой стороны')
+    parser.add_argument('--lookups', type=int, default=2_000)
+    parser.add_argument('--sql-lookups', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    conn = connect(path)
+    migrate(conn)
+    started = time.perf_counter()
+    seed(conn, args.rows)
+    # Give the SQL baseline the best index it could have for these queries.
+    for table in ('needy_requests', 'donor_offers', 'fund_programs'):
+        conn.execute(f'CREATE INDEX idx_bench_{table} ON {table} (status, category, created_at)')
+    print(f'seed: {args.rows} запросов и {args.rows} предложений за {time.perf_counter() - started:.1f} c')
+
+    index = MatchIndex()
+    started = time.perf_counter()
+    index.sync(conn)
+    print(f'построение индекса: {time.perf_counter() - started:.2f} c '
+          f'({len(index.requests)} запросов, {len(index.offers)} предложений)')
+
+    rnd = random.Random(5)
+    requests = [index.requests.rows[key][1] for key in rnd.sample(list(index.requests.rows), args.lookups)]
+    offers = [index.offers.rows[key][1] for key in rnd.sample(list(index.offers.rows), args.lookups)]
+    for request in requests[:50]:
+        found = index.offers_for(request, args.limit)
+        expected = sql_offers_for(conn, request, args.limit)
+        assert [row['created_at'] for row in found] == [row['created_at'] for row in expected]
+
+    print(f"{'lookup':<24} {'p50 us':>10} {'p99 us':>10}")
+    rows = [
+        ('index: offers_for', lambda r: index.offers_for(r, args.limit), requests),
+        ('sql: offers_for', lambda r: sql_offers_for(conn, r, args.limit), requests[:args.sql_lookups]),
+        ('index: requests_for', lambda o: index.requests_for(o, args.limit), offers),
+        ('sql: requests_for', lambda o: sql_requests_for(conn, o, args.limit), offers[:args.sql_lookups]),
+    ]
+    for name, func, items in rows:
+        p50, p99 = measure(func, items)
+        print(f'{name:<24} {p50:>10.1f} {p99:>10.1f}')
+
+    # Incremental upkeep: one new request and one closed offer, then a sync.
+    timings = []
+    for i in range(200):
+        conn.execute("INSERT INTO needy_requests (user_id, title, description, category) VALUES (1, 'Новый', '-', ?)",
+                     (rnd.choice(ALLOWED_CATEGORIES),))
+        conn.execute("UPDATE donor_offers SET status = 'completed' WHERE id = ?", (i + 1,))
+        conn.commit()
+        started = time.perf_counter()
+        index.sync(conn)
+        timings.append((time.perf_counter() - started) * 1e6)
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.sync(conn)
+    idle = (time.perf_counter() - started) * 1e3
+    print(f'sync после изменения: p50 {statistics.median(timings):.0f} us; sync без изменений: {idle:.0f} us')
+
+
+if __name__ == '__main__':
+    main()
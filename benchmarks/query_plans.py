@@ -0,0 +1,105 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import has_request_context, request
+
+from src.config import Config
+
+HOT_TABLES = {'users', 'needy_requests', 'donor_offers', 'fund_programs', 'responses', 'donations', 'outbox'}
+
+
+class PlanCapture(logging.Handler):
+    # With SLOW_QUERY_MS=0 the slow-query log sees every statement together
+    # with its plan; keep the ones run while serving a request.
+
+    def __init__(self):
+        super().__init__()
+        self.queries = {}
+
+    def emit(self, record):
+        if has_request_context() and record.plan:
+            self.queries.setdefault(record.sql, (request.endpoint, record.parameters, record.plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Проверка планов запросов всех маршрутов: SCAN по большим таблицам считается ошибкой'
+    )
+    parser.add_argument('--database', help='готовая база; по умолчанию создаётся и заполняется временная')
+    parser.add_argument('--users', type=int, default=30_000)
+    parser.add_argument('--listings', type=int, default=20_000)
+    parser.add_argument('--responses', type=int, default=60_000)
+    parser.add_argument('--analyze', action='store_true', help='собрать статистику ANALYZE перед проверкой')
+    parser.add_argument('-v', '--verbose', action='store_true', help='печатать планы всех запросов')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+    Config.DATABASE = args.database or os.path.join(folder, 'plans.db')
+    Config.FEED_CACHE_DATABASE = os.path.join(folder, 'feed_cache.db')
+    # Every statement has to reach the database: no cache, no limiter, no mail.
+    Config.FEED_CACHE_ENABLED = False
+    Config.RATE_LIMIT_ENABLED = False
+    Config.OUTBOX_ENABLED = False
+    Config.METRICS_STORAGE = 'memory'
+    Config.SLOW_QUERY_LOG = True
+    Config.SLOW_QUERY_MS = 0
+    Config.SLOW_QUERY_LOG_FILE = ''
+
+    from main import create_app
+    from src.database import connect, init_db
+    from src.querylog import logger, plan_scans
+    from scenarios import SCENARIOS, pick_ids, pick_user, run_step, steps_for
+    from seed_data import PASSWORD, seed
+
+    capture = PlanCapture()
+    logger.addHandler(capture)
+    logger.propagate = False
+
+    init_db()
+    conn = connect()
+    if not args.database:
+        Config.SLOW_QUERY_LOG = False
+        seed(conn, args.users, args.listings, args.responses, args.listings)
+        Config.SLOW_QUERY_LOG = True
+    if args.analyze:
+        conn.execute('ANALYZE')
+        conn.commit()
+
+    app = create_app()
+    failures = 0
+    for user_type in SCENARIOS:
+        client = app.test_client()
+        ids = {}
+        if user_type != 'guest':
+            user = pick_user(conn, user_type, random.Random(user_type))
+            client.post('/login', data={'email': user['email'], 'password': PASSWORD})
+            ids = pick_ids(conn, user['id'], user_type)
+        for step in steps_for(user_type):
+            response = run_step(client, step, ids)
+            response.close()
+            if response.status_code >= 500:
+                print(f'{step.method} {step.path}: {response.status_code}')
+                failures += 1
+    conn.close()
+
+    scans = 0
+    for sql, (endpoint, parameters, plan) in sorted(capture.queries.items(), key=lambda item: item[1][0] or ''):
+        found = plan_scans(plan, HOT_TABLES)
+        if found or args.verbose:
+            print(f'[{endpoint}] {sql}\n  параметры: {parameters}\n  ' + '\n  '.join(plan) + '\n')
+        if found:
+            scans += 1
+            print(f'  !!! полный просмотр: {"; ".join(found)}\n')
+    print(f'Запросов проверено: {len(capture.queries)}, с полным просмотром больших таблиц: {scans}')
+    if scans or failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.ratelimit import MemoryBuckets, RateLimiter, SqliteBuckets, parse_rules
+
+
+def measure(limiter, clients, checks, repeat):
+    # Spread over many addresses and users, as under real traffic; a few
+    # hot keys would only flatter the sharded dict.
+    endpoints = list(limiter.rules)
+    calls = [
+        (endpoints[i % len(endpoints)], f'10.0.{i % clients // 256}.{i % 256}', i % clients)
+        for i in range(checks)
+    ]
+    check = limiter.check
+
+    def run():
+        for endpoint, ip, user_id in calls:
+            check(endpoint, ip, user_id)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / checks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Накладные расходы ограничителя частоты запросов')
+    parser.add_argument('--clients', type=int, default=10_000)
+    parser.add_argument('--checks', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rules = parse_rules(Config.RATE_LIMITS)
+    memory = measure(RateLimiter(rules, MemoryBuckets()), args.clients, args.checks, args.repeat)
+    print(f'memory: {memory:.2f} мкс на проверку (ip + user)')
+    database = os.path.join(tempfile.mkdtemp(), 'ratelimit.db')
+    shared = measure(RateLimiter(rules, SqliteBuckets(database)), args.clients, args.checks // 10, 1)
+    print(f'sqlite: {shared:.2f} мкс на проверку (ip + user)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bleach import clean
+from src.validators import sanitize_form, sanitize_html
+
+
+TITLES = [
+    'Нужна помощь с продуктами для многодетной семьи',
+    'Зимняя одежда и обувь для детей 5 и 8 лет',
+    'Отдам учебники за 3-й класс, состояние хорошее',
+    'Ищем волонтёров на раздачу горячих обедов',
+]
+DESCRIPTIONS = [
+    'Мы семья из пяти человек, живём в Твери. Муж потерял работу, '
+    'пособий не хватает на продукты и лекарства. Будем благодарны за любую помощь: '
+    'крупы, консервы, детское питание.',
+    'Фонд «Тёплый дом» собирает тёплые вещи для детей из малообеспеченных семей. '
+    'Принимаем куртки, шапки, варежки, зимнюю обувь. Вещи должны быть чистыми и целыми.',
+    '<p>Готов передать <strong>ноутбук</strong> школьнику.</p><p>Самовывоз, м. Выхино.</p>',
+    'Нужна консультация юриста по оформлению опеки & пособий на ребёнка',
+]
+CONTACTS = ['+7 (915) 123-45-67', 'helper@example.ru', 'Телеграм @teplyi_dom, звонить после 18:00']
+NAMES = ['Анна Смирнова', 'Благотворительный фонд «Надежда»', 'Игорь']
+
+
+def payload(rnd):
+    return {
+        'title': rnd.choice(TITLES),
+        'description': rnd.choice(DESCRIPTIONS),
+        'contact_info': rnd.choice(CONTACTS),
+        'message': rnd.choice(DESCRIPTIONS),
+        'responder_contact': rnd.choice(CONTACTS),
+        'responder_name': rnd.choice(NAMES),
+    }
+
+
+def legacy_sanitize_html(text):
+    if not text:
+        return ''
+    allowed_tags = ['p', 'br', 'strong', 'em', 'u', 'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+    return clean(text, tags=allowed_tags, attributes={}, strip=True)
+
+
+FIELDS = ('title', 'description', 'contact_info', 'message', 'responder_contact', 'responder_name')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Очистка HTML: bleach.clean против переиспользуемого Cleaner')
+    parser.add_argument('--forms', type=int, default=2_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(3)
+    forms = [payload(rnd) for _ in range(args.forms)]
+
+    for form in forms:
+        expected = [legacy_sanitize_html(form[field].strip()) for field in FIELDS]
+        assert sanitize_form(form, *FIELDS) == expected
+
+    def run_legacy():
+        for form in forms:
+            for field in FIELDS:
+                legacy_sanitize_html(form[field].strip())
+
+    def run_fields():
+        for form in forms:
+            for field in FIELDS:
+                sanitize_html(form[field].strip())
+
+    def run_form():
+        for form in forms:
+            sanitize_form(form, *FIELDS)
+
+    per_form = 1e6 / args.forms
+    results = {}
+    for name, run in (('bleach.clean', run_legacy), ('sanitize_html', run_fields), ('sanitize_form', run_form)):
+        results[name] = min(timeit.repeat(run, number=1, repeat=args.repeat)) * per_form
+    base = results['bleach.clean']
+    for name, value in results.items():
+        print(f'{name:>14}: {value:8.1f} us/form  x{base / value:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import random
+from collections import namedtuple
+
+from src.feeds import encode_cursor
+
+# kind: "read" pages, "write" adds rows, "close" changes or removes the
+# user's own rows and runs last so the other steps still find them.
+Step = namedtuple('Step', 'method path form kind')
+
+FORMS = {
+    'request': {'title': 'Нужна зимняя куртка', 'description': 'Куртка для ребёнка 8 лет, размер 128',
+                'category': 'clothes', 'urgency': 'urgent', 'contact_info': '+7 900 123-45-67', 'quantity': '1'},
+    'offer': {'title': 'Отдам учебники', 'description': 'Учебники для начальной школы, 1-4 класс',
+              'category': 'books', 'help_type': 'one_time', 'contact_info': '+7 900 123-45-67', 'quantity': '5'},
+    'program': {'title': 'Продукты для семей', 'description': 'Ежемесячные наборы продуктов для многодетных семей',
+                'category': 'food', 'contact_info': '+7 900 123-45-67'},
+    'response': {'message': 'Готов помочь, свяжитесь со мной', 'responder_contact': '+7 900 765-43-21',
+                 'responder_name': 'Нагрузочный тест', 'donor_contact': '+7 900 765-43-21',
+                 'donor_name': 'Нагрузочный тест'},
+    'donation': {'amount': '500', 'message': 'На хорошее дело', 'donor_contact': '+7 900 765-43-21',
+                 'donor_name': 'Нагрузочный тест'},
+}
+
+COMMON = [
+    Step('GET', '/api/v1/unread', None, 'read'),
+    Step('GET', '/api/v1/responses', None, 'read'),
+    Step('GET', '/api/v1/needy-requests?after={needy_requests_cursor}', None, 'read'),
+    Step('GET', '/api/v1/donor-offers', None, 'read'),
+    Step('GET', '/api/v1/fund-programs', None, 'read'),
+]
+
+SCENARIOS = {
+    'guest': [
+        Step('GET', '/', None, 'read'),
+        Step('GET', '/login', None, 'read'),
+        Step('GET', '/register?type=needy', None, 'read'),
+    ],
+    'needy': COMMON + [
+        Step('GET', '/dashboard/needy', None, 'read'),
+        Step('GET', '/needy/my-requests', None, 'read'),
+        Step('GET', '/needy/available-help', None, 'read'),
+        Step('GET', '/needy/available-help?offers_after={donor_offers_cursor}'
+                    '&programs_after={fund_programs_cursor}', None, 'read'),
+        Step('GET', '/needy/available-help?q=куртка&category=clothes', None, 'read'),
+        Step('GET', '/needy/available-help/offers/{donor_offer}/card', None, 'read'),
+        Step('GET', '/needy/available-help/programs/{fund_program}/card', None, 'read'),
+        Step('GET', '/needy/matches', None, 'read'),
+        Step('GET', '/needy/responses', None, 'read'),
+        Step('GET', '/needy/create-request', None, 'read'),
+        Step('POST', '/needy/create-request', 'request', 'write'),
+        Step('POST', '/needy/respond-to-offer/{donor_offer}/donor', 'response', 'write'),
+        Step('POST', '/needy/respond-to-offer/{fund_program}/fund', 'response', 'write'),
+        Step('POST', '/needy/mark-response-contacted/{own_response}', None, 'close'),
+        Step('DELETE', '/needy/delete-response/{own_response}', None, 'close'),
+        Step('GET', '/needy/close-request/{own_listing}', None, 'close'),
+    ],
+    'donor': COMMON + [
+        Step('GET', '/dashboard/donor', None, 'read'),
+        Step('GET', '/donor/my-offers', None, 'read'),
+        Step('GET', '/donor/needy-requests', None, 'read'),
+        Step('GET', '/donor/needy-requests?after={needy_requests_cursor}', None, 'read'),
+        Step('GET', '/donor/needy-requests?q=одежда&urgency=urgent', None, 'read'),
+        Step('GET', '/donor/fund-programs', None, 'read'),
+        Step('GET', '/donor/fund-programs?after={fund_programs_cursor}', None, 'read'),
+        Step('GET', '/donor/needy-requests/{needy_request}/card', None, 'read'),
+        Step('GET', '/donor/fund-programs/{fund_program}/card', None, 'read'),
+        Step('GET', '/donor/matches', None, 'read'),
+        Step('GET', '/donor/responses', None, 'read'),
+        Step('GET', '/donor/create-offer', None, 'read'),
+        Step('POST', '/donor/create-offer', 'offer', 'write'),
+        Step('POST', '/donor/respond-to-request/{needy_request}', 'response', 'write'),
+        Step('POST', '/donor/respond-to-fund-program/{fund_program}', 'response', 'write'),
+        Step('POST', '/donor/donate-to-fund/{fund_program}', 'donation', 'write'),
+        Step('POST', '/donor/mark-response-contacted/{own_response}', None, 'close'),
+        Step('DELETE', '/donor/delete-response/{own_response}', None, 'close'),
+        Step('GET', '/donor/close-offer/{own_listing}', None, 'close'),
+    ],
+    'fund': COMMON + [
+        Step('GET', '/dashboard/fund', None, 'read'),
+        Step('GET', '/fund/my-programs', None, 'read'),
+        Step('GET', '/fund/needy-requests', None, 'read'),
+        Step('GET', '/fund/needy-requests?after={needy_requests_cursor}', None, 'read'),
+        Step('GET', '/fund/needy-requests/{needy_request}/card', None, 'read'),
+        Step('GET', '/fund/matches', None, 'read'),
+        Step('GET', '/fund/responses', None, 'read'),
+        Step('GET', '/fund/donations', None, 'read'),
+        Step('GET', '/fund/donations?before={donation_cursor}', None, 'read'),
+        Step('GET', '/fund/create-program', None, 'read'),
+        Step('POST', '/fund/create-program', 'program', 'write'),
+        Step('POST', '/fund/respond-to-request/{needy_request}', 'response', 'write'),
+        Step('POST', '/fund/confirm-donation/{pending_donation}', None, 'close'),
+        Step('POST', '/fund/reject-donation/{pending_donation}', None, 'close'),
+        Step('POST', '/fund/mark-response-contacted/{own_response}', None, 'close'),
+        Step('DELETE', '/fund/delete-response/{own_response}', None, 'close'),
+        Step('GET', '/fund/close-program/{own_listing}', None, 'close'),
+    ],
+}
+
+OWN_TABLES = {'needy': 'needy_requests', 'donor': 'donor_offers', 'fund': 'fund_programs'}
+
+
+def _active(conn, table, rnd):
+    # A random active row without ORDER BY RANDOM() over the whole table.
+    top = conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+    row = conn.execute(
+        f"SELECT id FROM {table} WHERE id >= ? AND status = 'active' ORDER BY id LIMIT 1",
+        (rnd.randint(1, max(top, 1)),)
+    ).fetchone() or conn.execute(f"SELECT id FROM {table} WHERE status = 'active' ORDER BY id LIMIT 1").fetchone()
+    return row[0] if row else 0
+
+
+def _cursor(conn, table, rnd):
+    row = conn.execute(
+        f"SELECT id, created_at FROM {table} WHERE status = 'active' AND id >= ? ORDER BY id LIMIT 1",
+        (_active(conn, table, rnd),)
+    ).fetchone()
+    return encode_cursor(row) if row else ''
+
+
+def pick_user(conn, user_type, rnd):
+    # Someone with an active listing of their own, so the "close" steps
+    # have something to close.
+    if user_type not in OWN_TABLES:
+        return None
+    if user_type == 'fund':
+        # Also with a pending donation for the confirm/reject steps.
+        top = conn.execute('SELECT MAX(id) FROM donations').fetchone()[0] or 0
+        row = conn.execute('''
+            SELECT u.id, u.email FROM donations d
+            JOIN fund_programs fp ON fp.id = d.program_id AND fp.status = 'active'
+            JOIN users u ON u.id = d.fund_id
+            WHERE d.id >= ? AND d.status = 'pending'
+            ORDER BY d.id LIMIT 1
+        ''', (rnd.randint(1, max(top, 1)),)).fetchone()
+        if row:
+            return row
+    row = conn.execute(
+        f'SELECT u.id, u.email FROM {OWN_TABLES[user_type]} l JOIN users u ON u.id = l.user_id WHERE l.id = ?',
+        (_active(conn, OWN_TABLES[user_type], rnd),)
+    ).fetchone()
+    return row
+
+
+def pick_ids(conn, user_id, user_type, rnd=None):
+    # Values for the {placeholders} of the steps: other users' listings to
+    # answer, and this user's own rows for the "close" steps.
+    rnd = rnd or random.Random(user_id)
+    ids = {
+        'needy_request': _active(conn, 'needy_requests', rnd),
+        'donor_offer': _active(conn, 'donor_offers', rnd),
+        'fund_program': _active(conn, 'fund_programs', rnd),
+        'needy_requests_cursor': _cursor(conn, 'needy_requests', rnd),
+        'donor_offers_cursor': _cursor(conn, 'donor_offers', rnd),
+        'fund_programs_cursor': _cursor(conn, 'fund_programs', rnd),
+        'own_listing': 0, 'own_response': 0, 'pending_donation': 0, 'donation_cursor': '',
+    }
+    if user_type in OWN_TABLES:
+        row = conn.execute(
+            f"SELECT id FROM {OWN_TABLES[user_type]} WHERE user_id = ? AND status = 'active' LIMIT 1", (user_id,)
+        ).fetchone()
+        ids['own_listing'] = row[0] if row else 0
+        row = conn.execute('SELECT id FROM responses WHERE to_user_id = ? LIMIT 1', (user_id,)).fetchone()
+        ids['own_response'] = row[0] if row else 0
+    if user_type == 'fund':
+        row = conn.execute(
+            "SELECT id FROM donations WHERE fund_id = ? AND status = 'pending' LIMIT 1", (user_id,)
+        ).fetchone()
+        ids['pending_donation'] = row[0] if row else 0
+        row = conn.execute(
+            'SELECT id FROM donations WHERE fund_id = ? ORDER BY id DESC LIMIT 1 OFFSET 20', (user_id,)
+        ).fetchone()
+        ids['donation_cursor'] = row[0] if row else ''
+    return ids
+
+
+def steps_for(user_type, kinds=('read', 'write', 'close')):
+    steps = [step for step in SCENARIOS[user_type] if step.kind in kinds]
+    return sorted(steps, key=lambda step: step.kind == 'close')
+
+
+def run_step(client, step, ids):
+    path = step.path.format(**ids)
+    data = FORMS[step.form] if step.form else None
+    return client.open(path, method=step.method, data=data)
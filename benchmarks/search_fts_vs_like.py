@@ -0,0 +1,107 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.migrations import migrate
+from src.search import build_match_query
+from src.validators import ALLOWED_CATEGORIES, ALLOWED_URGENCY_LEVELS
+
+
+WORDS = (
+    'еда продукты одежда обувь зимняя куртка книги учебники школа дети ребенок '
+    'семья пенсионер лекарства техника ноутбук холодильник мебель кровать коляска '
+    'игрушки помощь срочно нужна переезд ремонт репетитор математика английский'
+).split()
+
+
+SYLLABLES = 'ба ве го да жи зу ки ло ма не по ру са ти фу ха це чо ша ю'.split()
+
+
+def make_vocabulary(rnd, size):
+    return [''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))) for _ in range(size)]
+
+
+def make_text(rnd, vocabulary, words, topic_rate):
+    text = rnd.choices(vocabulary, k=words)
+    if rnd.random() < topic_rate:
+        text[rnd.randrange(words)] = rnd.choice(WORDS)
+    return ' '.join(text)
+
+
+def seed(conn, rows, batch=50_000):
+    conn.execute("INSERT INTO users (email, password_hash, user_type) VALUES ('bench@example.com', '-', 'needy')")
+    rnd = random.Random(42)
+    vocabulary = make_vocabulary(rnd, 20_000)
+    done = 0
+    while done < rows:
+        count = min(batch, rows - done)
+        conn.executemany(
+            'INSERT INTO needy_requests (user_id, title, description, category, urgency, contact_info) VALUES (1, ?, ?, ?, ?, ?)',
+            (
+                (
+                    make_text(rnd, vocabulary, 4, 0.3),
+                    make_text(rnd, vocabulary, 30, 0.5),
+                    rnd.choice(ALLOWED_CATEGORIES),
+                    rnd.choice(ALLOWED_URGENCY_LEVELS),
+                    '+79990000000',
+                )
+                for _ in range(count)
+            )
+        )
+        conn.commit()
+        done += count
+
+
+def timed(conn, sql, params, repeat):
+    best = float('inf')
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(conn.execute(sql, params).fetchall())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='FTS5 против LIKE-сканирования needy_requests')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    migrate(conn)
+
+    start = time.perf_counter()
+    seed(conn, args.rows)
+    print(f'seed: {args.rows} rows in {time.perf_counter() - start:.1f}s ({path})')
+
+    for term in ('холодильник', 'зимняя куртка', 'репетитор математика', 'отсутствующее'):
+        fts_ms, fts_rows = timed(conn, '''
+            SELECT nr.id FROM needy_requests_fts
+            JOIN needy_requests nr ON nr.id = needy_requests_fts.rowid
+            WHERE needy_requests_fts MATCH ? AND nr.status = 'active' AND nr.category = 'food'
+            ORDER BY bm25(needy_requests_fts, 10.0, 1.0) LIMIT ?
+        ''', (build_match_query(term), args.limit), args.repeat)
+        like = f'%{term}%'
+        like_ms, like_rows = timed(conn, '''
+            SELECT id FROM needy_requests
+            WHERE (title LIKE ? OR description LIKE ?) AND status = 'active' AND category = 'food'
+            ORDER BY created_at DESC LIMIT ?
+        ''', (like, like, args.limit), args.repeat)
+        print(f'{term!r:>18}: fts5 {fts_ms:8.2f} ms ({fts_rows} rows)   like {like_ms:8.2f} ms ({like_rows} rows)   x{like_ms / fts_ms:.1f}')
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bulk import bulk_load
+from src.config import Config
+from src.counters import rebuild_counters
+from src.database import connect
+from src.donations import rebuild_rollups
+from src.migrations import migrate
+from src.search import SEARCH_INDEXES
+from src.utils import hash_password
+from src.validators import ALLOWED_CATEGORIES, ALLOWED_HELP_TYPES, ALLOWED_URGENCY_LEVELS
+
+PASSWORD = 'secret123'
+USER_TYPES = ('needy', 'donor', 'fund')
+WORDS = ['одежда', 'продукты', 'учебники', 'куртка', 'лекарства', 'мебель', 'игрушки', 'ноутбук', 'коляска', 'обувь']
+
+NUMBERS = 'WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < :count)'
+
+# Their insert triggers are suspended by bulk_load for the whole seeding,
+# and their work is redone set-wise at the end. Seeded responses are
+# history, not mail to send, so the outbox stays empty.
+SEEDED_TABLES = ('users', *SEARCH_INDEXES, 'responses', 'donations')
+
+
+def _pick(values, expression):
+    # SQL CASE choosing from a Python list by an integer expression.
+    cases = ' '.join(f"WHEN {index} THEN '{value}'" for index, value in enumerate(values))
+    return f'(CASE ({expression}) % {len(values)} {cases} END)'
+
+
+def _words(expression):
+    return f"{_pick(WORDS, expression)} || ' ' || {_pick(WORDS, f'({expression}) / 7')}"
+
+
+def take_versions(conn, table, count):
+    # Reserves row versions first + 1 .. first + count, as the version
+    # triggers would have handed them out one by one.
+    first = conn.execute('SELECT version FROM row_versions WHERE name = ?', (table,)).fetchone()[0]
+    conn.execute('UPDATE row_versions SET version = ? WHERE name = ?', (first + count, table))
+    return first
+
+
+def rebuild_derived(conn):
+    # Everything the suspended triggers maintain: search indexes, dashboard
+    # counters and donation totals with programs' raised amounts.
+    for table in SEARCH_INDEXES:
+        fts = f'{table}_fts'
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    rebuild_counters(conn)
+    rebuild_rollups(conn)
+
+
+def seed_users(conn, per_type):
+    # Users of one type get a contiguous id range, so listings and responses
+    # can pick an owner with arithmetic instead of a lookup.
+    password_hash = hash_password(PASSWORD)
+    ranges = {}
+    for user_type in USER_TYPES:
+        first = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM users').fetchone()[0]
+        conn.execute(f'''
+            {NUMBERS}
+            INSERT INTO users (email, password_hash, full_name, user_type, phone)
+            SELECT :type || (:first + i) || '@example.com', :hash, 'Пользователь ' || (:first + i), :type,
+                   '+7 900 ' || printf('%07d', :first + i)
+            FROM n
+        ''', {'count': per_type, 'type': user_type, 'first': first, 'hash': password_hash})
+        ranges[user_type] = (first, per_type)
+    return ranges
+
+
+def seed_listings(conn, table, owners, count, extra_columns, extra_values):
+    first, size = owners
+    conn.execute(f'''
+        {NUMBERS}
+        INSERT INTO {table} (user_id, title, description, category, status, contact_info, created_at,
+                             row_version{extra_columns})
+        SELECT :first + (i * 7919) % :size,
+               {_words('i')},
+               'Описание: ' || {_words('i / 3')} || ', номер ' || i,
+               {_pick(ALLOWED_CATEGORIES, 'i / 11')},
+               CASE WHEN i % 5 = 0 THEN 'completed' ELSE 'active' END,
+               '+7 900 000-00-00',
+               datetime('now', '-' || (i * 37 % 31536000) || ' seconds'),
+               :version + i + 1
+               {extra_values}
+        FROM n
+    ''', {'count': count, 'first': first, 'size': size, 'version': take_versions(conn, table, count)})
+
+
+def seed_responses(conn, count):
+    # Donors and funds answer requests, the needy answer offers and programs;
+    # the recipient is always the owner of the listing, as in the routes.
+    for offer_type, table, senders in (
+        ('needy', 'needy_requests', 'donor'),
+        ('donor', 'donor_offers', 'needy'),
+        ('fund', 'fund_programs', 'needy'),
+    ):
+        conn.execute(f'''
+            {NUMBERS}
+            INSERT INTO responses (from_user_id, to_user_id, offer_id, offer_type, message, status,
+                                   from_user_contact, from_user_name, created_at, row_version)
+            SELECT (SELECT MIN(id) FROM users WHERE user_type = :senders)
+                       + (n.i * 104729) % (SELECT COUNT(*) FROM users WHERE user_type = :senders),
+                   l.user_id, l.id, :offer_type, 'Готов помочь: ' || {_words('n.i')},
+                   CASE WHEN n.i % 3 = 0 THEN 'contacted' ELSE 'new' END,
+                   '+7 900 111-11-11', 'Отклик ' || n.i,
+                   datetime('now', '-' || (n.i * 13 % 31536000) || ' seconds'),
+                   :version + n.i + 1
+            FROM n
+            JOIN {table} l ON l.id = 1 + (n.i * 7919) % (SELECT MAX(id) FROM {table})
+        ''', {'count': count // 3, 'senders': senders, 'offer_type': offer_type,
+              'version': take_versions(conn, 'responses', count // 3)})
+
+
+def seed_donations(conn, count):
+    conn.execute(f'''
+        {NUMBERS}
+        INSERT INTO donations (donor_id, fund_id, program_id, amount, message, status, donor_name, created_at)
+        SELECT (SELECT MIN(id) FROM users WHERE user_type = 'donor')
+                   + (n.i * 104729) % (SELECT COUNT(*) FROM users WHERE user_type = 'donor'),
+               fp.user_id, fp.id, 10000 + (n.i * 7919) % 500000, 'На хорошее дело',
+               CASE n.i % 4 WHEN 0 THEN 'pending' WHEN 1 THEN 'rejected' ELSE 'confirmed' END,
+               'Даритель ' || n.i,
+               datetime('now', '-' || (n.i * 17 % 31536000) || ' seconds')
+        FROM n
+        JOIN fund_programs fp ON fp.id = 1 + (n.i * 7919) % (SELECT MAX(id) FROM fund_programs)
+    ''', {'count': count})
+
+
+def has_data(conn):
+    return conn.execute('SELECT 1 FROM users LIMIT 1').fetchone() is not None
+
+
+def seed(conn, users, listings, responses, donations, log=print):
+    started = time.perf_counter()
+
+    def step(name):
+        log(f'{name}: {time.perf_counter() - started:.1f} c')
+
+    with bulk_load(conn, SEEDED_TABLES):
+        ranges = seed_users(conn, users // 3)
+        step('users')
+        seed_listings(conn, 'needy_requests', ranges['needy'], listings, ', urgency',
+                      f", {_pick(ALLOWED_URGENCY_LEVELS, 'i / 13')}")
+        seed_listings(conn, 'donor_offers', ranges['donor'], listings, ', help_type',
+                      f", {_pick(ALLOWED_HELP_TYPES, 'i / 13')}")
+        seed_listings(conn, 'fund_programs', ranges['fund'], listings, ', target_amount',
+                      ', 100000 * (1 + i % 1000)')
+        step('listings')
+        seed_responses(conn, responses)
+        step('responses')
+        seed_donations(conn, donations)
+        step('donations')
+        rebuild_derived(conn)
+    step('derived')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Заполнение базы синтетическими данными')
+    parser.add_argument('database', nargs='?', default=Config.DATABASE)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--listings', type=int, default=500_000, help='на каждую из трёх таблиц')
+    parser.add_argument('--responses', type=int, default=5_000_000)
+    parser.add_argument('--donations', type=int, default=500_000)
+    parser.add_argument('--force', action='store_true',
+                        help='заполнять и базу, в которой уже есть данные')
+    args = parser.parse_args()
+
+    # Every seeding statement is slow on purpose.
+    Config.SLOW_QUERY_LOG = False
+    conn = connect(args.database)
+    migrate(conn)
+    # Seeding runs without fsync and recomputes every counter and total from
+    # scratch; a database with real data needs an explicit go-ahead.
+    if has_data(conn) and not args.force:
+        conn.close()
+        parser.error(f'в {args.database} уже есть данные; укажите пустой файл или --force')
+    # A crash leaves a half-seeded file that is thrown away anyway.
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -262144')
+    seed(conn, args.users, args.listings, args.responses, args.donations)
+    conn.close()
+    print(f'Пароль всех пользователей: {PASSWORD}')
+
+
+if __name__ == '__main__':
+    main()
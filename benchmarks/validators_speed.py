@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import legacy_validators as legacy
+from src import validators
+
+
+FORMS = ['request', 'offer', 'program', 'registration', 'response']
+
+PHRASES = [
+    'Нужна помощь с продуктами для семьи из четырёх человек',
+    'Ищем зимнюю одежду для детей 5 и 8 лет',
+    'Отдам книги и учебники для начальной школы',
+    'Хз', '', '   ', 'x' * 2100,
+]
+CONTACTS = ['+7 (999) 123-45-67', 'ivan@example.com', '123', '', 'Телеграм @helper_msk']
+
+
+def random_record(rnd):
+    return {
+        'title': rnd.choice(PHRASES)[:rnd.choice([2, 50, 250])],
+        'description': rnd.choice(PHRASES),
+        'category': rnd.choice(validators.ALLOWED_CATEGORIES + ['', 'weapons']),
+        'urgency': rnd.choice(validators.ALLOWED_URGENCY_LEVELS + ['', 'asap']),
+        'help_type': rnd.choice(validators.ALLOWED_HELP_TYPES + ['']),
+        'contact_info': rnd.choice(CONTACTS),
+        'quantity': rnd.choice(['', '1', '15', '0', '-3', 'много', '2000000']),
+        'email': rnd.choice(['user@example.com', 'Bad@', '', ' MiXeD@Example.RU ']),
+        'password': rnd.choice(['secret123', '123', '', 'p' * 200]),
+        'full_name': rnd.choice(['Иван Петров', 'И', '']),
+        'user_type': rnd.choice(validators.ALLOWED_USER_TYPES + ['admin']),
+        'phone': rnd.choice(['', '+7 999 123 45 67', '12345', '1' * 20]),
+        'address': rnd.choice(['', 'Москва, ул. Ленина, 1', 'Мск']),
+        'message': rnd.choice(PHRASES),
+        rnd.choice(['responder_contact', 'donor_contact']): rnd.choice(CONTACTS),
+        rnd.choice(['responder_name', 'donor_name']): rnd.choice(['Анна', 'А', '']),
+    }
+
+
+def import_record(rnd, number):
+    # What a partner's spreadsheet looks like: valid rows, one bad in a thousand.
+    return {
+        'title': f'Программа помощи {number}',
+        'description': f'{rnd.choice(PHRASES[:3])}, номер {number}',
+        'category': 'weapons' if number % 1000 == 0 else rnd.choice(validators.ALLOWED_CATEGORIES),
+        'urgency': rnd.choice(validators.ALLOWED_URGENCY_LEVELS),
+        'help_type': rnd.choice(validators.ALLOWED_HELP_TYPES),
+        'contact_info': rnd.choice(CONTACTS[:2]),
+        'quantity': rnd.choice(['', '1', '15']),
+    }
+
+
+def measure(run, repeat):
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Скомпилированные валидаторы против прежних функций')
+    parser.add_argument('--records', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    mixed = [random_record(rnd) for _ in range(args.records)]
+    imported = [import_record(rnd, number) for number in range(args.records)]
+    for title, records, forms in (
+        ('Формы со случайными ошибками', mixed, FORMS),
+        ('Строки импорта, одна ошибка на тысячу', imported, ['request', 'offer', 'program']),
+    ):
+        print(title)
+        compare(records, forms, args.repeat)
+
+
+def compare(records, forms, repeat):
+    print(f"{'form':>14} {'legacy us':>10} {'compiled us':>12} {'speedup':>8} {'bulk us':>8} {'speedup':>8}")
+    for form in forms:
+        old = getattr(legacy, f'validate_{form}_data')
+        new = getattr(validators, f'validate_{form}_data')
+        for record in records:
+            assert old(record) == new(record), (form, record)
+        assert validators.validate_many(new, records) == [
+            (index, errors) for index, errors in enumerate(map(old, records)) if errors
+        ], form
+        old_time = measure(lambda: [old(record) for record in records], repeat)
+        new_time = measure(lambda: [new(record) for record in records], repeat)
+        bulk_time = measure(lambda: validators.validate_many(new, records), repeat)
+        per_record = 1e6 / len(records)
+        print(f'{form:>14} {old_time * per_record:>10.2f} {new_time * per_record:>12.2f} '
+              f'{old_time / new_time:>7.1f}x {bulk_time * per_record:>8.2f} {old_time / bulk_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,67 @@
+import sys
 from flask import Flask
 from src.config import Config
-from src.database import init_db
+from src.database import init_db, init_app as init_db_app
+from src.feeds import init_app as init_feeds
+from src.search import init_app as init_search
+from src.cache import init_app as init_cache
+from src.uploads import init_app as init_uploads
+from src.counters import init_app as init_counters
+from src.assets import init_app as init_assets
+from src.compression import init_app as init_compression
+from src.templating import init_app as init_templating
+from src.bulk import init_app as init_bulk
+from src.donations import init_app as init_donations
+from src.notifications import init_app as init_notifications
+from src.events import init_app as init_events
+from src.ratelimit import init_app as init_ratelimit
+from src.metrics import init_app as init_metrics
+from src.querylog import init_app as init_querylog
 from routes.auth import auth_bp
 from routes.main import main_bp
 from routes.needy import needy_bp
 from routes.donor import donor_bp
 from routes.fund import fund_bp
+from routes.api import api_bp
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     app.template_folder = Config.TEMPLATE_FOLDER
+    init_db_app(app)
+    init_metrics(app)
+    init_querylog(app)
+    init_feeds(app)
+    init_search(app)
+    init_cache(app)
+    init_uploads(app)
+    init_counters(app)
+    init_assets(app)
+    init_compression(app)
+    init_templating(app)
+    init_bulk(app)
+    init_donations(app)
+    init_notifications(app)
+    init_events(app)
+    init_ratelimit(app)
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(needy_bp)
     app.register_blueprint(donor_bp)
     app.register_blueprint(fund_bp)
+    app.register_blueprint(api_bp)
     return app
 
 
 if __name__ == "__main__":
-    init_db()
-    app = create_app()
-    app.run(port=Config.PORT, host=Config.HOST, debug=Config.DEBUG)
+    if sys.argv[1:2] == ['serve']:
+        from src.server import serve
+        serve(create_app)
+    elif sys.argv[1:2] == ['events']:
+        from src.events import serve_events
+        serve_events(create_app)
+    else:
+        init_db()
+        app = create_app()
+        app.run(port=Config.PORT, host=Config.HOST, debug=Config.DEBUG)
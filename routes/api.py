@@ -0,0 +1,157 @@
+import hashlib
+import json
+from functools import wraps
+from flask import Blueprint, Response, request, session
+from src.config import Config
+from src.database import get_db_connection
+from src.feeds import decode_cursor, encode_cursor, get_feed_page
+from src.notifications import get_unread
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+FEED_FIELDS = {
+    'needy_requests': ('id', 'title', 'description', 'category', 'urgency', 'quantity', 'contact_info',
+                       'photo_path', 'photo_thumb_path', 'photo_medium_path', 'created_at'),
+    'donor_offers': ('id', 'title', 'description', 'category', 'help_type', 'quantity', 'contact_info',
+                     'photo_path', 'photo_thumb_path', 'photo_medium_path', 'created_at'),
+    'fund_programs': ('id', 'title', 'description', 'category', 'target_amount', 'current_amount',
+                      'contact_info', 'created_at'),
+}
+
+INBOX_FIELDS = ('id', 'offer_id', 'offer_type', 'message', 'status', 'quantity', 'created_at',
+                'responder_name', 'responder_contact', 'responder_type')
+
+
+def api_login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return json_response({'error': 'Необходимо войти в систему'}, status=401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def json_response(payload, status=200, etag=None):
+    response = Response(
+        json.dumps(payload, ensure_ascii=False, separators=(',', ':')),
+        status=status, mimetype='application/json'
+    )
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+def page_args():
+    try:
+        limit = int(request.args.get('limit', Config.FEED_PAGE_SIZE))
+    except ValueError:
+        limit = Config.FEED_PAGE_SIZE
+    return request.args.get('after') or '', max(1, min(limit, Config.API_MAX_PAGE_SIZE))
+
+
+def make_etag(*parts):
+    return hashlib.blake2s('|'.join(map(str, parts)).encode(), digest_size=12).hexdigest()
+
+
+def conditional(etag):
+    # Checked before the page is queried, so an unchanged poll costs one
+    # indexed lookup and an empty 304.
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def table_versions(conn, *tables):
+    rows = conn.execute(
+        f"SELECT name, version FROM row_versions WHERE name IN ({', '.join('?' * len(tables))})", tables
+    )
+    versions = dict(rows.fetchall())
+    return [versions.get(table, 0) for table in tables]
+
+
+def feed_endpoint(feed):
+    @api_login_required
+    def view():
+        after, limit = page_args()
+        conn = get_db_connection()
+        etag = make_etag(feed, *table_versions(conn, feed, 'users'), limit, after)
+        not_modified = conditional(etag)
+        if not_modified:
+            conn.close()
+            return not_modified
+        rows, next_cursor = get_feed_page(conn, feed, after, limit)
+        conn.close()
+        fields = FEED_FIELDS[feed]
+        items = []
+        for row in rows:
+            item = {field: row[field] for field in fields}
+            item['author'] = {'id': row['user_id'], 'name': row['full_name']}
+            items.append(item)
+        return json_response({'items': items, 'next': next_cursor}, etag=etag)
+    view.__name__ = feed
+    return view
+
+
+for _feed in FEED_FIELDS:
+    api_bp.add_url_rule(f"/{_feed.replace('_', '-')}", view_func=feed_endpoint(_feed))
+
+
+@api_bp.route("/responses")
+@api_login_required
+def responses():
+    after, limit = page_args()
+    user_id, offer_type = session['user_id'], session['user_type']
+    conn = get_db_connection()
+    count, max_version = conn.execute(
+        'SELECT COUNT(*), MAX(row_version) FROM responses WHERE to_user_id = ? AND offer_type = ?',
+        (user_id, offer_type)
+    ).fetchone()
+    # The count catches deletions that leave the max version unchanged.
+    etag = make_etag('responses', user_id, offer_type, count, max_version,
+                     *table_versions(conn, 'users'), limit, after)
+    not_modified = conditional(etag)
+    if not_modified:
+        conn.close()
+        return not_modified
+
+    sql = '''
+        SELECT r.*,
+               COALESCE(r.from_user_name, u.full_name) AS responder_name,
+               COALESCE(r.from_user_contact, u.phone, u.email) AS responder_contact,
+               u.user_type AS responder_type
+        FROM responses r
+        JOIN users u ON r.from_user_id = u.id
+        WHERE r.to_user_id = ? AND r.offer_type = ?
+    '''
+    params = [user_id, offer_type]
+    cursor = decode_cursor(after)
+    if cursor:
+        sql += ' AND (r.created_at, r.id) < (?, ?)'
+        params.extend(cursor)
+    sql += ' ORDER BY r.created_at DESC, r.id DESC LIMIT ?'
+    params.append(limit + 1)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    items = [{field: row[field] for field in INBOX_FIELDS} for row in rows[:limit]]
+    return json_response({'items': items, 'next': next_cursor}, etag=etag)
+
+
+@api_bp.route("/unread")
+@api_login_required
+def unread():
+    # One primary-key read; clients poll this instead of reloading the inbox.
+    conn = get_db_connection()
+    count = get_unread(conn, session['user_id'])
+    conn.close()
+    return json_response({'unread': count})
+
+
+@api_bp.after_request
+def revalidate(response):
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
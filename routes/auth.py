@@ -1,21 +1,34 @@
 from flask import Blueprint, request, render_template, redirect, flash, session
 from functools import wraps
 from src.database import get_db_connection
-from src.utils import hash_password
+from src.metrics import timed
+from src.utils import hash_password, verify_password, password_needs_rehash, burn_password_check
 from src.validators import (
     validate_registration_data, validate_email, validate_password,
-    sanitize_html
+    sanitize_form
 )
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def access_denied(user_type=None):
+    # The redirect for a request that may not reach the view, or None.
+    if 'user_id' not in session:
+        flash('Для доступа к этой странице необходимо войти в систему', 'error')
+        return redirect('/login')
+    if user_type is not None and session.get('user_type') != user_type:
+        flash('Доступ запрещен', 'error')
+        return redirect(f'/dashboard/{session.get("user_type")}')
+    return None
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            flash('Для доступа к этой странице необходимо войти в систему', 'error')
-            return redirect('/login')
+        with timed('auth'):
+            denied = access_denied()
+        if denied is not None:
+            return denied
         return f(*args, **kwargs)
     return decorated_function
 
@@ -24,12 +37,10 @@ def user_type_required(user_type):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if 'user_id' not in session:
-                flash('Для доступа к этой странице необходимо войти в систему', 'error')
-                return redirect('/login')
-            if session.get('user_type') != user_type:
-                flash('Доступ запрещен', 'error')
-                return redirect(f'/dashboard/{session.get("user_type")}')
+            with timed('auth'):
+                denied = access_denied(user_type)
+            if denied is not None:
+                return denied
             return f(*args, **kwargs)
         return decorated_function
     return decorator
@@ -45,11 +56,10 @@ def register():
             return render_template('auth/register.html', default_type=user_type or request.form.get('user_type', ''))
         email = request.form['email'].strip().lower()
         password = request.form['password']
-        full_name = sanitize_html(request.form['full_name'].strip())
         user_type = request.form['user_type']
-        phone = sanitize_html(request.form.get('phone', '').strip())
-        address = sanitize_html(request.form.get('address', '').strip())
-        description = sanitize_html(request.form.get('description', '').strip())
+        full_name, phone, address, description = sanitize_form(
+            request.form, 'full_name', 'phone', 'address', 'description'
+        )
 
         conn = get_db_connection()
         existing_user = conn.execute(
@@ -97,9 +107,18 @@ def login():
         user = conn.execute(
             'SELECT * FROM users WHERE email = ?', (email,)
         ).fetchone()
-        conn.close()
 
-        if user and user['password_hash'] == hash_password(password):
+        if user is None:
+            burn_password_check(password)
+        if user and verify_password(password, user['password_hash']):
+            if password_needs_rehash(user['password_hash']):
+                conn.execute(
+                    'UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+                    (hash_password(password), user['id'], user['password_hash'])
+                )
+                conn.commit()
+            conn.close()
+
             session['user_id'] = user['id']
             session['user_email'] = user['email']
             session['user_type'] = user['user_type']
@@ -108,6 +127,7 @@ def login():
             flash(f'Добро пожаловать, {user["full_name"] or user["email"]}!', 'success')
             return redirect(f'/dashboard/{user["user_type"]}')
         else:
+            conn.close()
             flash('Неверный email или пароль', 'error')
     return render_template('auth/login.html')
 
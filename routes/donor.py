@@ -1,40 +1,22 @@
 from flask import Blueprint, request, render_template, redirect, flash, session, jsonify
+from src.cache import feed_cache
 from src.database import get_db_connection
+from src.feeds import get_feed_page, get_feed_row
+from src.images import schedule_photo_processing
+from src.uploads import save_uploaded_file
+from src.matching import match_index
+from src.notifications import mark_read, notify_outbox
+from src.search import search
+from src.streaming import RowStream, stream_page
 from routes.auth import user_type_required
-from src.config import Config
 from src.validators import (
-    validate_offer_data, validate_response_data, validate_file,
-    sanitize_html
+    validate_offer_data, validate_response_data, validate_donation_data, validate_file,
+    sanitize_form, parse_kopecks
 )
-import os
-import uuid
 
 donor_bp = Blueprint('donor', __name__, url_prefix='/donor')
 
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
-
-
-def save_uploaded_file(file, upload_type='offers'):
-    if not file or not file.filename:
-        return None
-    is_valid, error = validate_file(file)
-    if not is_valid:
-        flash(error, 'error')
-        return None
-    
-    if not allowed_file(file.filename):
-        flash('Неподдерживаемый формат файла', 'error')
-        return None
-    filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-    upload_path = os.path.join(Config.UPLOAD_FOLDER, upload_type)
-    os.makedirs(upload_path, exist_ok=True)
-    file_path = os.path.join(upload_path, filename)
-    file.save(file_path)
-    return os.path.join(Config.UPLOAD_FOLDER, upload_type, filename).replace('\\', '/')
-
-
 @donor_bp.route("/create-offer", methods=['GET', 'POST'])
 @user_type_required('donor')
 def create_offer():
@@ -53,11 +35,11 @@ def create_offer():
             for error in errors:
                 flash(error, 'error')
             return render_template('donor/create_offer.html')
-        title = sanitize_html(request.form['title'].strip())
-        description = sanitize_html(request.form.get('description', '').strip())
+        title, description, contact_info = sanitize_form(
+            request.form, 'title', 'description', 'contact_info'
+        )
         category = request.form['category']
         help_type = request.form['help_type']
-        contact_info = sanitize_html(request.form['contact_info'].strip())
         quantity = request.form.get('quantity')
         quantity_int = None
         if quantity:
@@ -68,12 +50,14 @@ def create_offer():
                 return render_template('donor/create_offer.html')
 
         conn = get_db_connection()
-        conn.execute(
+        cursor = conn.execute(
             'INSERT INTO donor_offers (user_id, title, description, category, help_type, contact_info, photo_path, quantity) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
             (session['user_id'], title, description, category, help_type, contact_info, photo_path, quantity_int)
         )
         conn.commit()
         conn.close()
+        feed_cache.invalidate('donor_offers')
+        schedule_photo_processing('donor_offers', cursor.lastrowid, photo_path)
 
         flash('Предложение помощи успешно создано!', 'success')
         return redirect('/donor/my-offers')
@@ -84,28 +68,42 @@ def create_offer():
 @user_type_required('donor')
 def my_offers():
     conn = get_db_connection()
-    offers = conn.execute(
+    offers = RowStream(conn.execute(
         'SELECT * FROM donor_offers WHERE user_id = ? ORDER BY created_at DESC',
         (session['user_id'],)
-    ).fetchall()
-    conn.close()
-    return render_template('donor/my_offers.html', offers=offers)
+    ))
+    return stream_page('donor/my_offers.html', offers=offers)
 
 
 @donor_bp.route("/needy-requests")
 @user_type_required('donor')
 def needy_requests():
+    after = request.args.get('after')
+    query = request.args.get('q', '').strip()
     conn = get_db_connection()
-    requests = conn.execute('''
-        SELECT nr.*, u.full_name, u.phone, u.email 
-        FROM needy_requests nr 
-        JOIN users u ON nr.user_id = u.id 
-        WHERE nr.status = "active" 
-        ORDER BY nr.created_at DESC
-    ''').fetchall()
+    if query:
+        requests = search(conn, 'needy_requests', query, {
+            'category': request.args.get('category'),
+            'urgency': request.args.get('urgency'),
+        })
+        next_cursor = None
+    else:
+        requests, next_cursor = get_feed_page(conn, 'needy_requests', after)
     conn.close()
 
-    return render_template('donor/needy_requests.html', requests=requests)
+    return stream_page('donor/needy_requests.html', requests=requests,
+                       cursor=after, next_cursor=next_cursor)
+
+
+@donor_bp.route("/needy-requests/<int:row_id>/card")
+@user_type_required('donor')
+def needy_request_card(row_id):
+    conn = get_db_connection()
+    row = get_feed_row(conn, 'needy_requests', row_id)
+    conn.close()
+    if row is None:
+        return '', 404
+    return render_template('donor/needy_request_card.html', request=row)
 
 
 @donor_bp.route("/respond-to-request/<int:request_id>", methods=['POST'])
@@ -115,9 +113,9 @@ def respond_to_request(request_id):
     
     if errors:
         return jsonify({'success': False, 'message': '; '.join(errors)})
-    message = sanitize_html(request.form.get('message', '').strip())
-    responder_contact = sanitize_html(request.form.get('responder_contact', '').strip())
-    responder_name = sanitize_html(request.form.get('responder_name', '').strip())
+    message, responder_contact, responder_name = sanitize_form(
+        request.form, 'message', 'responder_contact', 'responder_name'
+    )
     conn = get_db_connection()
     needy = conn.execute('SELECT user_id FROM needy_requests WHERE id = ?', (request_id,)).fetchone()
 
@@ -130,23 +128,36 @@ def respond_to_request(request_id):
     )
     conn.commit()
     conn.close()
+    notify_outbox()
     return jsonify({'success': True, 'message': 'Отклик отправлен!'})
 
 
 @donor_bp.route("/fund-programs")
 @user_type_required('donor')
 def fund_programs():
+    after = request.args.get('after')
+    query = request.args.get('q', '').strip()
     conn = get_db_connection()
-    programs = conn.execute('''
-        SELECT fp.*, u.full_name, u.phone, u.email 
-        FROM fund_programs fp 
-        JOIN users u ON fp.user_id = u.id 
-        WHERE fp.status = "active" 
-        ORDER BY fp.created_at DESC
-    ''').fetchall()
+    if query:
+        programs = search(conn, 'fund_programs', query, {'category': request.args.get('category')})
+        next_cursor = None
+    else:
+        programs, next_cursor = get_feed_page(conn, 'fund_programs', after)
     conn.close()
 
-    return render_template('donor/fund_programs.html', programs=programs)
+    return stream_page('donor/fund_programs.html', programs=programs,
+                       cursor=after, next_cursor=next_cursor)
+
+
+@donor_bp.route("/fund-programs/<int:row_id>/card")
+@user_type_required('donor')
+def fund_program_card(row_id):
+    conn = get_db_connection()
+    row = get_feed_row(conn, 'fund_programs', row_id)
+    conn.close()
+    if row is None:
+        return '', 404
+    return render_template('donor/fund_program_card.html', program=row)
 
 
 @donor_bp.route("/respond-to-fund-program/<int:program_id>", methods=['POST'])
@@ -156,9 +167,9 @@ def respond_to_fund_program(program_id):
     
     if errors:
         return jsonify({'success': False, 'message': '; '.join(errors)})
-    message = sanitize_html(request.form.get('message', '').strip())
-    responder_contact = sanitize_html(request.form.get('donor_contact', '').strip())
-    responder_name = sanitize_html(request.form.get('donor_name', '').strip())
+    message, responder_contact, responder_name = sanitize_form(
+        request.form, 'message', 'donor_contact', 'donor_name'
+    )
     quantity = request.form.get('quantity')
     quantity_int = None
     if quantity:
@@ -182,6 +193,7 @@ def respond_to_fund_program(program_id):
         )
         conn.commit()
         conn.close()
+        notify_outbox()
 
         return jsonify({'success': True, 'message': 'Отклик отправлен!'})
 
@@ -190,11 +202,37 @@ def respond_to_fund_program(program_id):
         return jsonify({'success': False, 'message': f'Произошла ошибка: {str(e)}'})
 
 
+@donor_bp.route("/donate-to-fund/<int:program_id>", methods=['POST'])
+@user_type_required('donor')
+def donate_to_fund(program_id):
+    errors = validate_donation_data(request.form)
+    if errors:
+        return jsonify({'success': False, 'message': '; '.join(errors)})
+    message, donor_contact, donor_name = sanitize_form(
+        request.form, 'message', 'donor_contact', 'donor_name'
+    )
+    amount = parse_kopecks(request.form['amount'])
+
+    conn = get_db_connection()
+    # A single INSERT ... SELECT: the program check and the ledger row are one
+    # statement, and the ledger triggers update the totals in its transaction.
+    cursor = conn.execute('''
+        INSERT INTO donations (donor_id, fund_id, program_id, amount, message, donor_contact, donor_name)
+        SELECT ?, user_id, id, ?, ?, ?, ? FROM fund_programs WHERE id = ? AND status = 'active'
+    ''', (session['user_id'], amount, message, donor_contact, donor_name, program_id))
+    conn.commit()
+    conn.close()
+    if not cursor.rowcount:
+        return jsonify({'success': False, 'message': 'Программа не найдена или уже закрыта'})
+    return jsonify({'success': True, 'message': 'Пожертвование отправлено фонду на подтверждение'})
+
+
 @donor_bp.route("/responses")
 @user_type_required('donor')
 def responses():
     conn = get_db_connection()
-    responses = conn.execute('''
+    mark_read(conn, session['user_id'])
+    responses = RowStream(conn.execute('''
         SELECT r.*,
                COALESCE(r.from_user_name, u.full_name) as needy_name,
                COALESCE(r.from_user_contact, u.phone, u.email) as needy_contact,
@@ -204,9 +242,8 @@ def responses():
         LEFT JOIN donor_offers do ON r.offer_id = do.id AND r.offer_type = 'donor'
         WHERE r.to_user_id = ? AND r.offer_type = 'donor'
         ORDER BY r.created_at DESC
-    ''', (session['user_id'],)).fetchall()
-    conn.close()
-    return render_template('donor/responses.html', responses=responses)
+    ''', (session['user_id'],)))
+    return stream_page('donor/responses.html', responses=responses)
 
 
 @donor_bp.route("/mark-response-contacted/<int:response_id>", methods=['POST'])
@@ -246,7 +283,22 @@ def close_offer(offer_id):
     )
     conn.commit()
     conn.close()
+    feed_cache.invalidate('donor_offers')
 
     flash('Предложение успешно закрыто!', 'success')
     return redirect('/donor/my-offers')
 
+
+@donor_bp.route("/matches")
+@user_type_required('donor')
+def matches():
+    conn = get_db_connection()
+    match_index.sync(conn)
+    offers = conn.execute(
+        "SELECT * FROM donor_offers WHERE user_id = ? AND status = 'active' ORDER BY created_at DESC",
+        (session['user_id'],)
+    ).fetchall()
+    conn.close()
+
+    suggestions = [(row, match_index.requests_for(row)) for row in offers]
+    return render_template('donor/matches.html', suggestions=suggestions)
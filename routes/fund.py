@@ -1,9 +1,16 @@
 from flask import Blueprint, request, render_template, redirect, flash, session, jsonify
+from src.cache import feed_cache
 from src.database import get_db_connection
+from src.donations import get_donations_page, get_program_totals
+from src.feeds import get_feed_page, get_feed_row
+from src.matching import match_index
+from src.notifications import mark_read, notify_outbox
+from src.search import search
+from src.streaming import RowStream, stream_page
 from routes.auth import user_type_required
 from src.validators import (
     validate_program_data, validate_response_data,
-    sanitize_html
+    sanitize_form
 )
 
 fund_bp = Blueprint('fund', __name__, url_prefix='/fund')
@@ -18,10 +25,10 @@ def create_program():
             for error in errors:
                 flash(error, 'error')
             return render_template('fund/create_program.html')
-        title = sanitize_html(request.form['title'].strip())
-        description = sanitize_html(request.form.get('description', '').strip())
+        title, description, contact_info = sanitize_form(
+            request.form, 'title', 'description', 'contact_info'
+        )
         category = request.form['category']
-        contact_info = sanitize_html(request.form['contact_info'].strip())
 
         conn = get_db_connection()
         conn.execute(
@@ -30,6 +37,7 @@ def create_program():
         )
         conn.commit()
         conn.close()
+        feed_cache.invalidate('fund_programs')
 
         flash('Программа помощи успешно создана!', 'success')
         return redirect('/fund/my-programs')
@@ -41,13 +49,12 @@ def create_program():
 @user_type_required('fund')
 def my_programs():
     conn = get_db_connection()
-    programs = conn.execute(
+    programs = RowStream(conn.execute(
         'SELECT * FROM fund_programs WHERE user_id = ? ORDER BY created_at DESC',
         (session['user_id'],)
-    ).fetchall()
-    conn.close()
+    ))
 
-    return render_template('fund/my_programs.html', programs=programs)
+    return stream_page('fund/my_programs.html', programs=programs)
 
 
 @fund_bp.route("/close-program/<int:program_id>")
@@ -60,6 +67,7 @@ def close_program(program_id):
     )
     conn.commit()
     conn.close()
+    feed_cache.invalidate('fund_programs')
 
     flash('Программа успешно закрыта!', 'success')
     return redirect('/fund/my-programs')
@@ -67,27 +75,87 @@ def close_program(program_id):
 
 
 
+@fund_bp.route("/donations")
+@user_type_required('fund')
+def donations():
+    before = request.args.get('before', type=int)
+    conn = get_db_connection()
+    donations, next_cursor = get_donations_page(conn, session['user_id'], before)
+    totals = get_program_totals(conn, session['user_id'])
+    conn.close()
+
+    return render_template('fund/donations.html', donations=donations, totals=totals,
+                           cursor=before, next_cursor=next_cursor)
+
+
+def settle_donation(donation_id, status):
+    # The guarded UPDATE is the whole state check: it only matches a pending
+    # donation of this fund, so a double click or a concurrent confirm and
+    # reject settle it exactly once; the ledger triggers credit the program
+    # in the same transaction.
+    conn = get_db_connection()
+    cursor = conn.execute(
+        "UPDATE donations SET status = ? WHERE id = ? AND fund_id = ? AND status = 'pending'",
+        (status, donation_id, session['user_id'])
+    )
+    conn.commit()
+    conn.close()
+    if not cursor.rowcount:
+        return jsonify({'success': False, 'message': 'Пожертвование не найдено или уже обработано'})
+    if status == 'confirmed':
+        feed_cache.invalidate('fund_programs')
+    return jsonify({'success': True})
+
+
+@fund_bp.route("/confirm-donation/<int:donation_id>", methods=['POST'])
+@user_type_required('fund')
+def confirm_donation(donation_id):
+    return settle_donation(donation_id, 'confirmed')
+
+
+@fund_bp.route("/reject-donation/<int:donation_id>", methods=['POST'])
+@user_type_required('fund')
+def reject_donation(donation_id):
+    return settle_donation(donation_id, 'rejected')
+
+
 @fund_bp.route("/needy-requests")
 @user_type_required('fund')
 def needy_requests():
+    after = request.args.get('after')
+    query = request.args.get('q', '').strip()
     conn = get_db_connection()
-    requests = conn.execute('''
-        SELECT nr.*, u.full_name, u.phone, u.email 
-        FROM needy_requests nr 
-        JOIN users u ON nr.user_id = u.id 
-        WHERE nr.status = "active" 
-        ORDER BY nr.created_at DESC
-    ''').fetchall()
+    if query:
+        requests = search(conn, 'needy_requests', query, {
+            'category': request.args.get('category'),
+            'urgency': request.args.get('urgency'),
+        })
+        next_cursor = None
+    else:
+        requests, next_cursor = get_feed_page(conn, 'needy_requests', after)
     conn.close()
 
-    return render_template('fund/needy_requests.html', requests=requests)
+    return stream_page('fund/needy_requests.html', requests=requests,
+                       cursor=after, next_cursor=next_cursor)
+
+
+@fund_bp.route("/needy-requests/<int:row_id>/card")
+@user_type_required('fund')
+def needy_request_card(row_id):
+    conn = get_db_connection()
+    row = get_feed_row(conn, 'needy_requests', row_id)
+    conn.close()
+    if row is None:
+        return '', 404
+    return render_template('fund/needy_request_card.html', request=row)
 
 
 @fund_bp.route("/responses")
 @user_type_required('fund')
 def responses():
     conn = get_db_connection()
-    responses = conn.execute('''
+    mark_read(conn, session['user_id'])
+    responses = RowStream(conn.execute('''
         SELECT r.*, 
                COALESCE(r.from_user_name, u.full_name) as needy_name,
                COALESCE(r.from_user_contact, u.phone, u.email) as needy_contact,
@@ -97,10 +165,9 @@ def responses():
         LEFT JOIN fund_programs fp ON r.offer_id = fp.id AND r.offer_type = 'fund'
         WHERE r.to_user_id = ? AND r.offer_type = 'fund'
         ORDER BY r.created_at DESC
-    ''', (session['user_id'],)).fetchall()
-    conn.close()
+    ''', (session['user_id'],)))
 
-    return render_template('fund/responses.html', responses=responses)
+    return stream_page('fund/responses.html', responses=responses)
 
 
 @fund_bp.route("/respond-to-request/<int:request_id>", methods=['POST'])
@@ -110,9 +177,9 @@ def respond_to_request(request_id):
     
     if errors:
         return jsonify({'success': False, 'message': '; '.join(errors)})
-    message = sanitize_html(request.form.get('message', '').strip())
-    responder_contact = sanitize_html(request.form.get('responder_contact', '').strip())
-    responder_name = sanitize_html(request.form.get('responder_name', '').strip())
+    message, responder_contact, responder_name = sanitize_form(
+        request.form, 'message', 'responder_contact', 'responder_name'
+    )
 
     conn = get_db_connection()
     needy = conn.execute('SELECT user_id FROM needy_requests WHERE id = ?', (request_id,)).fetchone()
@@ -126,6 +193,7 @@ def respond_to_request(request_id):
     )
     conn.commit()
     conn.close()
+    notify_outbox()
 
     return jsonify({'success': True, 'message': 'Отклик отправлен!'})
 
@@ -158,4 +226,16 @@ def delete_response(response_id):
     return jsonify({'success': True})
 
 
+@fund_bp.route("/matches")
+@user_type_required('fund')
+def matches():
+    conn = get_db_connection()
+    match_index.sync(conn)
+    programs = conn.execute(
+        "SELECT * FROM fund_programs WHERE user_id = ? AND status = 'active' ORDER BY created_at DESC",
+        (session['user_id'],)
+    ).fetchall()
+    conn.close()
 
+    suggestions = [(row, match_index.requests_for(row)) for row in programs]
+    return render_template('fund/matches.html', suggestions=suggestions)
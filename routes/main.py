@@ -1,4 +1,5 @@
 from flask import Blueprint, render_template, redirect, session, flash
+from src.counters import get_dashboard_stats
 from src.database import get_db_connection
 from routes.auth import login_required
 
@@ -18,31 +19,7 @@ def dashboard(user_type):
         return redirect(f'/dashboard/{session.get("user_type")}')
 
     conn = get_db_connection()
-    if user_type == 'needy':
-        stats = conn.execute('''
-            SELECT 
-                COUNT(*) as total_requests,
-                COUNT(CASE WHEN status = 'active' THEN 1 END) as active_requests,
-                (SELECT COUNT(*) FROM responses WHERE to_user_id = ? AND offer_type = 'needy') as total_responses
-            FROM needy_requests WHERE user_id = ?
-        ''', (session['user_id'], session['user_id'])).fetchone()
-    elif user_type == 'donor':
-        stats = conn.execute('''
-            SELECT 
-                COUNT(*) as total_offers,
-                COUNT(CASE WHEN status = 'active' THEN 1 END) as active_offers,
-                (SELECT COUNT(*) FROM responses WHERE from_user_id = ?) as total_responses
-            FROM donor_offers WHERE user_id = ?
-        ''', (session['user_id'], session['user_id'])).fetchone()
-    elif user_type == 'fund':
-        stats = conn.execute('''
-            SELECT 
-                COUNT(*) as total_programs,
-                COUNT(CASE WHEN status = 'active' THEN 1 END) as active_programs,
-                (SELECT COUNT(*) FROM responses WHERE to_user_id = ?) as total_responses
-            FROM fund_programs WHERE user_id = ?
-        ''', (session['user_id'], session['user_id'])).fetchone()
-
+    stats = get_dashboard_stats(conn, user_type, session['user_id'])
     conn.close()
 
     return render_template(f'main/dashboard_{user_type}.html',
@@ -1,40 +1,22 @@
 from flask import Blueprint, request, render_template, redirect, flash, session, jsonify
+from src.cache import feed_cache
 from src.database import get_db_connection
+from src.feeds import get_feed_page, get_feed_row
+from src.images import schedule_photo_processing
+from src.uploads import save_uploaded_file
+from src.matching import match_index
+from src.notifications import mark_read, notify_outbox
+from src.search import search
+from src.streaming import RowStream, stream_page
 from routes.auth import user_type_required
-from src.config import Config
 from src.validators import (
     validate_request_data, validate_response_data, validate_file,
-    sanitize_html
+    sanitize_form
 )
-import os
-import uuid
 
 needy_bp = Blueprint('needy', __name__, url_prefix='/needy')
 
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
-
-
-def save_uploaded_file(file, upload_type='requests'):
-    if not file or not file.filename:
-        return None
-    is_valid, error = validate_file(file)
-    if not is_valid:
-        flash(error, 'error')
-        return None
-    
-    if not allowed_file(file.filename):
-        flash('Неподдерживаемый формат файла', 'error')
-        return None
-    filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-    upload_path = os.path.join(Config.UPLOAD_FOLDER, upload_type)
-    os.makedirs(upload_path, exist_ok=True)
-    file_path = os.path.join(upload_path, filename)
-    file.save(file_path)
-    return os.path.join(Config.UPLOAD_FOLDER, upload_type, filename).replace('\\', '/')
-
-
 @needy_bp.route("/create-request", methods=['GET', 'POST'])
 @user_type_required('needy')
 def create_request():
@@ -53,11 +35,11 @@ def create_request():
             for error in errors:
                 flash(error, 'error')
             return render_template('needy/create_request.html')
-        title = sanitize_html(request.form['title'].strip())
-        description = sanitize_html(request.form.get('description', '').strip())
+        title, description, contact_info = sanitize_form(
+            request.form, 'title', 'description', 'contact_info'
+        )
         category = request.form['category']
         urgency = request.form['urgency']
-        contact_info = sanitize_html(request.form['contact_info'].strip())
         quantity = request.form.get('quantity')
         quantity_int = None
         if quantity:
@@ -68,12 +50,14 @@ def create_request():
                 return render_template('needy/create_request.html')
 
         conn = get_db_connection()
-        conn.execute(
+        cursor = conn.execute(
             'INSERT INTO needy_requests (user_id, title, description, category, urgency, contact_info, photo_path, quantity) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
             (session['user_id'], title, description, category, urgency, contact_info, photo_path, quantity_int)
         )
         conn.commit()
         conn.close()
+        feed_cache.invalidate('needy_requests')
+        schedule_photo_processing('needy_requests', cursor.lastrowid, photo_path)
 
         flash('Заявка на помощь успешно создана!', 'success')
         return redirect('/needy/my-requests')
@@ -85,13 +69,12 @@ def create_request():
 @user_type_required('needy')
 def my_requests():
     conn = get_db_connection()
-    requests = conn.execute(
+    requests = RowStream(conn.execute(
         'SELECT * FROM needy_requests WHERE user_id = ? ORDER BY created_at DESC',
         (session['user_id'],)
-    ).fetchall()
-    conn.close()
+    ))
 
-    return render_template('needy/my_requests.html', requests=requests)
+    return stream_page('needy/my_requests.html', requests=requests)
 
 
 @needy_bp.route("/close-request/<int:request_id>")
@@ -104,6 +87,7 @@ def close_request(request_id):
     )
     conn.commit()
     conn.close()
+    feed_cache.invalidate('needy_requests')
 
     flash('Заявка успешно закрыта!', 'success')
     return redirect('/needy/my-requests')
@@ -112,27 +96,51 @@ def close_request(request_id):
 @needy_bp.route("/available-help")
 @user_type_required('needy')
 def available_help():
+    offers_after = request.args.get('offers_after')
+    programs_after = request.args.get('programs_after')
+    query = request.args.get('q', '').strip()
     conn = get_db_connection()
-    donor_offers = conn.execute('''
-        SELECT do.*, u.full_name, u.phone, u.email 
-        FROM donor_offers do 
-        JOIN users u ON do.user_id = u.id 
-        WHERE do.status = "active" 
-        ORDER BY do.created_at DESC
-    ''').fetchall()
-    fund_programs = conn.execute('''
-        SELECT fp.*, u.full_name, u.phone, u.email 
-        FROM fund_programs fp 
-        JOIN users u ON fp.user_id = u.id 
-        WHERE fp.status = "active" 
-        ORDER BY fp.created_at DESC
-    ''').fetchall()
+    if query:
+        category = request.args.get('category')
+        donor_offers = search(conn, 'donor_offers', query, {
+            'category': category,
+            'help_type': request.args.get('help_type'),
+        })
+        fund_programs = search(conn, 'fund_programs', query, {'category': category})
+        offers_next = programs_next = None
+    else:
+        donor_offers, offers_next = get_feed_page(conn, 'donor_offers', offers_after)
+        fund_programs, programs_next = get_feed_page(conn, 'fund_programs', programs_after)
 
     conn.close()
 
-    return render_template('needy/available_help.html',
-                           donor_offers=donor_offers,
-                           fund_programs=fund_programs)
+    return stream_page('needy/available_help.html',
+                       donor_offers=donor_offers,
+                       fund_programs=fund_programs,
+                       offers_cursor=offers_after, offers_next=offers_next,
+                       programs_cursor=programs_after, programs_next=programs_next)
+
+
+@needy_bp.route("/available-help/offers/<int:row_id>/card")
+@user_type_required('needy')
+def donor_offer_card(row_id):
+    conn = get_db_connection()
+    row = get_feed_row(conn, 'donor_offers', row_id)
+    conn.close()
+    if row is None:
+        return '', 404
+    return render_template('needy/donor_offer_card.html', offer=row)
+
+
+@needy_bp.route("/available-help/programs/<int:row_id>/card")
+@user_type_required('needy')
+def fund_program_card(row_id):
+    conn = get_db_connection()
+    row = get_feed_row(conn, 'fund_programs', row_id)
+    conn.close()
+    if row is None:
+        return '', 404
+    return render_template('needy/fund_program_card.html', program=row)
 
 
 @needy_bp.route("/respond-to-offer/<int:offer_id>/<offer_type>", methods=['POST'])
@@ -142,9 +150,9 @@ def respond_to_offer(offer_id, offer_type):
     
     if errors:
         return jsonify({'success': False, 'message': '; '.join(errors)})
-    message = sanitize_html(request.form.get('message', '').strip())
-    responder_contact = sanitize_html(request.form.get('responder_contact', '').strip())
-    responder_name = sanitize_html(request.form.get('responder_name', '').strip())
+    message, responder_contact, responder_name = sanitize_form(
+        request.form, 'message', 'responder_contact', 'responder_name'
+    )
 
     conn = get_db_connection()
     if offer_type == 'donor':
@@ -161,6 +169,7 @@ def respond_to_offer(offer_id, offer_type):
     )
     conn.commit()
     conn.close()
+    notify_outbox()
 
     return jsonify({'success': True, 'message': 'Отклик отправлен!'})
 
@@ -169,7 +178,8 @@ def respond_to_offer(offer_id, offer_type):
 @user_type_required('needy')
 def responses():
     conn = get_db_connection()
-    responses = conn.execute('''
+    mark_read(conn, session['user_id'])
+    responses = RowStream(conn.execute('''
         SELECT r.*,
                COALESCE(r.from_user_name, u.full_name) as responder_name,
                COALESCE(r.from_user_contact, u.phone, u.email) as responder_contact,
@@ -182,10 +192,9 @@ def responses():
         LEFT JOIN donor_offers do ON r.offer_id = do.id AND r.offer_type = 'donor'
         WHERE r.to_user_id = ? AND r.offer_type = 'needy'
         ORDER BY r.created_at DESC
-    ''', (session['user_id'],)).fetchall()
-    conn.close()
+    ''', (session['user_id'],)))
 
-    return render_template('needy/responses.html', responses=responses)
+    return stream_page('needy/responses.html', responses=responses)
 
 
 @needy_bp.route("/mark-response-contacted/<int:response_id>", methods=['POST'])
@@ -213,3 +222,18 @@ def delete_response(response_id):
     conn.commit()
     conn.close()
     return jsonify({'success': True})
+
+
+@needy_bp.route("/matches")
+@user_type_required('needy')
+def matches():
+    conn = get_db_connection()
+    match_index.sync(conn)
+    requests = conn.execute(
+        "SELECT * FROM needy_requests WHERE user_id = ? AND status = 'active' ORDER BY created_at DESC",
+        (session['user_id'],)
+    ).fetchall()
+    conn.close()
+
+    suggestions = [(row, match_index.offers_for(row)) for row in requests]
+    return render_template('needy/matches.html', suggestions=suggestions)
@@ -0,0 +1,96 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import click
+import rcssmin
+import rjsmin
+from flask import current_app, request, send_from_directory, url_for
+
+
+ASSETS = ['css/main.css', 'css/home.css', 'js/validation.js', 'js/base.js']
+
+MINIFIERS = {
+    '.css': rcssmin.cssmin,
+    '.js': rjsmin.jsmin,
+}
+
+MANIFEST = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_manifest = None
+
+
+def dist_folder(app):
+    return os.path.join(app.static_folder, 'dist')
+
+
+def build_assets(app):
+    dist = dist_folder(app)
+    manifest = {}
+    for name in ASSETS:
+        with open(os.path.join(app.static_folder, name), encoding='utf-8') as f:
+            source = f.read()
+        stem, ext = os.path.splitext(name)
+        data = MINIFIERS[ext](source).encode()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f'{stem}.{digest}{ext}'
+        path = os.path.join(dist, hashed)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Content-addressed names: an existing file already has these bytes.
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        manifest[name] = hashed
+    tmp = os.path.join(dist, f'{MANIFEST}.{os.getpid()}')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(dist, MANIFEST))
+    return manifest
+
+
+def load_manifest(app):
+    try:
+        with open(os.path.join(dist_folder(app), MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(name):
+    global _manifest
+    if _manifest is None or current_app.debug:
+        _manifest = load_manifest(current_app)
+    hashed = _manifest.get(name)
+    if hashed is None or current_app.debug:
+        # Not built (or debugging): serve the readable source.
+        return url_for('static', filename=name)
+    return url_for('assets', filename=hashed)
+
+
+def send_asset(filename):
+    dist = dist_folder(current_app)
+    mimetype = mimetypes.guess_type(filename)[0]
+    if request.accept_encodings['gzip'] and os.path.isfile(os.path.join(dist, filename + '.gz')):
+        response = send_from_directory(dist, filename + '.gz', mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.content_encoding = 'gzip'
+    else:
+        response = send_from_directory(dist, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+@click.command('build-assets')
+def build_assets_command():
+    for name, hashed in build_assets(current_app).items():
+        click.echo(f'{name} -> dist/{hashed}')
+
+
+def init_app(app):
+    app.add_url_rule('/assets/<path:filename>', 'assets', send_asset)
+    app.add_template_global(asset_url)
+    app.cli.add_command(build_assets_command)
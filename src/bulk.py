@@ -0,0 +1,271 @@
+import csv
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice, repeat
+import click
+from src.cache import feed_cache
+from src.config import Config
+from src.counters import add_listing_counts
+from src.database import get_db_connection
+from src.validators import (
+    sanitize_column, validate_many, validate_offer_data, validate_program_data, validate_request_data
+)
+
+
+# table -> (owner user_type, validator, columns taken from the file, columns run through sanitize_html)
+IMPORTS = {
+    'needy_requests': (
+        'needy', validate_request_data,
+        ('title', 'description', 'category', 'urgency', 'contact_info', 'quantity'),
+        ('title', 'description', 'contact_info'),
+    ),
+    'donor_offers': (
+        'donor', validate_offer_data,
+        ('title', 'description', 'category', 'help_type', 'contact_info', 'quantity'),
+        ('title', 'description', 'contact_info'),
+    ),
+    'fund_programs': (
+        'fund', validate_program_data,
+        ('title', 'description', 'category', 'contact_info'),
+        ('title', 'description', 'contact_info'),
+    ),
+}
+
+FORMATS = ('csv', 'ndjson')
+INSERT_TRIGGER_RE = re.compile(r'\bAFTER\s+INSERT\s+ON\s+"?(\w+)"?', re.IGNORECASE)
+
+
+def detect_format(path, format):
+    if format:
+        return format
+    return 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'ndjson'
+
+
+def read_records(stream, format):
+    # Yields (line number, record) lazily, so a file of any size is held in
+    # memory one chunk at a time. Values are strings, as they are in a form.
+    if format == 'csv':
+        reader = csv.reader(stream)
+        header = next(reader, [])
+        for row in reader:
+            yield reader.line_num, dict(zip(header, row))
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        if not isinstance(record, dict):
+            yield line_number, ValueError('ожидается JSON-объект')
+            continue
+        yield line_number, {key: value if value is None else str(value) for key, value in record.items()}
+
+
+def _clean_column(values):
+    return sanitize_column([value.strip() if value else '' for value in values])
+
+
+def _number_column(values):
+    return [int(value) if value else None for value in values]
+
+
+def _choice_column(values):
+    return [value or None for value in values]
+
+
+def column_converters(columns, sanitized):
+    # The same conversions the create forms apply: free text is stripped and
+    # sanitized, quantity becomes an int, choices are stored as given. Each
+    # converter takes a whole column of a chunk.
+    return [
+        (column, _clean_column if column in sanitized else _number_column if column == 'quantity' else _choice_column)
+        for column in columns
+    ]
+
+
+def insert_triggers(conn, tables):
+    # Recognised by their definition rather than by name.
+    found = []
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"):
+        match = INSERT_TRIGGER_RE.search(sql)
+        if match and match.group(1) in tables:
+            found.append((name, sql))
+    return found
+
+
+@contextmanager
+def bulk_load(conn, tables):
+    # Maintenance mode for loading many rows. The per-row insert triggers
+    # of the tables (search index, counters, row versions, outbox...) cost
+    # several statements per row and dominate a load. The block is one write
+    # transaction: the triggers are dropped at its start, the caller does
+    # their work set-wise, and they are recreated before commit. DDL is
+    # transactional in SQLite, so no other connection ever sees the tables
+    # without them. Yields the dropped (name, sql) pairs.
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        triggers = insert_triggers(conn, tables)
+        for name, _ in triggers:
+            conn.execute(f'DROP TRIGGER "{name}"')
+        yield triggers
+        for _, sql in triggers:
+            conn.execute(sql)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def prepare_chunks(table, records, chunk_size):
+    # Yields (columns ready for insert, [(line number, [errors])]) per chunk.
+    # Every chunk is checked in the bulk mode of the create form's validator
+    # and its valid records are converted column by column.
+    _, validator, columns, sanitized = IMPORTS[table]
+    converters = column_converters(columns, sanitized)
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        failed = [
+            (line_number, [f'не удалось разобрать строку: {record}'])
+            for line_number, record in chunk if isinstance(record, Exception)
+        ]
+        if failed:
+            chunk = [(line_number, record) for line_number, record in chunk if not isinstance(record, Exception)]
+        valid = [record for _, record in chunk]
+        rejected = dict(validate_many(validator, valid))
+        if rejected:
+            failed.extend((chunk[index][0], errors) for index, errors in rejected.items())
+            failed.sort()
+            valid = [record for index, record in enumerate(valid) if index not in rejected]
+        yield [convert([record.get(column) for record in valid]) for column, convert in converters], failed
+
+
+def import_records(conn, table, records, user_id, chunk_size=None):
+    # Every chunk is its own bulk_load transaction: a single executemany,
+    # then the search index, the owner's counters and the table's row
+    # version are brought up to date for the chunk before it commits. The
+    # write lock is held for one chunk at a time, so other writers get in
+    # between chunks, and a failure keeps the chunks committed before it.
+    # Returns (imported count, [(line number, [errors])]).
+    columns = IMPORTS[table][2]
+    insert = (
+        f'INSERT INTO {table} (user_id, {", ".join(columns)}, row_version) '
+        f'VALUES ({", ".join("?" * (len(columns) + 2))})'
+    )
+    imported = 0
+    failed = []
+    for values, errors in prepare_chunks(table, records, chunk_size or Config.BULK_CHUNK_SIZE):
+        failed.extend(errors)
+        count = len(values[0])
+        if not count:
+            continue
+        with bulk_load(conn, {table}):
+            last_id = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+            version = conn.execute('SELECT version FROM row_versions WHERE name = ?', (table,)).fetchone()[0]
+            conn.executemany(insert, zip(repeat(user_id), *values, range(version + 1, version + count + 1)))
+            conn.execute(
+                f'INSERT INTO {table}_fts (rowid, title, description) '
+                f'SELECT id, title, description FROM {table} WHERE id > ?',
+                (last_id,)
+            )
+            add_listing_counts(conn, table, user_id, count, count)
+            conn.execute('UPDATE row_versions SET version = ? WHERE name = ?', (version + count, table))
+        imported += count
+    return imported, failed
+
+
+def export_rows(conn, table, stream, format):
+    # The cursor is consumed row by row and every row is written as soon as
+    # it is read, so memory does not grow with the table.
+    cursor = conn.execute(f'SELECT * FROM "{table}"')
+    names = [column[0] for column in cursor.description]
+    count = 0
+    if format == 'csv':
+        writer = csv.writer(stream, lineterminator='\n')
+        writer.writerow(names)
+        for row in cursor:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in cursor:
+            stream.write(json.dumps(dict(zip(names, row)), ensure_ascii=False, separators=(',', ':')))
+            stream.write('\n')
+            count += 1
+    return count
+
+
+def find_owner(conn, table, user_email, user_id):
+    user_type = IMPORTS[table][0]
+    if user_id is not None:
+        user = conn.execute('SELECT id, user_type FROM users WHERE id = ?', (user_id,)).fetchone()
+    else:
+        user = conn.execute('SELECT id, user_type FROM users WHERE email = ?', (user_email,)).fetchone()
+    if user is None:
+        raise click.ClickException('Пользователь не найден')
+    if user['user_type'] != user_type:
+        raise click.ClickException(f'В {table} можно загружать только от пользователя типа {user_type}')
+    return user['id']
+
+
+@click.command('import-listings')
+@click.argument('table', type=click.Choice(sorted(IMPORTS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option('--user-email', help='Email владельца записей')
+@click.option('--user-id', type=int, help='id владельца записей')
+@click.option('--format', 'format', type=click.Choice(FORMATS), help='По умолчанию определяется по расширению файла')
+@click.option('--chunk-size', type=int, help='Строк в одном executemany')
+def import_listings_command(table, path, user_email, user_id, format, chunk_size):
+    if (user_email is None) == (user_id is None):
+        raise click.UsageError('Укажите ровно один из параметров --user-email и --user-id')
+    conn = get_db_connection()
+    owner = find_owner(conn, table, user_email, user_id)
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+    started = time.perf_counter()
+    try:
+        imported, failed = import_records(
+            conn, table, read_records(stream, detect_format(path, format)), owner, chunk_size
+        )
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        conn.close()
+    elapsed = time.perf_counter() - started
+    if imported:
+        feed_cache.invalidate(table)
+    for line_number, errors in failed:
+        click.echo(f'строка {line_number}: {"; ".join(errors)}', err=True)
+    click.echo(f'Загружено: {imported}, отклонено: {len(failed)} за {elapsed:.2f} с '
+               f'({imported / elapsed if elapsed else 0:.0f} строк/с)')
+    if failed:
+        raise SystemExit(1)
+
+
+@click.command('export-table')
+@click.argument('table')
+@click.option('--format', 'format', type=click.Choice(FORMATS), default='ndjson', show_default=True)
+@click.option('--output', '-o', default='-', help='Файл для записи, по умолчанию stdout')
+def export_table_command(table, format, output):
+    conn = get_db_connection()
+    try:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+        if exists is None:
+            raise click.ClickException(f'Таблица {table} не найдена')
+        with click.open_file(output, 'w', encoding='utf-8') as stream:
+            count = export_rows(conn, table, stream, format)
+    finally:
+        conn.close()
+    click.echo(f'Выгружено строк: {count}', err=True)
+
+
+def init_app(app):
+    app.cli.add_command(import_listings_command)
+    app.cli.add_command(export_table_command)
@@ -0,0 +1,211 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+import click
+from src.config import Config
+
+
+class FeedCache:
+    # Entries live in a separate SQLite file so that every worker process
+    # shares them. Each feed has a generation number: an entry is only served
+    # while its generation matches, so a page computed concurrently with a
+    # write can never outlive the invalidation that follows the commit.
+    # Lookups only read the file: LRU touches and hit/miss counts are kept
+    # in process memory and written out by a background thread every
+    # FEED_CACHE_FLUSH_INTERVAL seconds and once more when the process exits,
+    # so reads from all workers never queue for the writer lock.
+
+    def __init__(self, database, ttl, max_entries):
+        self.database = database
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._touched = {}
+        self._counts = Counter()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.database, timeout=Config.DB_BUSY_TIMEOUT / 1000)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(feed_cache)')]
+            if columns and 'next_cursor' not in columns:
+                # Entries are disposable; a file from an older version is simply emptied.
+                conn.execute('DROP TABLE feed_cache')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS feed_cache (
+                    key TEXT PRIMARY KEY,
+                    feed TEXT NOT NULL,
+                    generation INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    next_cursor TEXT,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_feed_cache_last_used ON feed_cache (last_used)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_feed_cache_next_cursor ON feed_cache (feed, next_cursor)')
+            conn.execute('CREATE TABLE IF NOT EXISTS feed_generations (feed TEXT PRIMARY KEY, generation INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS feed_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute("INSERT OR IGNORE INTO feed_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+            conn.commit()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, conn, name, amount=1):
+        conn.execute('UPDATE feed_cache_stats SET value = value + ? WHERE name = ?', (amount, name))
+
+    def _check_fork(self):
+        # A forked child must not flush the parent's pending counts again,
+        # and threads do not survive a fork, so it starts its own flusher.
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._touched = {}
+            self._counts = Counter()
+            self._pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name='feed-cache', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(Config.FEED_CACHE_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+    def _record(self, key, now, hit):
+        with self._lock:
+            self._check_fork()
+            if hit:
+                self._counts['hits'] += 1
+                self._touched[key] = now
+            else:
+                self._counts['misses'] += 1
+
+    def flush(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Nothing counted in this process yet.
+                return
+            touched, counts = self._touched, self._counts
+            self._touched, self._counts = {}, Counter()
+        if not touched and not counts:
+            return
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(
+                    'UPDATE feed_cache SET last_used = MAX(last_used, ?) WHERE key = ?',
+                    [(used, key) for key, used in touched.items()]
+                )
+                for name, amount in counts.items():
+                    self._count(conn, name, amount)
+        except sqlite3.OperationalError:
+            # Busy: keep the numbers for the next flush instead of losing them.
+            with self._lock:
+                for key, used in touched.items():
+                    self._touched[key] = max(used, self._touched.get(key, 0))
+                self._counts.update(counts)
+
+    def generation(self, feed):
+        row = self._connection().execute(
+            'SELECT generation FROM feed_generations WHERE feed = ?', (feed,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, feed, key):
+        now = time.time()
+        row = self._connection().execute('''
+            SELECT c.payload FROM feed_cache c
+            LEFT JOIN feed_generations g ON g.feed = c.feed
+            WHERE c.key = ? AND c.expires_at > ? AND c.generation = COALESCE(g.generation, 0)
+        ''', (key, now)).fetchone()
+        self._record(key, now, row is not None)
+        return json.loads(row[0]) if row else None
+
+    def issued(self, feed, cursor):
+        # Whether a live cached page of the feed links to this cursor.
+        row = self._connection().execute('''
+            SELECT 1 FROM feed_cache c
+            LEFT JOIN feed_generations g ON g.feed = c.feed
+            WHERE c.feed = ? AND c.next_cursor = ? AND c.expires_at > ?
+              AND c.generation = COALESCE(g.generation, 0)
+            LIMIT 1
+        ''', (feed, cursor, time.time())).fetchone()
+        return row is not None
+
+    def set(self, feed, key, generation, value, next_cursor=None):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO feed_cache (key, feed, generation, payload, next_cursor, expires_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, feed, generation, json.dumps(value, ensure_ascii=False), next_cursor, now + self.ttl, now)
+            )
+            expired = conn.execute('DELETE FROM feed_cache WHERE expires_at <= ?', (now,)).rowcount
+            overflow = conn.execute('''
+                DELETE FROM feed_cache WHERE key IN (
+                    SELECT key FROM feed_cache ORDER BY last_used
+                    LIMIT MAX((SELECT COUNT(*) FROM feed_cache) - ?, 0)
+                )
+            ''', (self.max_entries,)).rowcount
+            if expired or overflow:
+                self._count(conn, 'evictions', expired + overflow)
+
+    def invalidate(self, feed):
+        conn = self._connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO feed_generations (feed, generation) VALUES (?, 1)
+                ON CONFLICT (feed) DO UPDATE SET generation = generation + 1
+            ''', (feed,))
+            conn.execute('DELETE FROM feed_cache WHERE feed = ?', (feed,))
+
+    def stats(self):
+        self.flush()
+        conn = self._connection()
+        stats = dict(conn.execute('SELECT name, value FROM feed_cache_stats').fetchall())
+        stats['entries'] = conn.execute('SELECT COUNT(*) FROM feed_cache').fetchone()[0]
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._check_fork()
+            self._touched, self._counts = {}, Counter()
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM feed_cache')
+            conn.execute('UPDATE feed_generations SET generation = generation + 1')
+            conn.execute('UPDATE feed_cache_stats SET value = 0')
+
+
+feed_cache = FeedCache(Config.FEED_CACHE_DATABASE, Config.FEED_CACHE_TTL, Config.FEED_CACHE_MAX_ENTRIES)
+
+
+@click.command('feed-cache-stats')
+@click.option('--reset', is_flag=True, help='Очистить кэш и обнулить счётчики')
+def feed_cache_stats_command(reset):
+    if reset:
+        feed_cache.clear()
+    stats = feed_cache.stats()
+    click.echo(
+        f"hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.2%} "
+        f"entries={stats['entries']} evictions={stats['evictions']}"
+    )
+
+
+def init_app(app):
+    app.cli.add_command(feed_cache_stats_command)
+    # Counts of a worker that exits (WEB_MAX_REQUESTS, restart) are kept.
+    atexit.register(feed_cache.flush)
@@ -0,0 +1,53 @@
+import gzip
+import zlib
+from flask import request
+from src.config import Config
+
+
+def _gzip_stream(chunks, level, charset='utf-8'):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in Config.GZIP_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+
+    if response.is_streamed:
+        # Size is unknown up front; streamed pages are the large ones anyway.
+        response.response = _gzip_stream(response.response, Config.GZIP_LEVEL)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < Config.GZIP_MIN_SIZE:
+            return response
+        response.set_data(gzip.compress(data, Config.GZIP_LEVEL, mtime=0))
+    response.content_encoding = 'gzip'
+
+    # The compressed body is a different representation; like nginx, keep
+    # the tag for revalidation but mark it weak.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    if Config.GZIP_ENABLED:
+        app.after_request(compress_response)
@@ -1,13 +1,107 @@
 import os
 
 
+ENV = os.environ.get('APP_ENV') or os.environ.get('FLASK_ENV') or 'development'
+IS_PRODUCTION = ENV == 'production'
+
+
 class Config:
+    ENV = ENV
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here-change-this-in-production'
-    DATABASE = 'charity.db'
+    DATABASE = os.environ.get('DATABASE', 'charity.db')
     TEMPLATE_FOLDER = 'templates'
-    DEBUG = True
-    HOST = '127.0.0.1'
-    PORT = 8080
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR', '.jinja_cache')
+    DEBUG = os.environ.get('DEBUG', '0' if IS_PRODUCTION else '1') == '1'
+    HOST = os.environ.get('HOST', '0.0.0.0' if IS_PRODUCTION else '127.0.0.1')
+    PORT = int(os.environ.get('PORT', 8080))
+    TEMPLATES_AUTO_RELOAD = os.environ.get('TEMPLATES_AUTO_RELOAD', '1' if DEBUG else '0') == '1'
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', os.cpu_count() or 1))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 30))
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS', 0))
     UPLOAD_FOLDER = 'static/uploads'
     MAX_FILE_SIZE = 5 * 1024 * 1024
+    MAX_CONTENT_LENGTH = MAX_FILE_SIZE + 1024 * 1024
+    PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+    SCRYPT_R = int(os.environ.get('SCRYPT_R', 8))
+    SCRYPT_P = int(os.environ.get('SCRYPT_P', 1))
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+    DB_BUSY_TIMEOUT = int(os.environ.get('DB_BUSY_TIMEOUT', 5000))
+    DB_JOURNAL_MODE = os.environ.get('DB_JOURNAL_MODE', 'WAL')
+    DB_SYNCHRONOUS = os.environ.get('DB_SYNCHRONOUS', 'NORMAL')
+    DB_CACHE_SIZE = int(os.environ.get('DB_CACHE_SIZE', -16000))
+    DB_MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE', 128 * 1024 * 1024))
+    FEED_PAGE_SIZE = int(os.environ.get('FEED_PAGE_SIZE', 20))
+    SEARCH_LIMIT = int(os.environ.get('SEARCH_LIMIT', 50))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+    MATCH_LIMIT = int(os.environ.get('MATCH_LIMIT', 5))
+    BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 10000))
+    FEED_CACHE_ENABLED = os.environ.get('FEED_CACHE_ENABLED', '1') == '1'
+    FEED_CACHE_DATABASE = os.environ.get('FEED_CACHE_DATABASE', 'feed_cache.db')
+    FEED_CACHE_TTL = int(os.environ.get('FEED_CACHE_TTL', 60))
+    FEED_CACHE_MAX_ENTRIES = int(os.environ.get('FEED_CACHE_MAX_ENTRIES', 1000))
+    FEED_CACHE_FLUSH_INTERVAL = int(os.environ.get('FEED_CACHE_FLUSH_INTERVAL', 5))
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+    IMAGE_THUMB_SIZE = (400, 300)
+    IMAGE_MEDIUM_SIZE = (1280, 1280)
+    IMAGE_WEBP_QUALITY = 80
+    GZIP_ENABLED = os.environ.get('GZIP_ENABLED', '1') == '1'
+    GZIP_MIN_SIZE = int(os.environ.get('GZIP_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    GZIP_MIMETYPES = ('text/html', 'application/json')
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 8192))
+    OUTBOX_ENABLED = os.environ.get('OUTBOX_ENABLED', '1') == '1'
+    OUTBOX_WORKERS = int(os.environ.get('OUTBOX_WORKERS', 1))
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', 2))
+    OUTBOX_LEASE = int(os.environ.get('OUTBOX_LEASE', 60))
+    OUTBOX_RETRY_DELAY = int(os.environ.get('OUTBOX_RETRY_DELAY', 30))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    EVENTS_ENABLED = os.environ.get('EVENTS_ENABLED', '1') == '1'
+    EVENTS_HOST = os.environ.get('EVENTS_HOST', HOST)
+    EVENTS_PORT = int(os.environ.get('EVENTS_PORT', 8081))
+    EVENTS_PATH = '/events'
+    EVENTS_URL = os.environ.get('EVENTS_URL', '')
+    EVENTS_ALLOWED_ORIGINS = tuple(filter(None, os.environ.get('EVENTS_ALLOWED_ORIGINS', '').split(',')))
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1))
+    EVENTS_HEARTBEAT = int(os.environ.get('EVENTS_HEARTBEAT', 15))
+    EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 5000))
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+    EVENTS_MAX_CLIENTS = int(os.environ.get('EVENTS_MAX_CLIENTS', 10000))
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_DATABASE = os.environ.get('RATE_LIMIT_DATABASE', 'ratelimit.db')
+    RATE_LIMIT_SHARDS = int(os.environ.get('RATE_LIMIT_SHARDS', 16))
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 100_000))
+    RATE_LIMIT_METHODS = ('POST',)
+    RATE_LIMITS = {
+        'auth.login': {'ip': '10/minute'},
+        'donor.respond_to_request': {'ip': '60/minute', 'user': '10/minute'},
+        'donor.respond_to_fund_program': {'ip': '60/minute', 'user': '10/minute'},
+        'fund.respond_to_request': {'ip': '60/minute', 'user': '10/minute'},
+        'needy.respond_to_offer': {'ip': '60/minute', 'user': '10/minute'},
+    }
+    RATE_LIMITS_OVERRIDE = os.environ.get('RATE_LIMITS', '')
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_STORAGE = os.environ.get('METRICS_STORAGE', 'sqlite' if IS_PRODUCTION else 'memory')
+    METRICS_DATABASE = os.environ.get('METRICS_DATABASE', 'metrics.db')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+    METRICS_ALLOWED_IPS = tuple(os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(','))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', '1') == '1'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', '')
+    NOTIFY_TRANSPORT = os.environ.get('NOTIFY_TRANSPORT', 'log')
+    NOTIFY_FROM = os.environ.get('NOTIFY_FROM', 'noreply@torjok.local')
+    NOTIFY_MAIL_DIR = os.environ.get('NOTIFY_MAIL_DIR', 'mail')
+    NOTIFY_SMTP_HOST = os.environ.get('NOTIFY_SMTP_HOST', 'localhost')
+    NOTIFY_SMTP_PORT = int(os.environ.get('NOTIFY_SMTP_PORT', 25))
+    NOTIFY_SMTP_TIMEOUT = int(os.environ.get('NOTIFY_SMTP_TIMEOUT', 10))
+    NOTIFY_SMTP_STARTTLS = os.environ.get('NOTIFY_SMTP_STARTTLS', '0') == '1'
+    NOTIFY_SMTP_USER = os.environ.get('NOTIFY_SMTP_USER', '')
+    NOTIFY_SMTP_PASSWORD = os.environ.get('NOTIFY_SMTP_PASSWORD', '')
@@ -0,0 +1,184 @@
+import click
+from src.database import get_db_connection
+
+
+COUNTER_COLUMNS = [
+    'total_requests', 'active_requests',
+    'total_offers', 'active_offers',
+    'total_programs', 'active_programs',
+    'responses_received', 'needy_responses_received', 'responses_sent',
+]
+
+LISTING_COUNTERS = {
+    'needy_requests': ('total_requests', 'active_requests'),
+    'donor_offers': ('total_offers', 'active_offers'),
+    'fund_programs': ('total_programs', 'active_programs'),
+}
+
+DASHBOARD_COLUMNS = {
+    'needy': 'total_requests, active_requests, needy_responses_received AS total_responses',
+    'donor': 'total_offers, active_offers, responses_sent AS total_responses',
+    'fund': 'total_programs, active_programs, responses_received AS total_responses',
+}
+
+# One grouped pass per source table instead of a subquery per user:
+# responses.from_user_id has no index, and a rebuild after a bulk load
+# has to stay linear in the number of rows.
+COMPUTE_SQL = '''
+    SELECT u.id AS user_id,
+           COALESCE(requests.total, 0) AS total_requests,
+           COALESCE(requests.active, 0) AS active_requests,
+           COALESCE(offers.total, 0) AS total_offers,
+           COALESCE(offers.active, 0) AS active_offers,
+           COALESCE(programs.total, 0) AS total_programs,
+           COALESCE(programs.active, 0) AS active_programs,
+           COALESCE(received.total, 0) AS responses_received,
+           COALESCE(received.needy, 0) AS needy_responses_received,
+           COALESCE(sent.total, 0) AS responses_sent
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active
+        FROM needy_requests GROUP BY user_id
+    ) requests ON requests.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active
+        FROM donor_offers GROUP BY user_id
+    ) offers ON offers.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE status = 'active') AS active
+        FROM fund_programs GROUP BY user_id
+    ) programs ON programs.user_id = u.id
+    LEFT JOIN (
+        SELECT to_user_id, COUNT(*) AS total, COUNT(*) FILTER (WHERE offer_type = 'needy') AS needy
+        FROM responses GROUP BY to_user_id
+    ) received ON received.to_user_id = u.id
+    LEFT JOIN (
+        SELECT from_user_id, COUNT(*) AS total FROM responses GROUP BY from_user_id
+    ) sent ON sent.from_user_id = u.id
+'''
+
+
+def _bump(user_id, changes):
+    assignments = ', '.join(f'{column} = {column} + ({delta})' for column, delta in changes)
+    return (
+        f'INSERT OR IGNORE INTO user_counters (user_id) VALUES ({user_id});\n'
+        f'UPDATE user_counters SET {assignments} WHERE user_id = {user_id};'
+    )
+
+
+def create_counter_triggers(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS user_counters (
+            user_id INTEGER PRIMARY KEY REFERENCES users (id),
+            {', '.join(f'{column} INTEGER NOT NULL DEFAULT 0' for column in COUNTER_COLUMNS)}
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_counters_insert AFTER INSERT ON users BEGIN
+            INSERT OR IGNORE INTO user_counters (user_id) VALUES (new.id);
+        END
+    ''')
+    for table, (total, active) in LISTING_COUNTERS.items():
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_insert AFTER INSERT ON {table} BEGIN
+                {_bump('new.user_id', [(total, 1), (active, "new.status = 'active'")])}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_delete AFTER DELETE ON {table} BEGIN
+                {_bump('old.user_id', [(total, -1), (active, "-(old.status = 'active')")])}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_counters_update AFTER UPDATE OF status, user_id ON {table} BEGIN
+                {_bump('old.user_id', [(total, -1), (active, "-(old.status = 'active')")])}
+                {_bump('new.user_id', [(total, 1), (active, "new.status = 'active'")])}
+            END
+        ''')
+
+    def response_changes(row, sign):
+        return (
+            _bump(f'{row}.to_user_id', [
+                ('responses_received', sign),
+                ('needy_responses_received', f"{sign} * ({row}.offer_type = 'needy')"),
+            ]) + '\n' +
+            _bump(f'{row}.from_user_id', [('responses_sent', sign)])
+        )
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS responses_counters_insert AFTER INSERT ON responses BEGIN
+            {response_changes('new', 1)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS responses_counters_delete AFTER DELETE ON responses BEGIN
+            {response_changes('old', -1)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS responses_counters_update
+        AFTER UPDATE OF from_user_id, to_user_id, offer_type ON responses BEGIN
+            {response_changes('old', -1)}
+            {response_changes('new', 1)}
+        END
+    ''')
+
+
+def rebuild_counters(conn):
+    conn.execute('DELETE FROM user_counters')
+    conn.execute(f'INSERT INTO user_counters (user_id, {", ".join(COUNTER_COLUMNS)}) {COMPUTE_SQL}')
+
+
+def verify_counters(conn):
+    stored = {row['user_id']: row for row in conn.execute('SELECT * FROM user_counters')}
+    drift = []
+    for expected in conn.execute(COMPUTE_SQL):
+        actual = stored.get(expected['user_id'])
+        for column in COUNTER_COLUMNS:
+            value = actual[column] if actual else None
+            if value != expected[column]:
+                drift.append((expected['user_id'], column, value, expected[column]))
+    return drift
+
+
+def add_listing_counts(conn, table, user_id, total, active):
+    # Set-wise counterpart of the insert trigger for bulk loads.
+    total_column, active_column = LISTING_COUNTERS[table]
+    conn.execute('INSERT OR IGNORE INTO user_counters (user_id) VALUES (?)', (user_id,))
+    conn.execute(
+        f'UPDATE user_counters SET {total_column} = {total_column} + ?, {active_column} = {active_column} + ? '
+        f'WHERE user_id = ?',
+        (total, active, user_id)
+    )
+
+
+def get_dashboard_stats(conn, user_type, user_id):
+    row = conn.execute(
+        f'SELECT {DASHBOARD_COLUMNS[user_type]} FROM user_counters WHERE user_id = ?', (user_id,)
+    ).fetchone()
+    if row is None:
+        return {'total_requests': 0, 'active_requests': 0, 'total_offers': 0, 'active_offers': 0,
+                'total_programs': 0, 'active_programs': 0, 'total_responses': 0}
+    return row
+
+
+@click.command('verify-counters')
+@click.option('--rebuild', is_flag=True, help='Пересчитать счётчики из исходных таблиц')
+def verify_counters_command(rebuild):
+    conn = get_db_connection()
+    drift = verify_counters(conn)
+    for user_id, column, actual, expected in drift:
+        click.echo(f'user {user_id}: {column} = {actual}, ожидается {expected}')
+    if rebuild:
+        rebuild_counters(conn)
+        conn.commit()
+        click.echo('Счётчики пересчитаны')
+    elif not drift:
+        click.echo('Расхождений нет')
+    conn.close()
+    if drift and not rebuild:
+        raise SystemExit(1)
+
+
+def init_app(app):
+    app.cli.add_command(verify_counters_command)
@@ -1,143 +1,152 @@
+import os
+import queue
 import sqlite3
+import threading
+import time
+from flask import g, has_app_context
+from src.config import Config
+from src.metrics import observe_connection_wait, observe_query
+from src.migrations import migrate
+from src.querylog import is_slow, log_slow_query
 
 
-def init_db():
-    conn = sqlite3.connect('charity.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            full_name TEXT,
-            user_type TEXT NOT NULL,
-            phone TEXT,
-            address TEXT,
-            description TEXT,
-            is_verified BOOLEAN DEFAULT TRUE,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS donor_offers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                category TEXT NOT NULL,
-                help_type TEXT NOT NULL,
-                amount DECIMAL(10,2),
-                status TEXT DEFAULT 'active',
-                contact_info TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS fund_programs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                category TEXT NOT NULL,
-                target_amount DECIMAL(10,2),
-                current_amount DECIMAL(10,2) DEFAULT 0,
-                status TEXT DEFAULT 'active',
-                contact_info TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS needy_requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                category TEXT NOT NULL,
-                urgency TEXT DEFAULT 'normal',
-                status TEXT DEFAULT 'active',
-                contact_info TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS responses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                from_user_id INTEGER NOT NULL,
-                to_user_id INTEGER NOT NULL,
-                offer_id INTEGER,
-                offer_type TEXT NOT NULL,
-                message TEXT NOT NULL,
-                status TEXT DEFAULT 'new',
-                from_user_contact TEXT,
-                from_user_name TEXT,
-                created_a DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (from_user_id) REFERENCES users (id),
-                FOREIGN KEY (to_user_id) REFERENCES users (id)
-            )
-        ''')
-    try:
-        cursor.execute('ALTER TABLE responses ADD COLUMN from_user_contact TEXT')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE responses ADD COLUMN from_user_name TEXT')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE responses ADD COLUMN quantity INTEGER')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE needy_requests ADD COLUMN photo_path TEXT')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE needy_requests ADD COLUMN quantity INTEGER')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE donor_offers ADD COLUMN photo_path TEXT')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE donor_offers ADD COLUMN quantity INTEGER')
-    except:
-        pass
-    cursor.execute('''
-           CREATE TABLE IF NOT EXISTS donations (
-               id INTEGER PRIMARY KEY AUTOINCREMENT,
-               donor_id INTEGER NOT NULL,
-               fund_id INTEGER NOT NULL,
-               program_id INTEGER NOT NULL,
-               amount DECIMAL(10,2) NOT NULL,
-               message TEXT,
-               status TEXT DEFAULT 'pending',
-               donor_contact TEXT,
-               donor_name TEXT,
-               created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-               FOREIGN KEY (donor_id) REFERENCES users (id),
-               FOREIGN KEY (fund_id) REFERENCES users (id),
-               FOREIGN KEY (program_id) REFERENCES fund_programs (id)
-           )
-       ''')
+class PooledConnection(sqlite3.Connection):
+    pooled = False
 
-    try:
-        cursor.execute('ALTER TABLE donations ADD COLUMN donor_contact TEXT')
-    except:
-        pass
-    try:
-        cursor.execute('ALTER TABLE donations ADD COLUMN donor_name TEXT')
-    except:
-        pass
+    def close(self):
+        # Pooled connections are returned to the pool on app context teardown,
+        # so the conn.close() calls in the routes must not drop them.
+        if self.pooled:
+            return
+        super().close()
 
-    conn.commit()
-    conn.close()
+    # Timed at the execute call: the first step of the statement runs there,
+    # rows fetched later are counted in the request time only.
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            cursor = super().execute(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_query(elapsed)
+        if is_slow(elapsed):
+            log_slow_query(self, sql, parameters, elapsed)
+        return cursor
 
+    def executemany(self, sql, parameters):
+        # Parameters may be a generator that is used up by now; the log gets
+        # the statement without parameters or plan.
+        started = time.perf_counter()
+        try:
+            cursor = super().executemany(sql, parameters)
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_query(elapsed)
+        if is_slow(elapsed):
+            log_slow_query(self, sql, None, elapsed)
+        return cursor
 
-def get_db_connection():
-    conn = sqlite3.connect('charity.db')
+
+class ConnectionPool:
+    def __init__(self, database, size):
+        self.database = database
+        self.size = size
+        self.pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+
+    def _check_fork(self):
+        # Connections must not cross a fork; a child process starts with an empty pool.
+        if self.pid != os.getpid():
+            with self._lock:
+                if self.pid != os.getpid():
+                    self._idle = queue.LifoQueue(maxsize=self.size)
+                    self.pid = os.getpid()
+
+    def acquire(self):
+        self._check_fork()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = connect(self.database, check_same_thread=False)
+        conn.pooled = True
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        if self.pid == os.getpid():
+            try:
+                self._idle.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+        conn.pooled = False
+        conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.pooled = False
+            conn.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def connect(database=None, **kwargs):
+    conn = sqlite3.connect(
+        database or Config.DATABASE,
+        timeout=Config.DB_BUSY_TIMEOUT / 1000,
+        factory=PooledConnection,
+        **kwargs
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute(f'PRAGMA busy_timeout = {int(Config.DB_BUSY_TIMEOUT)}')
+    conn.execute(f'PRAGMA journal_mode = {Config.DB_JOURNAL_MODE}')
+    conn.execute(f'PRAGMA synchronous = {Config.DB_SYNCHRONOUS}')
+    conn.execute(f'PRAGMA cache_size = {int(Config.DB_CACHE_SIZE)}')
+    conn.execute(f'PRAGMA mmap_size = {int(Config.DB_MMAP_SIZE)}')
+    conn.execute('PRAGMA temp_store = MEMORY')
     return conn
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(Config.DATABASE, Config.DB_POOL_SIZE)
+    return _pool
+
+
+def init_db():
+    conn = connect()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+
+def get_db_connection():
+    if not has_app_context():
+        return connect()
+    if 'db_conn' not in g:
+        started = time.perf_counter()
+        g.db_conn = get_pool().acquire()
+        observe_connection_wait(time.perf_counter() - started)
+    return g.db_conn
+
+
+def release_db_connection(exception=None):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db_connection)
@@ -0,0 +1,163 @@
+import click
+from src.config import Config
+from src.database import get_db_connection
+
+
+ROLLUP_COLUMNS = ['pending_count', 'pending_amount', 'confirmed_count', 'confirmed_amount', 'rejected_count']
+
+COMPUTE_SQL = '''
+    SELECT fp.id AS program_id,
+           COUNT(d.id) FILTER (WHERE d.status = 'pending') AS pending_count,
+           COALESCE(SUM(d.amount) FILTER (WHERE d.status = 'pending'), 0) AS pending_amount,
+           COUNT(d.id) FILTER (WHERE d.status = 'confirmed') AS confirmed_count,
+           COALESCE(SUM(d.amount) FILTER (WHERE d.status = 'confirmed'), 0) AS confirmed_amount,
+           COUNT(d.id) FILTER (WHERE d.status = 'rejected') AS rejected_count
+    FROM fund_programs fp
+    LEFT JOIN donations d ON d.program_id = fp.id
+    GROUP BY fp.id
+'''
+
+
+def _status_changes(row, sign):
+    return (
+        f"UPDATE program_donation_totals SET "
+        f"pending_count = pending_count + {sign} * ({row}.status = 'pending'), "
+        f"pending_amount = pending_amount + {sign} * ({row}.status = 'pending') * {row}.amount, "
+        f"confirmed_count = confirmed_count + {sign} * ({row}.status = 'confirmed'), "
+        f"confirmed_amount = confirmed_amount + {sign} * ({row}.status = 'confirmed') * {row}.amount, "
+        f"rejected_count = rejected_count + {sign} * ({row}.status = 'rejected') "
+        f"WHERE program_id = {row}.program_id;"
+    )
+
+
+def create_ledger_triggers(conn):
+    # donations is an append-only ledger of integer kopecks: a row is never
+    # deleted and only moves once, from pending to confirmed or rejected.
+    # The triggers keep the per-program rollup and fund_programs.current_amount
+    # in the same transaction as the ledger write, as single UPDATE ... + n
+    # statements, so concurrent donors never race on a read-modify-write.
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS program_donation_totals (
+            program_id INTEGER PRIMARY KEY REFERENCES fund_programs (id),
+            {', '.join(f'{column} INTEGER NOT NULL DEFAULT 0' for column in ROLLUP_COLUMNS)}
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_donations_fund ON donations (fund_id, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_donations_program ON donations (program_id)')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS donations_ledger_no_delete BEFORE DELETE ON donations BEGIN
+            SELECT RAISE(ABORT, 'donations ledger is append-only');
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS donations_ledger_no_rewrite BEFORE UPDATE ON donations
+        WHEN old.status != 'pending' OR new.status NOT IN ('confirmed', 'rejected')
+             OR new.amount IS NOT old.amount OR new.program_id IS NOT old.program_id
+             OR new.fund_id IS NOT old.fund_id OR new.donor_id IS NOT old.donor_id BEGIN
+            SELECT RAISE(ABORT, 'donations ledger is append-only');
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS donations_ledger_insert AFTER INSERT ON donations BEGIN
+            INSERT OR IGNORE INTO program_donation_totals (program_id) VALUES (new.program_id);
+            {_status_changes('new', 1)}
+            UPDATE fund_programs SET current_amount = current_amount + new.amount
+            WHERE id = new.program_id AND new.status = 'confirmed';
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS donations_ledger_update AFTER UPDATE OF status ON donations BEGIN
+            {_status_changes('old', -1)}
+            {_status_changes('new', 1)}
+            UPDATE fund_programs SET current_amount = current_amount + new.amount
+            WHERE id = new.program_id AND new.status = 'confirmed';
+        END
+    ''')
+
+
+def rebuild_rollups(conn):
+    conn.execute('DELETE FROM program_donation_totals')
+    conn.execute(f'INSERT INTO program_donation_totals (program_id, {", ".join(ROLLUP_COLUMNS)}) {COMPUTE_SQL}')
+    conn.execute('''
+        UPDATE fund_programs SET current_amount = (
+            SELECT confirmed_amount FROM program_donation_totals WHERE program_id = fund_programs.id
+        )
+        WHERE current_amount IS NOT (
+            SELECT confirmed_amount FROM program_donation_totals WHERE program_id = fund_programs.id
+        )
+    ''')
+
+
+def verify_rollups(conn):
+    stored = {row['program_id']: row for row in conn.execute('SELECT * FROM program_donation_totals')}
+    raised = dict(conn.execute('SELECT id, current_amount FROM fund_programs').fetchall())
+    drift = []
+    for expected in conn.execute(COMPUTE_SQL):
+        program_id = expected['program_id']
+        actual = stored.get(program_id)
+        for column in ROLLUP_COLUMNS:
+            value = actual[column] if actual else 0
+            if value != expected[column]:
+                drift.append((program_id, column, value, expected[column]))
+        if raised.get(program_id) != expected['confirmed_amount']:
+            drift.append((program_id, 'current_amount', raised.get(program_id), expected['confirmed_amount']))
+    return drift
+
+
+def get_donations_page(conn, fund_id, before=None, page_size=None):
+    # Newest first, keyset on the ledger id.
+    page_size = page_size or Config.FEED_PAGE_SIZE
+    sql = '''
+        SELECT d.*, fp.title AS program_name
+        FROM donations d
+        JOIN fund_programs fp ON d.program_id = fp.id
+        WHERE d.fund_id = ?
+    '''
+    params = [fund_id]
+    if before:
+        sql += ' AND d.id < ?'
+        params.append(before)
+    sql += ' ORDER BY d.id DESC LIMIT ?'
+    params.append(page_size + 1)
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = rows[page_size - 1]['id'] if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def get_program_totals(conn, fund_id):
+    return conn.execute('''
+        SELECT fp.id, fp.title, fp.status, fp.target_amount, fp.current_amount, t.*
+        FROM fund_programs fp
+        LEFT JOIN program_donation_totals t ON t.program_id = fp.id
+        WHERE fp.user_id = ?
+        ORDER BY fp.created_at DESC
+    ''', (fund_id,)).fetchall()
+
+
+def format_rubles(kopecks):
+    rubles, kopecks = divmod(int(kopecks or 0), 100)
+    text = f'{rubles:,}'.replace(',', ' ')
+    return f'{text},{kopecks:02d}' if kopecks else text
+
+
+@click.command('verify-donations')
+@click.option('--rebuild', is_flag=True, help='Пересчитать итоги программ по журналу пожертвований')
+def verify_donations_command(rebuild):
+    conn = get_db_connection()
+    drift = verify_rollups(conn)
+    for program_id, column, actual, expected in drift:
+        click.echo(f'program {program_id}: {column} = {actual}, ожидается {expected}')
+    if rebuild:
+        rebuild_rollups(conn)
+        conn.commit()
+        click.echo('Итоги пересчитаны')
+    elif not drift:
+        click.echo('Расхождений нет')
+    conn.close()
+    if drift and not rebuild:
+        raise SystemExit(1)
+
+
+def init_app(app):
+    app.add_template_filter(format_rubles, 'rubles')
+    app.cli.add_command(verify_donations_command)
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlsplit
+from flask import request
+from src.config import Config
+from src.database import connect
+
+logger = logging.getLogger(__name__)
+
+LISTING_TABLES = ('needy_requests', 'donor_offers', 'fund_programs')
+MAX_HEADER_LINES = 100
+
+
+class EventHub:
+    # One poller per process reads what changed since the last tick (new ids
+    # by primary key, closed listings through row_versions) and fans the
+    # events out to subscriber queues. Every client is a coroutine waiting on
+    # its queue, so an idle connection costs a socket and a few objects, and
+    # the database work does not grow with the number of clients.
+
+    def __init__(self):
+        self.clients = {}
+        self.seen = None
+        # sqlite3 connections stay on the thread that made them.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='events')
+        self.conn = None
+
+    def subscribe(self, user_id, feeds):
+        queue = asyncio.Queue(Config.EVENTS_QUEUE_SIZE)
+        self.clients[queue] = (user_id, feeds)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.pop(queue, None)
+
+    def snapshot(self):
+        conn = self.conn
+        seen = {'versions': dict(conn.execute('SELECT name, version FROM row_versions').fetchall())}
+        for table in LISTING_TABLES + ('responses',):
+            seen[table] = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+        return seen
+
+    def collect(self):
+        # Runs on the executor thread; returns [(user_id or None, event, payload)].
+        if self.conn is None:
+            self.conn = connect()
+        if self.seen is None:
+            self.seen = self.snapshot()
+            return []
+        conn, seen = self.conn, self.seen
+        versions = dict(conn.execute('SELECT name, version FROM row_versions').fetchall())
+        if versions == seen['versions']:
+            return []
+        events = []
+        if versions.get('responses') != seen['versions'].get('responses'):
+            rows = conn.execute('''
+                SELECT r.id, r.to_user_id, r.offer_type,
+                       COALESCE(r.from_user_name, u.full_name) AS responder_name
+                FROM responses r
+                JOIN users u ON r.from_user_id = u.id
+                WHERE r.id > ?
+                ORDER BY r.id
+            ''', (seen['responses'],)).fetchall()
+            for row in rows:
+                events.append((row['to_user_id'], 'response', {
+                    'id': row['id'], 'offer_type': row['offer_type'], 'responder_name': row['responder_name'],
+                }))
+                seen['responses'] = row['id']
+        for table in LISTING_TABLES:
+            if versions.get(table) == seen['versions'].get(table):
+                continue
+            rows = conn.execute(
+                f'SELECT id, user_id, category, status FROM {table} WHERE row_version > ?',
+                (seen['versions'].get(table, 0),)
+            ).fetchall()
+            for row in rows:
+                if row['id'] > seen[table] and row['status'] == 'active':
+                    state = 'new'
+                elif row['status'] != 'active':
+                    state = 'closed'
+                else:
+                    continue
+                events.append((None, 'listing', {
+                    'table': table, 'id': row['id'], 'state': state,
+                    'category': row['category'], 'user_id': row['user_id'],
+                }))
+            seen[table] = max([seen[table]] + [row['id'] for row in rows])
+        seen['versions'] = versions
+        return events
+
+    def publish(self, events):
+        for queue, (user_id, feeds) in list(self.clients.items()):
+            for target, event, payload in events:
+                if target is not None and target != user_id:
+                    continue
+                if event == 'listing' and payload['table'] not in feeds:
+                    continue
+                try:
+                    queue.put_nowait((event, payload))
+                except asyncio.QueueFull:
+                    # A client this far behind is gone or stuck; it reconnects
+                    # and resynchronises from the page.
+                    self.unsubscribe(queue)
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+                    break
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                events = await loop.run_in_executor(self.executor, self.collect)
+                if events:
+                    self.publish(events)
+            except Exception:
+                logger.exception('Ошибка при опросе изменений')
+            await asyncio.sleep(Config.EVENTS_POLL_INTERVAL)
+
+
+class EventServer:
+    # A minimal HTTP/1.1 server for one endpoint: GET EVENTS_PATH with the
+    # Flask session cookie. It runs beside the WSGI workers, which would
+    # otherwise hold a thread for every open stream.
+
+    def __init__(self, app):
+        self.app = app
+        self.hub = EventHub()
+        self.serializer = app.session_interface.get_signing_serializer(app)
+        self.cookie_name = app.config['SESSION_COOKIE_NAME']
+        self.max_age = int(app.permanent_session_lifetime.total_seconds())
+
+    def load_session(self, headers):
+        cookie = SimpleCookie(headers.get('cookie', ''))
+        morsel = cookie.get(self.cookie_name)
+        if morsel is None or self.serializer is None:
+            return {}
+        try:
+            return self.serializer.loads(morsel.value, max_age=self.max_age)
+        except Exception:
+            return {}
+
+    def cors_headers(self, headers):
+        # The stream is usually on its own port of the same host, which makes
+        # it a different origin; allow exactly that, with cookies.
+        origin = headers.get('origin')
+        if not origin:
+            return []
+        host = headers.get('host', '').rsplit(':', 1)[0]
+        if urlsplit(origin).hostname not in (host, *Config.EVENTS_ALLOWED_ORIGINS):
+            return []
+        return [('Access-Control-Allow-Origin', origin), ('Access-Control-Allow-Credentials', 'true'),
+                ('Vary', 'Origin')]
+
+    async def read_request(self, reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return request_line.split(' '), headers
+
+    async def respond(self, writer, status, headers=(), body=b''):
+        lines = [f'HTTP/1.1 {status}'] + [f'{name}: {value}' for name, value in headers]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        queue = None
+        try:
+            parts, headers = await asyncio.wait_for(self.read_request(reader), Config.EVENTS_HEARTBEAT)
+            if len(parts) != 3 or parts[0] != 'GET' or urlsplit(parts[1]).path != Config.EVENTS_PATH:
+                await self.respond(writer, '404 Not Found', [('Content-Length', '0'), ('Connection', 'close')])
+                return
+            cors = self.cors_headers(headers)
+            session = self.load_session(headers)
+            if 'user_id' not in session:
+                await self.respond(writer, '401 Unauthorized', cors + [('Content-Length', '0'), ('Connection', 'close')])
+                return
+            if len(self.hub.clients) >= Config.EVENTS_MAX_CLIENTS:
+                await self.respond(writer, '503 Service Unavailable', cors + [
+                    ('Retry-After', '30'), ('Content-Length', '0'), ('Connection', 'close')
+                ])
+                return
+            query = parse_qs(urlsplit(parts[1]).query)
+            feeds = set(','.join(query.get('feeds', [])).split(',')) & set(LISTING_TABLES)
+            queue = self.hub.subscribe(session['user_id'], feeds)
+            await self.respond(writer, '200 OK', cors + [
+                ('Content-Type', 'text/event-stream; charset=utf-8'),
+                ('Cache-Control', 'no-cache'),
+                ('Connection', 'keep-alive'),
+                ('X-Accel-Buffering', 'no'),
+            ], f'retry: {Config.EVENTS_RETRY_MS}\n\n'.encode())
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), Config.EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # A comment line keeps proxies from closing the idle stream
+                    # and tells us when the browser has gone.
+                    writer.write(b': ping\n\n')
+                    await writer.drain()
+                    continue
+                if item is None:
+                    return
+                event, payload = item
+                data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+                writer.write(f'event: {event}\ndata: {data}\n\n'.encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if queue is not None:
+                self.hub.unsubscribe(queue)
+            writer.close()
+
+    async def run(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        logger.info('Поток событий: http://%s:%s%s', host, port, Config.EVENTS_PATH)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.hub.run())
+
+
+def serve_events(app_factory):
+    logging.basicConfig(level=logging.INFO)
+    app = app_factory()
+    asyncio.run(EventServer(app).run(Config.EVENTS_HOST, Config.EVENTS_PORT))
+
+
+def events_url():
+    # By default the stream is on EVENTS_PORT of the host the page came from.
+    if not Config.EVENTS_ENABLED:
+        return None
+    if Config.EVENTS_URL:
+        return Config.EVENTS_URL
+    return f"//{request.host.rsplit(':', 1)[0]}:{Config.EVENTS_PORT}{Config.EVENTS_PATH}"
+
+
+def init_app(app):
+    app.add_template_global(events_url)
@@ -0,0 +1,93 @@
+from flask import request, url_for
+from src.cache import feed_cache
+from src.config import Config
+
+
+FEEDS = {
+    'needy_requests': ('nr', '''
+        SELECT nr.*, u.full_name, u.phone, u.email
+        FROM needy_requests nr
+        JOIN users u ON nr.user_id = u.id
+        WHERE nr.status = 'active'
+    '''),
+    'donor_offers': ('do', '''
+        SELECT do.*, u.full_name, u.phone, u.email
+        FROM donor_offers do
+        JOIN users u ON do.user_id = u.id
+        WHERE do.status = 'active'
+    '''),
+    'fund_programs': ('fp', '''
+        SELECT fp.*, u.full_name, u.phone, u.email
+        FROM fund_programs fp
+        JOIN users u ON fp.user_id = u.id
+        WHERE fp.status = 'active'
+    '''),
+}
+
+
+def encode_cursor(row):
+    return f"{row['created_at']}_{row['id']}"
+
+
+def decode_cursor(value):
+    if not value or '_' not in value:
+        return None
+    created_at, row_id = value.rsplit('_', 1)
+    try:
+        return created_at, int(row_id)
+    except ValueError:
+        return None
+
+
+def get_feed_page(conn, feed, after=None, page_size=None):
+    page_size = page_size or Config.FEED_PAGE_SIZE
+    if not Config.FEED_CACHE_ENABLED:
+        return query_feed_page(conn, feed, after, page_size)
+
+    key = f"{feed}:{page_size}:{after or ''}"
+    cached = feed_cache.get(feed, key)
+    if cached is not None:
+        return cached
+    if after and not feed_cache.issued(feed, after):
+        # Only first pages and cursors handed out by a cached page are
+        # cached; any other after= value would add an entry per request.
+        return query_feed_page(conn, feed, after, page_size)
+    generation = feed_cache.generation(feed)
+    rows, next_cursor = query_feed_page(conn, feed, after, page_size)
+    feed_cache.set(feed, key, generation, [rows, next_cursor], next_cursor)
+    return rows, next_cursor
+
+
+def query_feed_page(conn, feed, after, page_size):
+    alias, sql = FEEDS[feed]
+    params = []
+    cursor = decode_cursor(after)
+    if cursor:
+        sql += f' AND ({alias}.created_at, {alias}.id) < (?, ?)'
+        params.extend(cursor)
+    sql += f' ORDER BY {alias}.created_at DESC, {alias}.id DESC LIMIT ?'
+    params.append(page_size + 1)
+
+    rows = [dict(row) for row in conn.execute(sql, params)]
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def get_feed_row(conn, feed, row_id):
+    # One listing as the feed shows it, for a card added to an open page.
+    alias, sql = FEEDS[feed]
+    row = conn.execute(sql + f' AND {alias}.id = ?', (row_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def page_url(param, value):
+    args = request.args.to_dict()
+    if value:
+        args[param] = value
+    else:
+        args.pop(param, None)
+    return url_for(request.endpoint, **request.view_args, **args)
+
+
+def init_app(app):
+    app.add_template_global(page_url)
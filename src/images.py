@@ -0,0 +1,147 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import ExifTags, Image, ImageOps
+from src.cache import feed_cache
+from src.config import Config
+from src.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+PHOTO_TABLES = {'needy_requests', 'donor_offers'}
+# APP1 carries EXIF and XMP, APP13 carries IPTC.
+JPEG_METADATA_MARKERS = {0xE1, 0xED}
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'photoshop')
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=Config.IMAGE_WORKERS, thread_name_prefix='images')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def variant_path(photo_path, suffix):
+    return photo_path.rsplit('.', 1)[0] + f'_{suffix}.webp'
+
+
+def strip_jpeg_segments(path):
+    # Drops the metadata segments in front of the scan and copies
+    # everything else byte for byte, so the picture is not re-encoded.
+    # Returns whether a stripped copy was written next to the file.
+    with open(path, 'rb') as f:
+        data = f.read()
+    parts = [data[:2]]
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0xDA:
+            break
+        end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], 'big')
+        if marker not in JPEG_METADATA_MARKERS:
+            parts.append(data[pos:end])
+        pos = end
+    parts.append(data[pos:])
+    stripped = b''.join(parts)
+    if len(stripped) == len(data):
+        return False
+    with open(path + '.tmp', 'wb') as f:
+        f.write(stripped)
+    return True
+
+
+def strip_metadata(image, path, format=None):
+    # An untouched JPEG loses its metadata segments without re-encoding,
+    # and an untouched file without metadata is left alone. Anything else
+    # is re-saved: Pillow only writes EXIF/XMP when asked to. The copy
+    # goes to path + '.tmp' and the caller renames it over the original
+    # once the source image is closed: Windows refuses to replace a file
+    # that is still open.
+    if image.format == 'JPEG':
+        return strip_jpeg_segments(path)
+    if image.format and not any(key in image.info for key in METADATA_KEYS):
+        return False
+    format = format or image.format
+    params = {'icc_profile': image.info.get('icc_profile')}
+    if format == 'JPEG':
+        params['quality'] = 90
+    elif format == 'WEBP':
+        params['quality'] = Config.IMAGE_WEBP_QUALITY
+    elif format == 'GIF' and getattr(image, 'is_animated', False):
+        params['save_all'] = True
+    image.save(path + '.tmp', format=format, **params)
+    return True
+
+
+def needs_rotation(image):
+    # Animated images are kept as they are: transposing keeps one frame.
+    if getattr(image, 'is_animated', False):
+        return False
+    return image.getexif().get(ExifTags.Base.Orientation, 1) not in (0, 1)
+
+
+def build_variants(photo_path):
+    stripped = False
+    try:
+        with Image.open(photo_path) as image:
+            image.seek(0)
+            if needs_rotation(image):
+                oriented = ImageOps.exif_transpose(image)
+                stripped = strip_metadata(oriented, photo_path, format=image.format)
+            else:
+                oriented = image
+                stripped = strip_metadata(image, photo_path)
+            if oriented.mode not in ('RGB', 'RGBA'):
+                oriented = oriented.convert('RGBA' if 'transparency' in oriented.info else 'RGB')
+
+            thumb = ImageOps.fit(oriented, Config.IMAGE_THUMB_SIZE, Image.Resampling.LANCZOS)
+            thumb_path = variant_path(photo_path, 'thumb')
+            thumb.save(thumb_path, 'WEBP', quality=Config.IMAGE_WEBP_QUALITY, method=4)
+
+            medium = oriented.copy()
+            medium.thumbnail(Config.IMAGE_MEDIUM_SIZE, Image.Resampling.LANCZOS)
+            medium_path = variant_path(photo_path, 'medium')
+            medium.save(medium_path, 'WEBP', quality=Config.IMAGE_WEBP_QUALITY, method=4)
+    except Exception:
+        if stripped:
+            os.remove(photo_path + '.tmp')
+        raise
+    if stripped:
+        os.replace(photo_path + '.tmp', photo_path)
+    return thumb_path.replace('\\', '/'), medium_path.replace('\\', '/')
+
+
+def process_photo(table, row_id, photo_path):
+    try:
+        thumb_path, medium_path = build_variants(photo_path)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', photo_path)
+        return None
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            f'UPDATE {table} SET photo_thumb_path = ?, photo_medium_path = ? WHERE id = ? AND photo_path = ?',
+            (thumb_path, medium_path, row_id, photo_path)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    feed_cache.invalidate(table)
+    return thumb_path, medium_path
+
+
+def schedule_photo_processing(table, row_id, photo_path):
+    if not photo_path or table not in PHOTO_TABLES:
+        return None
+    return get_executor().submit(process_photo, table, row_id, photo_path)
@@ -0,0 +1,162 @@
+import os
+import threading
+from bisect import bisect_left, insort
+from src.config import Config
+
+
+URGENCY_RANK = {'normal': 0, 'urgent': 1, 'critical': 2}
+
+SOURCES = {
+    'needy_requests': '''
+        SELECT nr.id, nr.user_id, nr.title, nr.category, nr.urgency, nr.quantity,
+               nr.contact_info, nr.created_at, nr.status, u.full_name
+        FROM needy_requests nr
+        JOIN users u ON nr.user_id = u.id
+    ''',
+    'donor_offers': '''
+        SELECT do.id, do.user_id, do.title, do.category, do.help_type, do.quantity,
+               do.contact_info, do.created_at, do.status, u.full_name
+        FROM donor_offers do
+        JOIN users u ON do.user_id = u.id
+    ''',
+    'fund_programs': '''
+        SELECT fp.id, fp.user_id, fp.title, fp.category, NULL AS quantity,
+               fp.contact_info, fp.created_at, fp.status, u.full_name
+        FROM fund_programs fp
+        JOIN users u ON fp.user_id = u.id
+    ''',
+}
+ALIASES = {'needy_requests': 'nr', 'donor_offers': 'do', 'fund_programs': 'fp'}
+
+
+def covers(supply, demand):
+    return supply is None or demand is None or supply >= demand
+
+
+class RankedBuckets:
+    # Active rows grouped by category; every bucket is kept sorted by rank,
+    # so a top-N lookup walks from the best end and stops after N hits.
+
+    def __init__(self):
+        self.buckets = {}
+        self.rows = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def put(self, key, row, rank):
+        self.discard(key)
+        insort(self.buckets.setdefault(row['category'], []), (rank, key))
+        self.rows[key] = (rank, row)
+
+    def load(self, entries):
+        # Initial fill: append everything, then sort each bucket once.
+        for key, row, rank in entries:
+            self.buckets.setdefault(row['category'], []).append((rank, key))
+            self.rows[key] = (rank, row)
+        for bucket in self.buckets.values():
+            bucket.sort()
+
+    def discard(self, key):
+        entry = self.rows.pop(key, None)
+        if entry is not None:
+            rank, row = entry
+            bucket = self.buckets[row['category']]
+            del bucket[bisect_left(bucket, (rank, key))]
+
+    def top(self, category, accept, limit):
+        found = []
+        for _, key in reversed(self.buckets.get(category, ())):
+            row = self.rows[key][1]
+            if accept(row):
+                found.append(row)
+                if len(found) == limit:
+                    break
+        return found
+
+
+class MatchIndex:
+    # Per-process candidate index. It follows the database through the
+    # row_versions counters: a sync reads only the rows whose row_version
+    # moved since the last one, so rows created or closed by any worker are
+    # picked up incrementally and an idle sync is a single lookup. Listings
+    # are closed rather than deleted, so a status change is all it tracks.
+    # Lookups take the same lock as sync: with threaded workers a request
+    # may read the buckets while another one applies changes to them.
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.versions = {}
+        self.requests = RankedBuckets()
+        self.offers = RankedBuckets()
+
+    def _check_fork(self):
+        if self.pid != os.getpid():
+            # An index built in the serve master is still a valid snapshot in
+            # a forked worker; only the lock must not be shared.
+            self.pid = os.getpid()
+            self.lock = threading.Lock()
+
+    def sync(self, conn):
+        self._check_fork()
+        if self.read_versions(conn) == self.versions:
+            return
+        with self.lock:
+            # Read again under the lock: a sync that finished while this one
+            # waited has already applied everything up to its own snapshot,
+            # and versions must never move back to an older one.
+            current = self.read_versions(conn)
+            for table, sql in SOURCES.items():
+                seen = self.versions.get(table)
+                if seen is not None and current.get(table, 0) <= seen:
+                    continue
+                side = self.requests if table == 'needy_requests' else self.offers
+                if seen is None:
+                    rows = conn.execute(sql + f" WHERE {ALIASES[table]}.status = 'active'")
+                    side.load(self.entry(table, dict(row)) for row in rows)
+                else:
+                    rows = conn.execute(sql + f' WHERE {ALIASES[table]}.row_version > ?', (seen,))
+                    for row in rows:
+                        key, row, rank = self.entry(table, dict(row))
+                        if row['status'] == 'active':
+                            side.put(key, row, rank)
+                        else:
+                            side.discard(key)
+                self.versions[table] = current.get(table, 0)
+
+    def read_versions(self, conn):
+        return dict(conn.execute(
+            'SELECT name, version FROM row_versions WHERE name IN (?, ?, ?)', tuple(SOURCES)
+        ).fetchall())
+
+    def entry(self, table, row):
+        row['kind'] = table
+        if table == 'needy_requests':
+            rank = (URGENCY_RANK.get(row['urgency'], 0), row['created_at'])
+        else:
+            rank = (row['created_at'],)
+        return (table, row['id']), row, rank
+
+    def offers_for(self, request, limit=None):
+        # Newest offers first among those whose quantity covers the request.
+        quantity = request['quantity']
+        self._check_fork()
+        with self.lock:
+            return self.offers.top(
+                request['category'], lambda offer: covers(offer['quantity'], quantity),
+                limit or Config.MATCH_LIMIT
+            )
+
+    def requests_for(self, offer, limit=None):
+        # Most urgent, then newest, among requests the offer can cover.
+        quantity = offer['quantity'] if 'quantity' in offer.keys() else None
+        self._check_fork()
+        with self.lock:
+            return self.requests.top(
+                offer['category'], lambda request: covers(quantity, request['quantity']),
+                limit or Config.MATCH_LIMIT
+            )
+
+
+match_index = MatchIndex()
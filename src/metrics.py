@@ -0,0 +1,352 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Response, before_render_template, g, request, template_rendered
+from src.config import Config
+
+_current = ContextVar('request_stats', default=None)
+
+HISTOGRAMS = {
+    'charity_request_duration_seconds': 'Время обработки запроса, включая отправку тела',
+    'charity_request_sql_seconds': 'Суммарное время SQL-запросов за один HTTP-запрос',
+    'charity_request_sql_queries': 'Число SQL-запросов за один HTTP-запрос',
+    'charity_request_auth_seconds': 'Время проверки входа и роли за один HTTP-запрос',
+    'charity_template_render_seconds': 'Время рендеринга шаблона',
+    'charity_db_connection_wait_seconds': 'Время получения соединения из пула',
+}
+COUNTERS = {
+    'charity_requests_total': 'Число обработанных запросов',
+}
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Totals of workers that have exited are folded into this row.
+RETIRED = (0, 0)
+
+
+class RequestStats:
+    # Collected while one request runs; a ContextVar points at it so the
+    # connection and template hooks find it without touching flask.g.
+
+    __slots__ = ('started', 'queries', 'sql_time', 'render_time', 'wait_time', 'auth_time', 'rendering')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.wait_time = 0.0
+        self.auth_time = 0.0
+        self.rendering = {}
+
+
+def observe_query(seconds):
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_time += seconds
+
+
+@contextmanager
+def timed(phase):
+    # Adds the time spent in the block to a phase of the current request.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            setattr(stats, f'{phase}_time', getattr(stats, f'{phase}_time') + time.perf_counter() - started)
+
+
+class Registry:
+    # Cumulative histograms and counters of this process. With
+    # METRICS_STORAGE=sqlite a background thread writes the snapshot to a
+    # shared file under this pid and start time, and /metrics sums the
+    # snapshots of all workers, so the numbers do not depend on which worker
+    # answers. Workers come and go (WEB_MAX_REQUESTS), so the rows of exited
+    # ones are folded into one retired row: the file stays small and the
+    # counters never go down.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.pid = None
+        self.started = None
+        self.flush_pid = None
+        self.flush_lock = threading.Lock()
+
+    def _check_fork(self):
+        # The child must not report the parent's numbers a second time.
+        if self.pid != os.getpid():
+            self.values = {}
+            self.lock = threading.Lock()
+            self.pid = os.getpid()
+            self.started = time.time()
+
+    def observe(self, name, labels, value, buckets=None):
+        buckets = buckets or Config.METRICS_BUCKETS
+        key = (name, labels)
+        with self.lock:
+            self._check_fork()
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(buckets) + 2)
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self._check_fork()
+            series = self.values.setdefault(key, [0])
+            series[0] += amount
+
+    def snapshot(self):
+        with self.lock:
+            self._check_fork()
+            return {key: list(series) for key, series in self.values.items()}
+
+    def _database(self):
+        conn = sqlite3.connect(Config.METRICS_DATABASE, timeout=Config.DB_BUSY_TIMEOUT / 1000)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = OFF')
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(metrics)')]
+        if columns and 'started' not in columns:
+            # A file from an older version is simply emptied.
+            conn.execute('DROP TABLE metrics')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS metrics (
+                pid INTEGER NOT NULL,
+                started REAL NOT NULL,
+                name TEXT NOT NULL,
+                labels TEXT NOT NULL,
+                series TEXT NOT NULL,
+                PRIMARY KEY (pid, started, name, labels)
+            )
+        ''')
+        return conn
+
+    def flush(self, conn):
+        snapshot = self.snapshot()
+        rows = [
+            (self.pid, self.started, name, json.dumps(labels), json.dumps(series))
+            for (name, labels), series in snapshot.items()
+        ]
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO metrics (pid, started, name, labels, series) VALUES (?, ?, ?, ?, ?)', rows
+            )
+
+    def _exited(self, conn):
+        # A pid that is gone, or one reused by a newer worker, marks an exited one.
+        latest = {}
+        for pid, started in conn.execute('SELECT DISTINCT pid, started FROM metrics WHERE pid != 0'):
+            latest.setdefault(pid, []).append(started)
+        exited = []
+        for pid, starts in latest.items():
+            starts.sort()
+            exited.extend((pid, started) for started in starts[:-1])
+            if not _alive(pid):
+                exited.append((pid, starts[-1]))
+        return exited
+
+    def retire_exited(self, conn):
+        if not self._exited(conn):
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another worker may have folded them while we waited for the lock.
+            exited = self._exited(conn)
+            totals = {}
+            for pid, started in exited + [RETIRED]:
+                for name, labels, series in conn.execute(
+                    'SELECT name, labels, series FROM metrics WHERE pid = ? AND started = ?', (pid, started)
+                ):
+                    _add(totals, (name, labels), json.loads(series))
+            conn.executemany('DELETE FROM metrics WHERE pid = ? AND started = ?', exited)
+            conn.executemany(
+                'INSERT OR REPLACE INTO metrics (pid, started, name, labels, series) VALUES (?, ?, ?, ?, ?)',
+                [RETIRED + (name, labels, json.dumps(series)) for (name, labels), series in totals.items()]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def clear_storage(self):
+        # Called once by the server master before the workers start: rows of
+        # a previous run belong to pids that mean nothing any more.
+        conn = self._database()
+        try:
+            with conn:
+                conn.execute('DELETE FROM metrics')
+        finally:
+            conn.close()
+
+    def ensure_flushing(self):
+        if Config.METRICS_STORAGE != 'sqlite' or self.flush_pid == os.getpid():
+            return
+        with self.flush_lock:
+            if self.flush_pid == os.getpid():
+                return
+            threading.Thread(target=self._flush_loop, name='metrics', daemon=True).start()
+            self.flush_pid = os.getpid()
+
+    def _flush_loop(self):
+        conn = self._database()
+        while True:
+            time.sleep(Config.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush(conn)
+            except sqlite3.Error:
+                pass
+
+    def collect(self):
+        if Config.METRICS_STORAGE != 'sqlite':
+            return self.snapshot()
+        conn = self._database()
+        try:
+            self.flush(conn)
+            self.retire_exited(conn)
+            merged = {}
+            for name, labels, series in conn.execute('SELECT name, labels, series FROM metrics'):
+                _add(merged, (name, tuple(tuple(pair) for pair in json.loads(labels))), json.loads(series))
+            return merged
+        finally:
+            conn.close()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _add(totals, key, series):
+    total = totals.setdefault(key, [0] * len(series))
+    for index, value in enumerate(series):
+        total[index] += value
+
+
+registry = Registry()
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus(values):
+    lines = []
+    by_name = {}
+    for (name, labels), series in sorted(values.items()):
+        by_name.setdefault(name, []).append((labels, series))
+    for name, entries in by_name.items():
+        if name in COUNTERS:
+            lines.append(f'# HELP {name} {COUNTERS[name]}')
+            lines.append(f'# TYPE {name} counter')
+            for labels, series in entries:
+                lines.append(f'{name}{_format_labels(labels)} {series[0]}')
+            continue
+        lines.append(f'# HELP {name} {HISTOGRAMS[name]}')
+        lines.append(f'# TYPE {name} histogram')
+        buckets = QUERY_BUCKETS if name == 'charity_request_sql_queries' else Config.METRICS_BUCKETS
+        for labels, series in entries:
+            for bound, count in zip(buckets, series):
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {series[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {series[-2]:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {series[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def start_request():
+    registry.ensure_flushing()
+    g.request_stats = RequestStats()
+    _current.set(g.request_stats)
+
+
+def finish_request(stats, endpoint, method, status):
+    # Runs when the server closes the response, after a streamed body has
+    # been sent, so the duration and the render time cover the whole page.
+    _current.set(None)
+    labels = (('endpoint', endpoint), ('method', method))
+    registry.observe('charity_request_duration_seconds', labels, time.perf_counter() - stats.started)
+    registry.observe('charity_request_sql_seconds', labels, stats.sql_time)
+    registry.observe('charity_request_sql_queries', labels, stats.queries, QUERY_BUCKETS)
+    registry.observe('charity_request_auth_seconds', labels, stats.auth_time)
+    registry.inc('charity_requests_total', labels + (('status', str(status)),))
+
+
+def server_timing(stats):
+    total = (time.perf_counter() - stats.started) * 1000
+    return ', '.join([
+        f'app;dur={total:.2f}',
+        f'sql;dur={stats.sql_time * 1000:.2f};desc="{stats.queries} queries"',
+        f'render;dur={stats.render_time * 1000:.2f}',
+        f'db-wait;dur={stats.wait_time * 1000:.2f}',
+        f'auth;dur={stats.auth_time * 1000:.2f}',
+    ])
+
+
+def after_request(response):
+    stats = g.get('request_stats')
+    if stats is None:
+        return response
+    if Config.METRICS_SERVER_TIMING:
+        # A streamed page renders after this point; its header only covers the view.
+        response.headers['Server-Timing'] = server_timing(stats)
+    endpoint, method, status = request.endpoint or 'unknown', request.method, response.status_code
+    response.call_on_close(lambda: finish_request(stats, endpoint, method, status))
+    return response
+
+
+def on_before_render(app, template, context, **extra):
+    stats = _current.get()
+    if stats is not None:
+        stats.rendering[template.name] = time.perf_counter()
+
+
+def on_rendered(app, template, context, **extra):
+    stats = _current.get()
+    if stats is None or template.name not in stats.rendering:
+        return
+    elapsed = time.perf_counter() - stats.rendering.pop(template.name)
+    stats.render_time += elapsed
+    registry.observe('charity_template_render_seconds', (('template', template.name),), elapsed)
+
+
+def observe_connection_wait(seconds):
+    stats = _current.get()
+    if stats is not None:
+        stats.wait_time += seconds
+    registry.observe('charity_db_connection_wait_seconds', (), seconds)
+
+
+def metrics_view():
+    if request.remote_addr not in Config.METRICS_ALLOWED_IPS:
+        return Response(status=404)
+    return Response(render_prometheus(registry.collect()), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    if not Config.METRICS_ENABLED:
+        return
+    app.before_request(start_request)
+    app.after_request(after_request)
+    before_render_template.connect(on_before_render, app)
+    template_rendered.connect(on_rendered, app)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,299 @@
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_column(conn, table, column, definition):
+    if column not in _columns(conn, table):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def _initial_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT,
+            user_type TEXT NOT NULL,
+            phone TEXT,
+            address TEXT,
+            description TEXT,
+            is_verified BOOLEAN DEFAULT TRUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS donor_offers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT NOT NULL,
+            help_type TEXT NOT NULL,
+            amount DECIMAL(10,2),
+            status TEXT DEFAULT 'active',
+            contact_info TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            photo_path TEXT,
+            quantity INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fund_programs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT NOT NULL,
+            target_amount DECIMAL(10,2),
+            current_amount DECIMAL(10,2) DEFAULT 0,
+            status TEXT DEFAULT 'active',
+            contact_info TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS needy_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            category TEXT NOT NULL,
+            urgency TEXT DEFAULT 'normal',
+            status TEXT DEFAULT 'active',
+            contact_info TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            photo_path TEXT,
+            quantity INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_user_id INTEGER NOT NULL,
+            to_user_id INTEGER NOT NULL,
+            offer_id INTEGER,
+            offer_type TEXT NOT NULL,
+            message TEXT NOT NULL,
+            status TEXT DEFAULT 'new',
+            from_user_contact TEXT,
+            from_user_name TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            quantity INTEGER,
+            FOREIGN KEY (from_user_id) REFERENCES users (id),
+            FOREIGN KEY (to_user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS donations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            donor_id INTEGER NOT NULL,
+            fund_id INTEGER NOT NULL,
+            program_id INTEGER NOT NULL,
+            amount DECIMAL(10,2) NOT NULL,
+            message TEXT,
+            status TEXT DEFAULT 'pending',
+            donor_contact TEXT,
+            donor_name TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (donor_id) REFERENCES users (id),
+            FOREIGN KEY (fund_id) REFERENCES users (id),
+            FOREIGN KEY (program_id) REFERENCES fund_programs (id)
+        )
+    ''')
+
+    # Databases created before versioning carry the columns that used to be
+    # added by ad-hoc ALTERs only partially, and the responses timestamp typo.
+    if 'created_a' in _columns(conn, 'responses'):
+        conn.execute('ALTER TABLE responses RENAME COLUMN created_a TO created_at')
+    _add_column(conn, 'responses', 'from_user_contact', 'TEXT')
+    _add_column(conn, 'responses', 'from_user_name', 'TEXT')
+    _add_column(conn, 'responses', 'quantity', 'INTEGER')
+    _add_column(conn, 'needy_requests', 'photo_path', 'TEXT')
+    _add_column(conn, 'needy_requests', 'quantity', 'INTEGER')
+    _add_column(conn, 'donor_offers', 'photo_path', 'TEXT')
+    _add_column(conn, 'donor_offers', 'quantity', 'INTEGER')
+    _add_column(conn, 'donations', 'donor_contact', 'TEXT')
+    _add_column(conn, 'donations', 'donor_name', 'TEXT')
+
+
+def _listing_indexes(conn):
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_needy_requests_status_created ON needy_requests (status, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_donor_offers_status_created ON donor_offers (status, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_fund_programs_status_created ON fund_programs (status, created_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_to_user_type ON responses (to_user_id, offer_type)')
+
+
+def _search_index(conn):
+    for table in ('needy_requests', 'donor_offers', 'fund_programs'):
+        fts = f'{table}_fts'
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                title, description,
+                content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, title, description) VALUES (new.id, new.title, new.description);
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF title, description ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO {fts} (rowid, title, description) VALUES (new.id, new.title, new.description);
+            END
+        ''')
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _photo_variants(conn):
+    for table in ('needy_requests', 'donor_offers'):
+        _add_column(conn, table, 'photo_thumb_path', 'TEXT')
+        _add_column(conn, table, 'photo_medium_path', 'TEXT')
+
+
+def _user_counters(conn):
+    # Imported here because src.counters depends on src.database, which imports this module.
+    from src.counters import create_counter_triggers, rebuild_counters
+    create_counter_triggers(conn)
+    rebuild_counters(conn)
+
+
+def _row_versions(conn):
+    # Every write takes the next value of its table's counter, so
+    # row_versions.version is the max row version issued so far and moves
+    # on insert, update and delete alike.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS row_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in ('needy_requests', 'donor_offers', 'fund_programs', 'responses'):
+        _add_column(conn, table, 'row_version', 'INTEGER NOT NULL DEFAULT 0')
+        conn.execute('INSERT OR IGNORE INTO row_versions (name) VALUES (?)', (table,))
+        bump = f"UPDATE row_versions SET version = version + 1 WHERE name = '{table}';"
+        stamp = (
+            f"UPDATE {table} SET row_version = (SELECT version FROM row_versions WHERE name = '{table}') "
+            f"WHERE id = new.id;"
+        )
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_insert AFTER INSERT ON {table} BEGIN
+                {bump}
+                {stamp}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_update AFTER UPDATE ON {table}
+            WHEN new.row_version = old.row_version BEGIN
+                {bump}
+                {stamp}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_delete AFTER DELETE ON {table} BEGIN
+                {bump}
+            END
+        ''')
+    # Listings and responses carry the author's name and contacts.
+    conn.execute("INSERT OR IGNORE INTO row_versions (name) VALUES ('users')")
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE OF full_name, phone, email ON users BEGIN
+            UPDATE row_versions SET version = version + 1 WHERE name = 'users';
+        END
+    ''')
+    conn.execute('DROP INDEX IF EXISTS idx_responses_to_user_type')
+    conn.execute(
+        'CREATE INDEX IF NOT EXISTS idx_responses_to_user_type_version '
+        'ON responses (to_user_id, offer_type, row_version)'
+    )
+
+
+def _row_version_indexes(conn):
+    for table in ('needy_requests', 'donor_offers', 'fund_programs'):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_row_version ON {table} (row_version)')
+
+
+def _donation_ledger(conn):
+    # Money moves to integer kopecks before the ledger triggers start
+    # guarding the donations table.
+    conn.execute('UPDATE donations SET amount = CAST(ROUND(amount * 100) AS INTEGER)')
+    conn.execute('''
+        UPDATE fund_programs
+        SET target_amount = CAST(ROUND(target_amount * 100) AS INTEGER),
+            current_amount = CAST(ROUND(COALESCE(current_amount, 0) * 100) AS INTEGER)
+    ''')
+    # Imported here for the same reason as in _user_counters.
+    from src.donations import create_ledger_triggers, rebuild_rollups
+    create_ledger_triggers(conn)
+    rebuild_rollups(conn)
+
+
+def _outbox(conn):
+    # Imported here for the same reason as in _user_counters.
+    from src.notifications import create_outbox_tables
+    create_outbox_tables(conn)
+
+
+def _owner_indexes(conn):
+    # "My requests/offers/programs" pages filter by owner and sort by date.
+    for table in ('needy_requests', 'donor_offers', 'fund_programs'):
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_user_created ON {table} (user_id, created_at)')
+
+
+def _inbox_deletes(conn):
+    # Imported here for the same reason as in _user_counters.
+    from src.notifications import create_inbox_delete_trigger
+    _add_column(conn, 'user_inbox', 'read_until', 'INTEGER NOT NULL DEFAULT 0')
+    create_inbox_delete_trigger(conn)
+
+
+MIGRATIONS = [
+    (1, _initial_schema),
+    (2, _listing_indexes),
+    (3, _search_index),
+    (4, _photo_variants),
+    (5, _user_counters),
+    (6, _row_versions),
+    (7, _row_version_indexes),
+    (8, _donation_ledger),
+    (9, _outbox),
+    (10, _owner_indexes),
+    (11, _inbox_deletes),
+]
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    latest = MIGRATIONS[-1][0]
+    if get_version(conn) >= latest:
+        return []
+
+    applied = []
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Another process may have migrated while we waited for the write lock.
+        version = get_version(conn)
+        for number, migration in MIGRATIONS:
+            if number > version:
+                migration(conn)
+                applied.append(number)
+        conn.execute(f'PRAGMA user_version = {latest}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
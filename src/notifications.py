@@ -0,0 +1,298 @@
+import logging
+import os
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from importlib import import_module
+import click
+from flask import session
+from src.config import Config
+from src.database import connect, get_db_connection
+
+logger = logging.getLogger(__name__)
+
+INBOX_PAGES = {'needy': '/needy/responses', 'donor': '/donor/responses', 'fund': '/fund/responses'}
+
+
+def create_outbox_tables(conn):
+    # The trigger writes the outbox row inside the transaction of the
+    # responses INSERT, whichever route did it, so a committed response
+    # always has its notification queued and a rolled back one never does.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            response_id INTEGER NOT NULL,
+            to_user_id INTEGER NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_outbox_available ON outbox (available_at)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_inbox (
+            user_id INTEGER PRIMARY KEY REFERENCES users (id),
+            unread INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS responses_outbox_insert AFTER INSERT ON responses BEGIN
+            INSERT INTO outbox (response_id, to_user_id) VALUES (new.id, new.to_user_id);
+        END
+    ''')
+
+
+def create_inbox_delete_trigger(conn):
+    # A deleted response leaves the unread counter only if it was counted:
+    # its first delivery attempt is behind it and it arrived after the
+    # inbox was last opened. A still queued notification goes with it.
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_outbox_response ON outbox (response_id)')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS responses_inbox_delete AFTER DELETE ON responses BEGIN
+            UPDATE user_inbox SET unread = unread - 1
+            WHERE user_id = old.to_user_id AND unread > 0 AND read_until < old.id
+              AND NOT EXISTS (SELECT 1 FROM outbox WHERE response_id = old.id AND attempts = 0);
+            DELETE FROM outbox WHERE response_id = old.id;
+        END
+    ''')
+
+
+class LogTransport:
+    # A transport takes a batch of (outbox id, EmailMessage) and returns the
+    # ids it failed to deliver. The default one only writes to the log.
+
+    def send(self, messages):
+        for _, message in messages:
+            logger.info('Уведомление для %s: %s', message['To'], message['Subject'])
+        return []
+
+
+class FileTransport:
+    # Local stand-in for an SMTP server: every message becomes an .eml file.
+
+    def __init__(self, folder=None):
+        self.folder = folder or Config.NOTIFY_MAIL_DIR
+
+    def send(self, messages):
+        os.makedirs(self.folder, exist_ok=True)
+        failed = []
+        for outbox_id, message in messages:
+            try:
+                with open(os.path.join(self.folder, f'{outbox_id}.eml'), 'wb') as f:
+                    f.write(message.as_bytes())
+            except OSError:
+                logger.exception('Не удалось сохранить уведомление %s', outbox_id)
+                failed.append(outbox_id)
+        return failed
+
+
+class SmtpTransport:
+    # One connection per batch.
+
+    def send(self, messages):
+        try:
+            smtp = smtplib.SMTP(Config.NOTIFY_SMTP_HOST, Config.NOTIFY_SMTP_PORT, timeout=Config.NOTIFY_SMTP_TIMEOUT)
+        except OSError:
+            logger.exception('SMTP-сервер недоступен')
+            return [outbox_id for outbox_id, _ in messages]
+        failed = []
+        with smtp:
+            if Config.NOTIFY_SMTP_STARTTLS:
+                smtp.starttls()
+            if Config.NOTIFY_SMTP_USER:
+                smtp.login(Config.NOTIFY_SMTP_USER, Config.NOTIFY_SMTP_PASSWORD)
+            for outbox_id, message in messages:
+                try:
+                    smtp.send_message(message)
+                except smtplib.SMTPException:
+                    logger.exception('Не удалось отправить уведомление %s', outbox_id)
+                    failed.append(outbox_id)
+        return failed
+
+
+TRANSPORTS = {'log': LogTransport, 'file': FileTransport, 'smtp': SmtpTransport}
+
+
+def get_transport(name=None):
+    # A built-in name, or "package.module:Class" for a custom transport.
+    name = name or Config.NOTIFY_TRANSPORT
+    if name in TRANSPORTS:
+        return TRANSPORTS[name]()
+    module, _, attr = name.partition(':')
+    return getattr(import_module(module), attr)()
+
+
+def build_messages(conn, rows):
+    ids = {row['response_id']: row['id'] for row in rows}
+    details = conn.execute(f'''
+        SELECT r.id, r.message, u.email, u.user_type,
+               COALESCE(r.from_user_name, f.full_name) AS responder_name
+        FROM responses r
+        JOIN users u ON r.to_user_id = u.id
+        JOIN users f ON r.from_user_id = f.id
+        WHERE r.id IN ({', '.join('?' * len(ids))})
+    ''', list(ids)).fetchall()
+    messages = []
+    for row in details:
+        message = EmailMessage()
+        message['From'] = Config.NOTIFY_FROM
+        message['To'] = row['email']
+        message['Subject'] = f'Новый отклик от {row["responder_name"]}'
+        message.set_content(
+            f'{row["responder_name"]} откликнулся на ваше объявление.\n\n'
+            f'{row["message"]}\n\n'
+            f'Все отклики: {INBOX_PAGES.get(row["user_type"], "/")}\n'
+        )
+        messages.append((ids[row['id']], message))
+    return messages
+
+
+def drain_outbox(conn, transport, batch_size=None):
+    # Claims a batch by pushing its available_at past a lease, so a worker
+    # that dies mid-batch only delays those rows. Unread counters move in
+    # the claim transaction and only on the first attempt, so retries never
+    # count a response twice. Responses older than the last visit to the
+    # inbox page were already seen there and are not counted. Returns the
+    # number of rows claimed.
+    batch_size = batch_size or Config.OUTBOX_BATCH_SIZE
+    now = time.time()
+    # Every worker process polls; an empty outbox must not cost a write lock.
+    due = conn.execute('SELECT 1 FROM outbox WHERE available_at <= ? LIMIT 1', (now,)).fetchone()
+    if due is None:
+        return 0
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        rows = conn.execute('''
+            UPDATE outbox SET attempts = attempts + 1, available_at = ?
+            WHERE id IN (SELECT id FROM outbox WHERE available_at <= ? ORDER BY id LIMIT ?)
+            RETURNING id, response_id, to_user_id, attempts
+        ''', (now + Config.OUTBOX_LEASE, now, batch_size)).fetchall()
+        conn.executemany('''
+            INSERT INTO user_inbox (user_id, unread) VALUES (?, 1)
+            ON CONFLICT (user_id) DO UPDATE SET unread = unread + 1 WHERE read_until < ?
+        ''', [(row['to_user_id'], row['response_id']) for row in rows if row['attempts'] == 1])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if not rows:
+        return 0
+
+    failed = set(transport.send(build_messages(conn, rows)))
+    attempts = {row['id']: row['attempts'] for row in rows}
+    retry = [
+        (now + Config.OUTBOX_RETRY_DELAY * 2 ** (attempts[outbox_id] - 1), outbox_id)
+        for outbox_id in failed if attempts[outbox_id] < Config.OUTBOX_MAX_ATTEMPTS
+    ]
+    dropped = [outbox_id for outbox_id in failed if attempts[outbox_id] >= Config.OUTBOX_MAX_ATTEMPTS]
+    for outbox_id in dropped:
+        logger.error('Уведомление %s не доставлено после %s попыток', outbox_id, attempts[outbox_id])
+    with conn:
+        conn.executemany('UPDATE outbox SET available_at = ? WHERE id = ?', retry)
+        conn.executemany('DELETE FROM outbox WHERE id = ?', [
+            (row['id'],) for row in rows if row['id'] not in failed or row['id'] in dropped
+        ])
+    return len(rows)
+
+
+class OutboxWorker:
+    # A small pool of daemon threads per process. Each drains batches until
+    # the outbox is empty, then sleeps until woken by a local insert or until
+    # the poll interval passes, which picks up rows written by other workers.
+
+    def __init__(self):
+        self.pid = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    def ensure_started(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            # Threads do not survive a fork, so every worker process starts its own.
+            self.wakeup = threading.Event()
+            for number in range(Config.OUTBOX_WORKERS):
+                threading.Thread(target=self.run, name=f'outbox-{number}', daemon=True).start()
+            self.pid = os.getpid()
+
+    def wake(self):
+        self.wakeup.set()
+
+    def run(self):
+        conn = connect()
+        transport = get_transport()
+        while True:
+            try:
+                claimed = drain_outbox(conn, transport)
+            except Exception:
+                logger.exception('Ошибка при разборе outbox')
+                claimed = 0
+            if claimed < Config.OUTBOX_BATCH_SIZE:
+                self.wakeup.wait(Config.OUTBOX_POLL_INTERVAL)
+                self.wakeup.clear()
+
+
+outbox_worker = OutboxWorker()
+
+
+def notify_outbox():
+    # Called after a response INSERT commits, so this process picks it up
+    # without waiting for the poll interval.
+    if Config.OUTBOX_ENABLED:
+        outbox_worker.ensure_started()
+        outbox_worker.wake()
+
+
+def get_unread(conn, user_id):
+    row = conn.execute('SELECT unread FROM user_inbox WHERE user_id = ?', (user_id,)).fetchone()
+    return row['unread'] if row else 0
+
+
+def mark_read(conn, user_id):
+    # Everything up to the newest response is on the page being opened.
+    # Both reads are index lookups; the write lock is only taken when the
+    # counter or the marker actually has to move.
+    newest = conn.execute('SELECT MAX(id) FROM responses WHERE to_user_id = ?', (user_id,)).fetchone()[0] or 0
+    inbox = conn.execute('SELECT unread, read_until FROM user_inbox WHERE user_id = ?', (user_id,)).fetchone()
+    if inbox is None and not newest:
+        return
+    if inbox is not None and not inbox['unread'] and inbox['read_until'] >= newest:
+        return
+    conn.execute('''
+        INSERT INTO user_inbox (user_id, unread, read_until) VALUES (?, 0, ?)
+        ON CONFLICT (user_id) DO UPDATE SET unread = 0, read_until = excluded.read_until
+        WHERE unread != 0 OR read_until < excluded.read_until
+    ''', (user_id, newest))
+    conn.commit()
+
+
+def unread_responses():
+    if 'user_id' not in session:
+        return 0
+    return get_unread(get_db_connection(), session['user_id'])
+
+
+@click.command('drain-outbox')
+@click.option('--transport', help='log, file, smtp или module:Class')
+def drain_outbox_command(transport):
+    conn = connect()
+    transport = get_transport(transport)
+    total = 0
+    try:
+        while True:
+            claimed = drain_outbox(conn, transport)
+            total += claimed
+            if claimed < Config.OUTBOX_BATCH_SIZE:
+                break
+    finally:
+        conn.close()
+    click.echo(f'Обработано уведомлений: {total}')
+
+
+def init_app(app):
+    app.add_template_global(unread_responses)
+    app.cli.add_command(drain_outbox_command)
+    if Config.OUTBOX_ENABLED:
+        app.before_request(outbox_worker.ensure_started)
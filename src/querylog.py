@@ -0,0 +1,73 @@
+import logging
+import sqlite3
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+MAX_PARAM_LENGTH = 200
+
+
+def explain(conn, sql, parameters=()):
+    # Goes through the base class so the plan query itself is neither timed
+    # nor logged. Returns the plan as indented lines, like the sqlite shell.
+    if not sql.lstrip()[:7].upper().startswith(EXPLAINABLE):
+        return []
+    rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+def plan_scans(plan, tables):
+    # Full passes over the given tables. "SCAN t USING INDEX" still reads
+    # every row; FTS and other virtual tables are searched, not scanned.
+    found = []
+    for line in plan:
+        words = line.split()
+        if words[:1] == ['SCAN'] and len(words) > 1 and 'VIRTUAL' not in words and words[1] in tables:
+            found.append(line.strip())
+    return found
+
+
+def _shorten(value):
+    if isinstance(value, str) and len(value) > MAX_PARAM_LENGTH:
+        return value[:MAX_PARAM_LENGTH] + '...'
+    if isinstance(value, bytes):
+        return f'<{len(value)} bytes>'
+    return value
+
+
+def log_slow_query(conn, sql, parameters, seconds):
+    if parameters is None:
+        shown, plan = None, []
+    else:
+        if isinstance(parameters, dict):
+            shown = {name: _shorten(value) for name, value in parameters.items()}
+        else:
+            shown = [_shorten(value) for value in parameters]
+        try:
+            plan = explain(conn, sql, parameters)
+        except sqlite3.Error as e:
+            plan = [f'EXPLAIN не удался: {e}']
+    sql = ' '.join(sql.split())
+    logger.warning(
+        'Медленный запрос %.1f мс: %s\nпараметры: %r\nплан:\n%s',
+        seconds * 1000, sql, shown, '\n'.join(plan),
+        extra={'sql': sql, 'parameters': shown, 'plan': plan, 'duration': seconds},
+    )
+
+
+def is_slow(seconds):
+    return Config.SLOW_QUERY_LOG and seconds * 1000 >= Config.SLOW_QUERY_MS
+
+
+def init_app(app):
+    if Config.SLOW_QUERY_LOG_FILE:
+        handler = logging.FileHandler(Config.SLOW_QUERY_LOG_FILE, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(process)d %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
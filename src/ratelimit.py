@@ -0,0 +1,183 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import jsonify, render_template, flash, request, session
+from src.config import Config
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+SCOPES = ('ip', 'user')
+# Login is a plain form post; the respond-to-* routes are called with fetch
+# and read a JSON answer.
+HTML_ENDPOINTS = {'auth.login': 'auth/login.html'}
+
+
+def parse_limit(value):
+    # "10/minute" -> (rate per second, burst); "off" disables the bucket.
+    if not value or value == 'off':
+        return None
+    count, _, period = value.partition('/')
+    count = int(count)
+    return count / PERIODS[period], count
+
+
+def parse_rules(defaults, override=''):
+    # override: "auth.login:ip=20/minute,donor.respond_to_request:user=off"
+    rules = {endpoint: dict(limits) for endpoint, limits in defaults.items()}
+    for item in filter(None, (part.strip() for part in override.split(','))):
+        endpoint, _, limit = item.partition(':')
+        scope, _, value = limit.partition('=')
+        if scope not in SCOPES:
+            raise ValueError(f'Неизвестная область ограничения: {item}')
+        rules.setdefault(endpoint, {})[scope] = value
+    parsed = {}
+    for endpoint, limits in rules.items():
+        limits = {scope: parse_limit(value) for scope, value in limits.items()}
+        parsed[endpoint] = {scope: limit for scope, limit in limits.items() if limit}
+    return parsed
+
+
+class MemoryBuckets:
+    # Token buckets in ordered dicts, split into shards with a lock each so
+    # that worker threads rarely wait on one another. A bucket is stored as
+    # (tokens, last update, moment it is full again). Every shard is an LRU
+    # capped at its share of RATE_LIMIT_MAX_KEYS: a touched bucket moves to
+    # the end and the least recently used one is evicted, so memory stays
+    # bounded even under a flood of new addresses.
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, shards=None, max_keys=None):
+        self.shard_count = shards or Config.RATE_LIMIT_SHARDS
+        self.max_keys = (max_keys or Config.RATE_LIMIT_MAX_KEYS) // self.shard_count
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def _reset(self):
+        # Locks held by another thread at fork time would stay held forever,
+        # so every process builds its own shards, once.
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.shards = [(OrderedDict(), threading.Lock()) for _ in range(self.shard_count)]
+            self.pid = os.getpid()
+
+    def take(self, key, rate, burst, now):
+        # Returns 0 when a token was taken, otherwise seconds until one is free.
+        if self.pid != os.getpid():
+            self._reset()
+        buckets, lock = self.shards[hash(key) % self.shard_count]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None or bucket[2] <= now:
+                tokens = burst
+            else:
+                tokens = bucket[0] + (now - bucket[1]) * rate
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+            buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            buckets.move_to_end(key)
+            if len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+        return wait
+
+
+class SqliteBuckets:
+    # Shared by every worker process through a separate SQLite file, like
+    # the feed cache. One UPSERT per check; slower than memory, but a client
+    # cannot multiply its limit by the number of workers.
+
+    clock = staticmethod(time.time)
+    sweep_every = 10000
+
+    def __init__(self, database=None):
+        self.database = database or Config.RATE_LIMIT_DATABASE
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.database, timeout=Config.DB_BUSY_TIMEOUT / 1000, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    allowed INTEGER NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.calls = 0
+        return conn
+
+    def take(self, key, rate, burst, now):
+        conn = self._connection()
+        self._local.calls += 1
+        if self._local.calls % self.sweep_every == 0:
+            # Any bucket untouched for the longest period has refilled.
+            conn.execute('DELETE FROM rate_buckets WHERE updated_at < ?', (now - max(PERIODS.values()),))
+        refill = 'MIN(:burst, tokens + (:now - updated_at) * :rate)'
+        tokens, allowed = conn.execute(f'''
+            INSERT INTO rate_buckets (key, tokens, updated_at, allowed) VALUES (:key, :burst - 1, :now, 1)
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = {refill} - ({refill} >= 1),
+                allowed = {refill} >= 1,
+                updated_at = :now
+            RETURNING tokens, allowed
+        ''', {'key': '|'.join(map(str, key)), 'burst': burst, 'now': now, 'rate': rate}).fetchone()
+        return 0 if allowed else (1 - tokens) / rate
+
+
+class RateLimiter:
+
+    def __init__(self, rules=None, storage=None):
+        self.rules = rules if rules is not None else parse_rules(Config.RATE_LIMITS, Config.RATE_LIMITS_OVERRIDE)
+        if storage is None:
+            storage = SqliteBuckets() if Config.RATE_LIMIT_STORAGE == 'sqlite' else MemoryBuckets()
+        self.storage = storage
+
+    def check(self, endpoint, ip, user_id, now=None):
+        # Every bucket of the rule is charged, so a client cannot dodge the
+        # per-user limit by rotating addresses or the other way round.
+        rules = self.rules.get(endpoint)
+        if not rules:
+            return 0
+        now = now or self.storage.clock()
+        wait = 0
+        for scope, (rate, burst) in rules.items():
+            identity = ip if scope == 'ip' else user_id
+            if identity is None:
+                continue
+            wait = max(wait, self.storage.take((endpoint, scope, identity), rate, burst, now))
+        return wait
+
+    def before_request(self):
+        if request.method not in Config.RATE_LIMIT_METHODS or request.endpoint not in self.rules:
+            return None
+        wait = self.check(request.endpoint, request.remote_addr, session.get('user_id'))
+        if not wait:
+            return None
+        return too_many_requests(math.ceil(wait))
+
+
+def too_many_requests(retry_after):
+    message = f'Слишком много запросов. Повторите через {retry_after} с.'
+    if request.endpoint in HTML_ENDPOINTS:
+        flash(message, 'error')
+        response = render_template(HTML_ENDPOINTS[request.endpoint]), 429
+    else:
+        response = jsonify({'success': False, 'message': message}), 429
+    return response + ({'Retry-After': str(retry_after)},)
+
+
+def init_app(app):
+    if Config.RATE_LIMIT_ENABLED:
+        app.before_request(RateLimiter().before_request)
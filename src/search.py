@@ -0,0 +1,69 @@
+import re
+import click
+from src.config import Config
+from src.database import get_db_connection
+from src.validators import (
+    ALLOWED_CATEGORIES, ALLOWED_HELP_TYPES, ALLOWED_URGENCY_LEVELS,
+    CATEGORY_LABELS, HELP_TYPE_LABELS, URGENCY_LABELS
+)
+
+
+SEARCH_INDEXES = {
+    'needy_requests': ('nr', {'category': ALLOWED_CATEGORIES, 'urgency': ALLOWED_URGENCY_LEVELS}),
+    'donor_offers': ('do', {'category': ALLOWED_CATEGORIES, 'help_type': ALLOWED_HELP_TYPES}),
+    'fund_programs': ('fp', {'category': ALLOWED_CATEGORIES}),
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def build_match_query(text):
+    tokens = TOKEN_RE.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search(conn, table, text, filters=None, limit=None):
+    match = build_match_query(text)
+    if not match:
+        return []
+    alias, allowed_filters = SEARCH_INDEXES[table]
+    fts = f'{table}_fts'
+    sql = f'''
+        SELECT {alias}.*, u.full_name, u.phone, u.email
+        FROM {fts}
+        JOIN {table} {alias} ON {alias}.id = {fts}.rowid
+        JOIN users u ON {alias}.user_id = u.id
+        WHERE {fts} MATCH ? AND {alias}.status = 'active'
+    '''
+    params = [match]
+    for column, value in (filters or {}).items():
+        if value and value in allowed_filters.get(column, ()):
+            sql += f' AND {alias}.{column} = ?'
+            params.append(value)
+    sql += f' ORDER BY bm25({fts}, 10.0, 1.0) LIMIT ?'
+    params.append(limit or Config.SEARCH_LIMIT)
+    return conn.execute(sql, params).fetchall()
+
+
+def rebuild_search_index(conn):
+    for table in SEARCH_INDEXES:
+        fts = f'{table}_fts'
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+    conn.commit()
+
+
+@click.command('rebuild-search')
+def rebuild_search_command():
+    conn = get_db_connection()
+    rebuild_search_index(conn)
+    conn.close()
+    click.echo('Поисковый индекс перестроен')
+
+
+def init_app(app):
+    # Globals, unlike the render context, reach macros imported from search.html.
+    app.jinja_env.globals.update(
+        category_labels=CATEGORY_LABELS, help_type_labels=HELP_TYPE_LABELS, urgency_labels=URGENCY_LABELS
+    )
+    app.cli.add_command(rebuild_search_command)
@@ -0,0 +1,50 @@
+from gunicorn.app.base import BaseApplication
+from src.assets import build_assets
+from src.config import Config
+from src.database import connect, init_db
+from src.matching import match_index
+from src.metrics import registry
+from src.templating import precompile_templates
+
+
+class PreforkServer(BaseApplication):
+    # The app is built once in the master (preload_app) and inherited by the
+    # forked workers; everything that holds connections or threads checks the
+    # pid and rebuilds itself lazily in the child.
+
+    def __init__(self, app_factory):
+        self.app_factory = app_factory
+        super().__init__()
+
+    def load_config(self):
+        settings = {
+            'bind': f'{Config.HOST}:{Config.PORT}',
+            'workers': Config.WEB_WORKERS,
+            'threads': Config.WEB_THREADS,
+            'worker_class': 'gthread',
+            'timeout': Config.WEB_TIMEOUT,
+            'graceful_timeout': Config.WEB_GRACEFUL_TIMEOUT,
+            'max_requests': Config.WEB_MAX_REQUESTS,
+            'max_requests_jitter': Config.WEB_MAX_REQUESTS // 10,
+            'preload_app': True,
+            'accesslog': '-',
+            'errorlog': '-',
+        }
+        for key, value in settings.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        init_db()
+        if Config.METRICS_ENABLED and Config.METRICS_STORAGE == 'sqlite':
+            registry.clear_storage()
+        app = self.app_factory()
+        build_assets(app)
+        precompile_templates(app)
+        conn = connect()
+        match_index.sync(conn)
+        conn.close()
+        return app
+
+
+def serve(app_factory):
+    PreforkServer(app_factory).run()
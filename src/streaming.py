@@ -0,0 +1,49 @@
+from flask import current_app, get_flashed_messages, stream_template
+from src.config import Config
+
+
+class RowStream:
+    # Single-pass view over a cursor for streamed templates. The first row is
+    # fetched up front so `{% if rows %}` works without materialising the
+    # result set.
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._first = cursor.fetchone()
+
+    def __bool__(self):
+        return self._first is not None
+
+    def __iter__(self):
+        if self._first is not None:
+            yield self._first
+            yield from self._cursor
+
+
+def _coalesce(chunks, size):
+    # Jinja yields a chunk per template statement; batch them so each write
+    # (and each gzip flush) carries a useful amount of HTML.
+    buffer, length = [], 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            length += len(chunk)
+            if length >= size:
+                yield ''.join(buffer)
+                buffer, length = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def stream_page(template_name, **context):
+    # The session cookie is written before the body streams, so flashed
+    # messages have to be consumed now or they would be shown twice.
+    # The request's pooled connection is released at teardown, after the
+    # last row has been sent.
+    get_flashed_messages(with_categories=True)
+    chunks = stream_template(template_name, **context)
+    return current_app.response_class(_coalesce(chunks, Config.STREAM_CHUNK_SIZE), mimetype='text/html')
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import uuid
+from flask import Request, flash, redirect, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from src.config import Config
+from src.validators import (
+    IMAGE_EXTENSIONS, SNIFF_SIZE, UPLOAD_CHUNK_SIZE,
+    sniff_image_type, validate_file, validate_file_name, file_too_large_message
+)
+
+
+class UploadRejected(BadRequest):
+    pass
+
+
+class UploadStream:
+    # Receives a multipart file part chunk by chunk while Werkzeug parses the
+    # body, so oversized or non-image uploads abort the parse early.
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.head = b''
+        self.persisted = False
+        incoming = os.path.join(Config.UPLOAD_FOLDER, '.incoming')
+        os.makedirs(incoming, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=incoming, suffix='.part')
+        self.file = os.fdopen(fd, 'w+b')
+
+    @property
+    def image_type(self):
+        return sniff_image_type(self.head)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.close()
+            raise RequestEntityTooLarge(file_too_large_message(self.max_size))
+        if len(self.head) < SNIFF_SIZE:
+            self.head += data[:SNIFF_SIZE - len(self.head)]
+            if len(self.head) == SNIFF_SIZE and self.image_type is None:
+                self.close()
+                raise UploadRejected('Файл не является изображением поддерживаемого формата')
+        return self.file.write(data)
+
+    def persist(self, path):
+        self.file.close()
+        os.replace(self.path, path)
+        self.persisted = True
+
+    def close(self):
+        self.file.close()
+        if not self.persisted and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        is_valid, error = validate_file_name(filename)
+        if not is_valid:
+            raise UploadRejected(error)
+        if content_length and content_length > Config.MAX_FILE_SIZE:
+            raise RequestEntityTooLarge(file_too_large_message(Config.MAX_FILE_SIZE))
+        return UploadStream(Config.MAX_FILE_SIZE)
+
+
+def save_uploaded_file(file, upload_type):
+    if not file or not file.filename:
+        return None
+    is_valid, error = validate_file(file)
+    if not is_valid:
+        flash(error, 'error')
+        return None
+
+    stream = file.stream
+    if isinstance(stream, UploadStream):
+        image_type = stream.image_type
+    else:
+        image_type = sniff_image_type(stream.read(SNIFF_SIZE))
+        stream.seek(0)
+    filename = f'{uuid.uuid4()}.{IMAGE_EXTENSIONS[image_type]}'
+    upload_path = os.path.join(Config.UPLOAD_FOLDER, upload_type)
+    os.makedirs(upload_path, exist_ok=True)
+    file_path = os.path.join(upload_path, filename)
+    if isinstance(stream, UploadStream):
+        stream.persist(file_path)
+    else:
+        with open(file_path, 'wb') as target:
+            shutil.copyfileobj(stream, target, UPLOAD_CHUNK_SIZE)
+    return os.path.join(Config.UPLOAD_FOLDER, upload_type, filename).replace('\\', '/')
+
+
+def handle_rejected_upload(error):
+    flash(error.description, 'error')
+    return redirect(request.path)
+
+
+def handle_too_large(error):
+    flash(file_too_large_message(Config.MAX_FILE_SIZE), 'error')
+    return redirect(request.path)
+
+
+def init_app(app):
+    app.request_class = UploadRequest
+    app.register_error_handler(RequestEntityTooLarge, handle_too_large)
+    app.register_error_handler(UploadRejected, handle_rejected_upload)
@@ -1,5 +1,105 @@
+import base64
 import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.config import Config
+
+
+class ScryptHasher:
+    prefix = 'scrypt'
+
+    def __init__(self, n=None, r=None, p=None):
+        self.n = n or Config.SCRYPT_N
+        self.r = r or Config.SCRYPT_R
+        self.p = p or Config.SCRYPT_P
+
+    def _derive(self, password, salt, n, r, p):
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=256 * n * r * p, dklen=32
+        )
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return '$'.join([
+            self.prefix, str(self.n), str(self.r), str(self.p),
+            base64.b64encode(salt).decode(), base64.b64encode(digest).decode()
+        ])
+
+    def verify(self, password, password_hash):
+        _, n, r, p, salt, digest = password_hash.split('$')
+        derived = self._derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(derived, base64.b64decode(digest))
+
+    def needs_rehash(self, password_hash):
+        _, n, r, p, _, _ = password_hash.split('$')
+        return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+
+
+class LegacySha256Hasher:
+    prefix = None
+
+    def hash(self, password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password, password_hash):
+        return hmac.compare_digest(self.hash(password), password_hash)
+
+    def needs_rehash(self, password_hash):
+        return True
+
+
+HASHERS = {'scrypt': ScryptHasher}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_dummy_hash = None
+
+
+def get_hasher():
+    return HASHERS[Config.PASSWORD_HASHER]()
+
+
+def identify_hasher(password_hash):
+    prefix = password_hash.split('$', 1)[0]
+    if prefix in HASHERS:
+        return HASHERS[prefix]()
+    return LegacySha256Hasher()
+
+
+def run_in_hash_pool(func, *args):
+    # Hashing is deliberately slow; a bounded pool caps how many request
+    # threads can be burning CPU on it at the same time.
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+                _executor_pid = os.getpid()
+    return _executor.submit(func, *args).result()
 
 
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    return run_in_hash_pool(get_hasher().hash, password)
+
+
+def verify_password(password, password_hash):
+    return run_in_hash_pool(identify_hasher(password_hash).verify, password, password_hash)
+
+
+def password_needs_rehash(password_hash):
+    hasher = identify_hasher(password_hash)
+    return hasher.prefix != Config.PASSWORD_HASHER or hasher.needs_rehash(password_hash)
+
+
+def burn_password_check(password):
+    # Spend the same time as a real check when the email is unknown, so
+    # response timing does not reveal which emails are registered.
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = get_hasher().hash('dummy-password')
+    verify_password(password, _dummy_hash)
@@ -1,319 +1,502 @@
 import re
-from bleach import clean
+import threading
+from bleach.sanitizer import Cleaner
 from src.config import Config
 
 
-ALLOWED_CATEGORIES = [
-    'food', 'clothes', 'education', 'entertainment', 'books',
-    'household', 'electronics', 'children', 'emergency', 'other'
-]
-ALLOWED_HELP_TYPES = [
-    'one_time', 'regular', 'consultation', 'volunteer', 'other'
-]
-ALLOWED_URGENCY_LEVELS = ['normal', 'urgent', 'critical']
+# Values and their labels in the order the search filters list them. Templates get
+# the labels from here (src.search.init_app), so a new value is added in one place.
+CATEGORY_LABELS = {
+    'food': 'Продукты питания', 'clothes': 'Одежда и обувь', 'education': 'Образование',
+    'entertainment': 'Развлечения', 'books': 'Книги', 'household': 'Товары для дома',
+    'electronics': 'Техника', 'children': 'Детские вещи', 'emergency': 'Экстренная помощь',
+    'other': 'Другое',
+}
+HELP_TYPE_LABELS = {
+    'one_time': 'Разовая помощь', 'regular': 'Регулярная помощь', 'consultation': 'Консультация',
+    'volunteer': 'Волонтерство', 'other': 'Другое',
+}
+URGENCY_LABELS = {'normal': 'Обычная', 'urgent': 'Срочная', 'critical': 'Критическая'}
+ALLOWED_CATEGORIES = list(CATEGORY_LABELS)
+ALLOWED_HELP_TYPES = list(HELP_TYPE_LABELS)
+ALLOWED_URGENCY_LEVELS = list(URGENCY_LABELS)
 ALLOWED_USER_TYPES = ['needy', 'donor', 'fund']
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+NON_DIGIT_RE = re.compile(r'\D')
+WHITESPACE_RE = re.compile(r'\s')
+AMOUNT_RE = re.compile(r'^(\d+)(?:[.,](\d{1,2}))?$')
+MAX_DONATION_KOPECKS = 10_000_000 * 100
+ALLOWED_TAGS = frozenset(['p', 'br', 'strong', 'em', 'u', 'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+# Characters bleach rewrites: markup, entities, CR and C0 controls other than tab/LF.
+# Text without any of them comes back from bleach unchanged, so it skips the parser.
+MARKUP_RE = re.compile(r'[<>&\r\x00-\x08\x0b\x0c\x0e-\x1f]')
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+IMAGE_EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'gif': 'gif', 'webp': 'webp'}
+SNIFF_SIZE = 12
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+_cleaners = threading.local()
+
+
+def get_cleaner():
+    # bleach Cleaner keeps parser state, so each thread gets its own.
+    cleaner = getattr(_cleaners, 'cleaner', None)
+    if cleaner is None:
+        cleaner = _cleaners.cleaner = Cleaner(tags=ALLOWED_TAGS, attributes={}, strip=True)
+    return cleaner
 
 
 def sanitize_html(text):
     if not text:
         return ''
-    allowed_tags = ['p', 'br', 'strong', 'em', 'u', 'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
-    allowed_attributes = {}
-    
-    return clean(text, tags=allowed_tags, attributes=allowed_attributes, strip=True)
+    if not MARKUP_RE.search(text):
+        return text
+    
+    return get_cleaner().clean(text)
+
+
+def sanitize_column(values):
+    # sanitize_html over many values: one search over all of them finds the
+    # usual case of a column without any markup.
+    if not MARKUP_RE.search('\n'.join(values)):
+        return values
+    return [sanitize_html(value) for value in values]
+
+
+def sanitize_form(form_data, *fields):
+    return [sanitize_html((form_data.get(field) or '').strip()) for field in fields]
+
+
+def text_rule(field_name, min_length=1, max_length=500, required=True):
+    missing = f'{field_name} обязателен для заполнения'
+    too_short = f'{field_name} должен быть не менее {min_length} символов'
+    too_long = f'{field_name} слишком длинный (макс. {max_length} символов)'
+
+    def check(value):
+        if not value:
+            return missing if required else None
+        length = len(value.strip())
+        if length < min_length:
+            return too_short
+        if length > max_length:
+            return too_long
+        return None
+
+    check.column = lengths_column(min_length, max_length, required)
+    return check
+
+
+def lengths_column(min_length, max_length, required):
+    # Column check for bulk mode: True when every value passes, found with
+    # C-level map/min/max instead of a rule call per value. Anything else
+    # falls back to the per-value rule, which finds the messages.
+    def column(values):
+        if all(values):
+            present = values
+        elif required:
+            return False
+        else:
+            present = list(filter(None, values))
+            if not present:
+                return True
+        # Stripping only shortens a value, so the longest one is measured as is.
+        return min(map(len, map(str.strip, present))) >= min_length and max(map(len, present)) <= max_length
+    return column
+
+
+def choice_rule(allowed, missing, invalid):
+    allowed = frozenset(allowed)
+
+    def check(value):
+        if not value:
+            return missing
+        if value not in allowed:
+            return invalid
+        return None
+
+    check.column = allowed.issuperset
+    return check
+
+
+def email_rule():
+    def check(value):
+        if not value:
+            return 'Email обязателен для заполнения'
+        value = value.strip().lower()
+        if not EMAIL_RE.match(value):
+            return 'Некорректный формат email'
+        if len(value) > 255:
+            return 'Email слишком длинный (макс. 255 символов)'
+        return None
+    return check
+
+
+def password_rule():
+    def check(value):
+        if not value:
+            return 'Пароль обязателен для заполнения'
+        if len(value) < 6:
+            return 'Пароль должен быть не менее 6 символов'
+        if len(value) > 128:
+            return 'Пароль слишком длинный (макс. 128 символов)'
+        return None
+    return check
+
+
+def quantity_rule():
+    def check(value):
+        if not value:
+            return None
+        try:
+            qty = int(value)
+        except (ValueError, TypeError):
+            return 'Количество должно быть числом'
+        if qty < 1:
+            return 'Количество должно быть положительным числом'
+        if qty > 1000000:
+            return 'Количество слишком большое (макс. 1,000,000)'
+        return None
+
+    def column(values):
+        present = list(filter(None, values))
+        if not present:
+            return True
+        try:
+            numbers = list(map(int, present))
+        except ValueError:
+            return False
+        return min(numbers) >= 1 and max(numbers) <= 1000000
+
+    check.column = column
+    return check
+
+
+def _check_phone_digits(value):
+    digits = len(NON_DIGIT_RE.sub('', value))
+    if digits < 10:
+        return 'Номер телефона слишком короткий (минимум 10 цифр)'
+    if digits > 15:
+        return 'Номер телефона слишком длинный (максимум 15 цифр)'
+    return None
+
+
+def parse_kopecks(value):
+    # "1 500,5" -> 150050. Money is kept in integer kopecks everywhere, so
+    # nothing is ever rounded through a float.
+    match = AMOUNT_RE.match(WHITESPACE_RE.sub('', value or ''))
+    if match is None:
+        return None
+    rubles, kopecks = match.groups()
+    return int(rubles) * 100 + int((kopecks or '').ljust(2, '0'))
+
+
+def amount_rule():
+    def check(value):
+        if not value:
+            return 'Сумма обязательна для заполнения'
+        kopecks = parse_kopecks(value)
+        if kopecks is None:
+            return 'Сумма должна быть числом, не более двух знаков после запятой'
+        if kopecks < 100:
+            return 'Минимальная сумма пожертвования — 1 ₽'
+        if kopecks > MAX_DONATION_KOPECKS:
+            return 'Сумма слишком большая (макс. 10,000,000 ₽)'
+        return None
+    return check
+
+
+def phone_rule():
+    def check(value):
+        if not value:
+            return None
+        return _check_phone_digits(value.strip())
+    return check
+
+
+def contact_info_rule(is_phone=False):
+    def check(value):
+        if not value:
+            return 'Контактная информация обязательна для заполнения'
+        value = value.strip()
+        if len(value) < 5:
+            return 'Контактная информация слишком короткая (минимум 5 символов)'
+        if len(value) > 500:
+            return 'Контактная информация слишком длинная (максимум 500 символов)'
+        if is_phone:
+            return _check_phone_digits(value)
+        return None
+
+    if not is_phone:
+        check.column = lengths_column(5, 500, required=True)
+    return check
+
+
+def _getter(keys):
+    if not isinstance(keys, tuple):
+        return lambda form_data: form_data.get(keys)
+
+    def get(form_data):
+        value = None
+        for key in keys:
+            value = form_data.get(key)
+            if value:
+                break
+        return value
+    return get
+
+
+def _on_form(get, rule):
+    return lambda form_data: rule(get(form_data))
+
+
+def _column_getter(keys):
+    # The values of one field across many records.
+    if not isinstance(keys, tuple):
+        return lambda records: [record.get(keys) for record in records]
+    get = _getter(keys)
+    return lambda records: list(map(get, records))
+
+
+def map_distinct(function, values):
+    # Rules and converters depend on the value alone, so a column with
+    # repeated values (categories, contacts) calls them once per distinct one.
+    distinct = set(values)
+    if len(distinct) * 2 > len(values):
+        return list(map(function, values))
+    results = {value: function(value) for value in distinct}
+    return list(map(results.__getitem__, values))
+
+
+def compile_schema(schema):
+    # A schema is a list of (field, rule) pairs; a tuple of fields means
+    # "the first non-empty one of these", as the response forms use two names.
+    # Getters are built once, so validating a form costs one getter and one
+    # rule call per field.
+    # Plain fields are read with the form's own get; a tuple of fields is
+    # folded into its rule, which then takes the whole form.
+    checks = [
+        (keys, rule) if not isinstance(keys, tuple) else (None, _on_form(_getter(keys), rule))
+        for keys, rule in schema
+    ]
+    columns = [(_column_getter(keys), rule, getattr(rule, 'column', None)) for keys, rule in schema]
+
+    def validate(form_data):
+        get = form_data.get
+        errors = []
+        for key, rule in checks:
+            error = rule(get(key)) if key is not None else rule(form_data)
+            if error is not None:
+                errors.append(error)
+        return errors
+
+    def many(records):
+        # Bulk mode: each field is checked over the whole column at once. A
+        # column that passes its column check costs no per-record Python
+        # work at all; otherwise the rule runs once per distinct value.
+        failed = {}
+        for get_column, rule, column in columns:
+            values = get_column(records)
+            if column is not None and column(values):
+                continue
+            errors = map_distinct(rule, values)
+            if errors.count(None) == len(errors):
+                continue
+            for index, error in enumerate(errors):
+                if error is not None:
+                    failed.setdefault(index, []).append(error)
+        return sorted(failed.items())
+
+    validate.many = many
+    return validate
+
+
+def validate_many(validator, records):
+    # [(index, errors)] for the records that fail, in order.
+    many = getattr(validator, 'many', None)
+    if many is not None:
+        return many(records)
+    return [(index, errors) for index, errors in enumerate(map(validator, records)) if errors]
+
+
+_email = email_rule()
+_password = password_rule()
+_category = choice_rule(
+    ALLOWED_CATEGORIES, 'Категория обязательна для заполнения',
+    f'Некорректная категория. Разрешенные: {", ".join(ALLOWED_CATEGORIES)}'
+)
+_help_type = choice_rule(ALLOWED_HELP_TYPES, 'Тип помощи обязателен для заполнения', 'Некорректный тип помощи')
+_urgency = choice_rule(
+    ALLOWED_URGENCY_LEVELS, 'Уровень срочности обязателен для заполнения', 'Некорректный уровень срочности'
+)
+_user_type = choice_rule(
+    ALLOWED_USER_TYPES, 'Тип пользователя обязателен для заполнения', 'Некорректный тип пользователя'
+)
+_quantity = quantity_rule()
+_phone = phone_rule()
+_amount = amount_rule()
+_contact_info = contact_info_rule()
+_contact_phone = contact_info_rule(is_phone=True)
+
+
+def _result(error):
+    return error is None, error
 
 
 def validate_email(email):
-    if not email:
-        return False, 'Email обязателен для заполнения'
-    
-    email = email.strip().lower()
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(pattern, email):
-        return False, 'Некорректный формат email'
-    if len(email) > 255:
-        return False, 'Email слишком длинный (макс. 255 символов)'
-    
-    return True, None
+    return _result(_email(email))
 
 
 def validate_password(password):
-    if not password:
-        return False, 'Пароль обязателен для заполнения'
-    
-    if len(password) < 6:
-        return False, 'Пароль должен быть не менее 6 символов'
-    
-    if len(password) > 128:
-        return False, 'Пароль слишком длинный (макс. 128 символов)'
-    
-    return True, None
+    return _result(_password(password))
 
 
 def validate_text_field(value, field_name, min_length=1, max_length=500, required=True):
-    if not value and required:
-        return False, f'{field_name} обязателен для заполнения'
-    
-    if not value:
-        return True, None
-    
-    value = value.strip()
-    
-    if len(value) < min_length:
-        return False, f'{field_name} должен быть не менее {min_length} символов'
-    
-    if len(value) > max_length:
-        return False, f'{field_name} слишком длинный (макс. {max_length} символов)'
-    
-    return True, None
+    return _result(text_rule(field_name, min_length, max_length, required)(value))
 
 
 def validate_category(category):
-    if not category:
-        return False, 'Категория обязательна для заполнения'
-    
-    if category not in ALLOWED_CATEGORIES:
-        return False, f'Некорректная категория. Разрешенные: {", ".join(ALLOWED_CATEGORIES)}'
-    
-    return True, None
+    return _result(_category(category))
 
 
 def validate_help_type(help_type):
-    if not help_type:
-        return False, 'Тип помощи обязателен для заполнения'
-    
-    if help_type not in ALLOWED_HELP_TYPES:
-        return False, 'Некорректный тип помощи'
-    
-    return True, None
+    return _result(_help_type(help_type))
 
 
 def validate_urgency(urgency):
-    if not urgency:
-        return False, 'Уровень срочности обязателен для заполнения'
-    
-    if urgency not in ALLOWED_URGENCY_LEVELS:
-        return False, 'Некорректный уровень срочности'
-    
-    return True, None
+    return _result(_urgency(urgency))
 
 
 def validate_quantity(quantity):
-    if not quantity:
-        return True, None
-    
-    try:
-        qty = int(quantity)
-        if qty < 1:
-            return False, 'Количество должно быть положительным числом'
-        if qty > 1000000:
-            return False, 'Количество слишком большое (макс. 1,000,000)'
-        return True, None
-    except (ValueError, TypeError):
-        return False, 'Количество должно быть числом'
+    return _result(_quantity(quantity))
 
 
 def validate_phone(phone):
-    if not phone:
-        return True, None
-    
-    phone = phone.strip()
-    digits_only = re.sub(r'\D', '', phone)
-    
-    if len(digits_only) < 10:
-        return False, 'Номер телефона слишком короткий (минимум 10 цифр)'
-    
-    if len(digits_only) > 15:
-        return False, 'Номер телефона слишком длинный (максимум 15 цифр)'
-    if len(digits_only) == 0:
-        return False, 'Номер телефона должен содержать цифры'
-    
-    return True, None
+    return _result(_phone(phone))
 
 
 def validate_user_type(user_type):
-    if not user_type:
-        return False, 'Тип пользователя обязателен для заполнения'
-    
-    if user_type not in ALLOWED_USER_TYPES:
-        return False, 'Некорректный тип пользователя'
-    
-    return True, None
+    return _result(_user_type(user_type))
 
 
 def validate_contact_info(contact_info, is_phone=False):
-    if not contact_info:
-        return False, 'Контактная информация обязательна для заполнения'
-    
-    contact_info = contact_info.strip()
-    
-    if len(contact_info) < 5:
-        return False, 'Контактная информация слишком короткая (минимум 5 символов)'
+    return _result((_contact_phone if is_phone else _contact_info)(contact_info))
+
+
+def sniff_image_type(head):
+    for signature, image_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def validate_file_name(filename):
+    if '.' not in filename:
+        return False, 'Файл должен иметь расширение'
     
-    if len(contact_info) > 500:
-        return False, 'Контактная информация слишком длинная (максимум 500 символов)'
-    if is_phone:
-        digits_only = re.sub(r'\D', '', contact_info)
-        if len(digits_only) < 10:
-            return False, 'Номер телефона слишком короткий (минимум 10 цифр)'
-        if len(digits_only) > 15:
-            return False, 'Номер телефона слишком длинный (максимум 15 цифр)'
+    extension = filename.rsplit('.', 1)[1].lower()
+    if extension not in Config.ALLOWED_EXTENSIONS:
+        return False, f'Неподдерживаемый формат файла. Разрешенные: {", ".join(Config.ALLOWED_EXTENSIONS)}'
     
     return True, None
 
 
+def file_too_large_message(max_size):
+    max_size_mb = max_size / (1024 * 1024)
+    return f'Размер файла превышает максимальный ({max_size_mb}MB)'
+
+
 def validate_file(file, max_size=None):
     if not file or not file.filename:
         return True, None
-    if '.' not in file.filename:
-        return False, 'Файл должен иметь расширение'
-    
-    extension = file.filename.rsplit('.', 1)[1].lower()
-    if extension not in Config.ALLOWED_EXTENSIONS:
-        return False, f'Неподдерживаемый формат файла. Разрешенные: {", ".join(Config.ALLOWED_EXTENSIONS)}'
+    is_valid, error = validate_file_name(file.filename)
+    if not is_valid:
+        return False, error
     if max_size is None:
         max_size = Config.MAX_FILE_SIZE
-    file.seek(0, 2)
-    file_size = file.tell()
-    file.seek(0)
-    
+
+    stream = file.stream
+    if hasattr(stream, 'image_type'):
+        # Already sniffed and measured while the request body was streamed in.
+        file_size, image_type = stream.size, stream.image_type
+    else:
+        stream.seek(0)
+        head = stream.read(SNIFF_SIZE)
+        image_type = sniff_image_type(head)
+        file_size = len(head)
+        while image_type and file_size <= max_size:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            file_size += len(chunk)
+        stream.seek(0)
+
+    if image_type is None:
+        return False, 'Файл не является изображением поддерживаемого формата'
     if file_size > max_size:
-        max_size_mb = max_size / (1024 * 1024)
-        return False, f'Размер файла превышает максимальный ({max_size_mb}MB)'
+        return False, file_too_large_message(max_size)
     
     return True, None
 
 
-def validate_request_data(form_data):
-    errors = []
-    is_valid, error = validate_text_field(
-        form_data.get('title'), 'Название', min_length=3, max_length=200
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_text_field(
-        form_data.get('description'), 'Описание', min_length=10, max_length=2000, required=False
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_category(form_data.get('category'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_urgency(form_data.get('urgency'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_contact_info(form_data.get('contact_info'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_quantity(form_data.get('quantity'))
-    if not is_valid:
-        errors.append(error)
-    
-    return errors
-
+REQUEST_SCHEMA = [
+    ('title', text_rule('Название', min_length=3, max_length=200)),
+    ('description', text_rule('Описание', min_length=10, max_length=2000, required=False)),
+    ('category', _category),
+    ('urgency', _urgency),
+    ('contact_info', _contact_info),
+    ('quantity', _quantity),
+]
 
-def validate_offer_data(form_data):
-    errors = []
-    is_valid, error = validate_text_field(
-        form_data.get('title'), 'Название', min_length=3, max_length=200
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_text_field(
-        form_data.get('description'), 'Описание', min_length=10, max_length=2000, required=False
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_category(form_data.get('category'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_help_type(form_data.get('help_type'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_contact_info(form_data.get('contact_info'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_quantity(form_data.get('quantity'))
-    if not is_valid:
-        errors.append(error)
-    
-    return errors
+OFFER_SCHEMA = [
+    ('title', text_rule('Название', min_length=3, max_length=200)),
+    ('description', text_rule('Описание', min_length=10, max_length=2000, required=False)),
+    ('category', _category),
+    ('help_type', _help_type),
+    ('contact_info', _contact_info),
+    ('quantity', _quantity),
+]
 
+PROGRAM_SCHEMA = [
+    ('title', text_rule('Название программы', min_length=3, max_length=200)),
+    ('description', text_rule('Описание', min_length=10, max_length=2000, required=False)),
+    ('category', _category),
+    ('contact_info', _contact_info),
+]
 
-def validate_program_data(form_data):
-    errors = []
-    is_valid, error = validate_text_field(
-        form_data.get('title'), 'Название программы', min_length=3, max_length=200
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_text_field(
-        form_data.get('description'), 'Описание', min_length=10, max_length=2000, required=False
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_category(form_data.get('category'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_contact_info(form_data.get('contact_info'))
-    if not is_valid:
-        errors.append(error)
-    
-    return errors
+REGISTRATION_SCHEMA = [
+    ('email', _email),
+    ('password', _password),
+    ('full_name', text_rule('Имя', min_length=2, max_length=100)),
+    ('user_type', _user_type),
+    ('phone', _phone),
+    ('address', text_rule('Адрес', min_length=5, max_length=500, required=False)),
+]
 
+RESPONSE_SCHEMA = [
+    ('message', text_rule('Сообщение', min_length=1, max_length=1000, required=False)),
+    (('responder_contact', 'donor_contact'), _contact_info),
+    (('responder_name', 'donor_name'), text_rule('Имя', min_length=2, max_length=100, required=False)),
+    ('quantity', _quantity),
+]
 
-def validate_registration_data(form_data):
-    errors = []
-    is_valid, error = validate_email(form_data.get('email'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_password(form_data.get('password'))
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_text_field(
-        form_data.get('full_name'), 'Имя', min_length=2, max_length=100
-    )
-    if not is_valid:
-        errors.append(error)
-    is_valid, error = validate_user_type(form_data.get('user_type'))
-    if not is_valid:
-        errors.append(error)
-    if form_data.get('phone'):
-        is_valid, error = validate_phone(form_data.get('phone'))
-        if not is_valid:
-            errors.append(error)
-    if form_data.get('address'):
-        is_valid, error = validate_text_field(
-            form_data.get('address'), 'Адрес', min_length=5, max_length=500, required=False
-        )
-        if not is_valid:
-            errors.append(error)
-    
-    return errors
-
-
-def validate_response_data(form_data):
-    errors = []
-    if form_data.get('message'):
-        is_valid, error = validate_text_field(
-            form_data.get('message'), 'Сообщение', min_length=1, max_length=1000, required=False
-        )
-        if not is_valid:
-            errors.append(error)
-    is_valid, error = validate_contact_info(form_data.get('responder_contact') or form_data.get('donor_contact'))
-    if not is_valid:
-        errors.append(error)
-    if form_data.get('responder_name') or form_data.get('donor_name'):
-        name = form_data.get('responder_name') or form_data.get('donor_name')
-        is_valid, error = validate_text_field(
-            name, 'Имя', min_length=2, max_length=100, required=False
-        )
-        if not is_valid:
-            errors.append(error)
-    if form_data.get('quantity'):
-        is_valid, error = validate_quantity(form_data.get('quantity'))
-        if not is_valid:
-            errors.append(error)
-    
-    return errors
+DONATION_SCHEMA = [
+    ('amount', _amount),
+    ('message', text_rule('Сообщение', min_length=1, max_length=1000, required=False)),
+    ('donor_contact', _contact_info),
+    ('donor_name', text_rule('Имя', min_length=2, max_length=100)),
+]
 
+validate_request_data = compile_schema(REQUEST_SCHEMA)
+validate_offer_data = compile_schema(OFFER_SCHEMA)
+validate_program_data = compile_schema(PROGRAM_SCHEMA)
+validate_registration_data = compile_schema(REGISTRATION_SCHEMA)
+validate_response_data = compile_schema(RESPONSE_SCHEMA)
+validate_donation_data = compile_schema(DONATION_SCHEMA)
@@ -0,0 +1,151 @@
+// Плавная анимация появления элементов
+document.addEventListener('DOMContentLoaded', function() {
+    const elements = document.querySelectorAll('.card, .alert, .btn, .table');
+
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach((entry, index) => {
+            if (entry.isIntersecting) {
+        setTimeout(() => {
+                    entry.target.style.opacity = '0';
+                    entry.target.style.transform = 'translateY(20px)';
+                    entry.target.style.transition = 'all 0.6s cubic-bezier(0.4, 0, 0.2, 1)';
+
+                    requestAnimationFrame(() => {
+                        entry.target.style.opacity = '1';
+                        entry.target.style.transform = 'translateY(0)';
+                    });
+                }, index * 50);
+                observer.unobserve(entry.target);
+            }
+        });
+    }, {
+        threshold: 0.1
+    });
+
+    elements.forEach(el => {
+        el.style.opacity = '0';
+        observer.observe(el);
+    });
+
+    // Плавный скролл
+    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+        anchor.addEventListener('click', function (e) {
+            e.preventDefault();
+            const target = document.querySelector(this.getAttribute('href'));
+            if (target) {
+                target.scrollIntoView({
+                    behavior: 'smooth',
+                    block: 'start'
+                });
+            }
+        });
+    });
+});
+
+// Живые обновления: новые отклики и объявления без перезагрузки страницы
+document.addEventListener('DOMContentLoaded', function() {
+    const url = document.body.dataset.eventsUrl;
+    if (!url || !window.EventSource) {
+        return;
+    }
+
+    const feeds = Array.from(document.querySelectorAll('[data-feed]')).map(el => el.dataset.feed);
+    const source = new EventSource(
+        feeds.length ? url + '?feeds=' + encodeURIComponent(feeds.join(',')) : url,
+        { withCredentials: true }
+    );
+
+    function setUnread(count) {
+        document.querySelectorAll('#unread-badge').forEach(badge => {
+            badge.textContent = count;
+            badge.classList.toggle('d-none', !count);
+        });
+    }
+
+    function showNotice(container, key, text) {
+        if (container.querySelector('[data-notice="' + key + '"]')) {
+            return;
+        }
+        const notice = document.createElement('div');
+        notice.className = 'alert alert-info d-flex justify-content-between align-items-center';
+        notice.dataset.notice = key;
+        notice.innerHTML = '<span><i class="fas fa-bell me-2"></i></span>' +
+            '<a href="" class="btn btn-sm btn-outline-primary">Обновить</a>';
+        notice.querySelector('span').append(text);
+        container.prepend(notice);
+    }
+
+    // После (пере)подключения счётчик берём с сервера: события за время
+    // разрыва не сохраняются.
+    source.addEventListener('open', function() {
+        fetch('/api/v1/unread', { credentials: 'same-origin' })
+            .then(response => response.ok ? response.json() : null)
+            .then(data => { if (data) setUnread(data.unread); })
+            .catch(() => {});
+    });
+
+    source.addEventListener('response', function(e) {
+        const data = JSON.parse(e.data);
+        if (/\/responses$/.test(location.pathname)) {
+            showNotice(document.querySelector('.container.mt-4'), 'response',
+                'Новый отклик от ' + data.responder_name);
+            return;
+        }
+        const badge = document.getElementById('unread-badge');
+        if (badge) {
+            setUnread((parseInt(badge.textContent, 10) || 0) + 1);
+        }
+    });
+
+    source.addEventListener('listing', function(e) {
+        const data = JSON.parse(e.data);
+        if (data.state === 'closed') {
+            const card = document.querySelector('[data-listing="' + data.table + '-' + data.id + '"]');
+            if (card) {
+                card.style.transition = 'opacity 0.6s';
+                card.style.opacity = '0';
+                setTimeout(() => card.remove(), 600);
+            }
+            return;
+        }
+        document.querySelectorAll('[data-feed="' + data.table + '"]').forEach(container => {
+            insertCard(container, data).catch(() => {
+                showNotice(container, 'listing', 'Появились новые объявления');
+            });
+        });
+    });
+
+    // Карточку рендерит сервер тем же шаблоном, что и страницу. Вставляем её
+    // только на первую страницу ленты без поиска (там есть data-card-url):
+    // в остальных случаях новой записи на этом месте не было бы.
+    async function insertCard(container, data) {
+        const key = data.table + '-' + data.id;
+        if (document.querySelector('[data-listing="' + key + '"]')) {
+            return;
+        }
+        const first = container.querySelector('[data-listing]');
+        if (!container.dataset.cardUrl || !first) {
+            throw new Error('no card list');
+        }
+        const response = await fetch(container.dataset.cardUrl.replace('{id}', data.id),
+            { credentials: 'same-origin' });
+        if (response.status === 404) {
+            return;  // успели закрыть
+        }
+        if (!response.ok) {
+            throw new Error(response.statusText);
+        }
+        const template = document.createElement('template');
+        template.innerHTML = (await response.text()).trim();
+        const card = template.content.firstElementChild;
+        if (!card || document.querySelector('[data-listing="' + key + '"]')) {
+            return;
+        }
+        card.style.opacity = '0';
+        first.parentElement.prepend(card);
+        requestAnimationFrame(() => {
+            card.style.transition = 'opacity 0.6s';
+            card.style.opacity = '1';
+        });
+    }
+});
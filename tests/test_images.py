@@ -0,0 +1,80 @@
+import os
+import sys
+
+from PIL import ExifTags, Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.images import build_variants
+
+
+def _exif(orientation):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = orientation
+    exif[ExifTags.Base.Make] = 'Camera'
+    return exif
+
+
+def test_upright_jpeg_without_metadata_is_untouched(tmp_path):
+    path = str(tmp_path / 'photo.jpg')
+    Image.new('RGB', (64, 48), 'red').save(path, quality=75)
+    before = open(path, 'rb').read()
+    build_variants(path)
+    assert open(path, 'rb').read() == before
+
+
+def test_upright_jpeg_loses_exif_but_not_image_data(tmp_path):
+    path = str(tmp_path / 'photo.jpg')
+    Image.new('RGB', (64, 48), 'red').save(path, quality=75, exif=_exif(1))
+    before = open(path, 'rb').read()
+    build_variants(path)
+    after = open(path, 'rb').read()
+    scan = before.index(b'\xff\xda')
+    assert after.endswith(before[scan:])
+    with Image.open(path) as image:
+        assert not image.getexif()
+
+
+def test_rotated_jpeg_is_transposed(tmp_path):
+    path = str(tmp_path / 'photo.jpg')
+    Image.new('RGB', (64, 48), 'red').save(path, exif=_exif(6))
+    build_variants(path)
+    with Image.open(path) as image:
+        assert image.size == (48, 64)
+        assert not image.getexif()
+
+
+def test_animated_gif_keeps_frames(tmp_path):
+    path = str(tmp_path / 'photo.gif')
+    frames = [Image.new('RGB', (32, 32), color) for color in ('red', 'green', 'blue')]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=100, loop=0)
+    with Image.open(path) as image:
+        assert image.n_frames == 3
+    thumb_path, medium_path = build_variants(path)
+    with Image.open(path) as image:
+        assert image.n_frames == 3
+    assert os.path.exists(thumb_path) and os.path.exists(medium_path)
+
+
+def test_original_is_replaced_after_source_is_closed(tmp_path, monkeypatch):
+    # Windows cannot rename over a file that is still open.
+    path = str(tmp_path / 'photo.jpg')
+    Image.new('RGB', (64, 48), 'red').save(path, exif=_exif(1))
+    opened = []
+    replaced = []
+    open_image = Image.open
+    replace = os.replace
+
+    def tracking_open(*args, **kwargs):
+        opened.append(open_image(*args, **kwargs))
+        return opened[-1]
+
+    def checking_replace(source, target):
+        replaced.append(all(image.fp is None for image in opened))
+        replace(source, target)
+
+    monkeypatch.setattr(Image, 'open', tracking_open)
+    monkeypatch.setattr(os, 'replace', checking_replace)
+    build_variants(path)
+    assert replaced == [True]
+    assert not os.path.exists(path + '.tmp')
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+from bisect import bisect_left
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import matching
+from src.config import Config
+from src.database import connect, init_db
+from src.matching import MatchIndex
+
+
+def _seed(conn, offers):
+    conn.execute(
+        "INSERT INTO users (email, password_hash, full_name, user_type) VALUES ('d@example.com', 'x', 'Даритель', 'donor')"
+    )
+    conn.executemany(
+        "INSERT INTO donor_offers (user_id, title, description, category, help_type, status) "
+        "VALUES (1, ?, 'Описание', 'clothes', 'item', 'active')",
+        [(f'Куртка {number}',) for number in range(offers)]
+    )
+    conn.commit()
+
+
+def test_lookup_during_sync_sees_no_half_removed_row(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'DATABASE', str(tmp_path / 'charity.db'))
+    init_db()
+    conn = connect()
+    _seed(conn, 10)
+    index = MatchIndex()
+    index.sync(conn)
+    conn.execute("UPDATE donor_offers SET status = 'completed' WHERE id = 10")
+    conn.commit()
+
+    # discard() drops the row first and its bucket entry second; the sync
+    # is held right between the two while another thread looks up offers.
+    paused = threading.Event()
+    resume = threading.Event()
+
+    def pausing_bisect_left(*args):
+        paused.set()
+        resume.wait(1)
+        return bisect_left(*args)
+
+    def sync():
+        sync_conn = connect()
+        index.sync(sync_conn)
+        sync_conn.close()
+
+    monkeypatch.setattr(matching, 'bisect_left', pausing_bisect_left)
+    syncing = threading.Thread(target=sync)
+    syncing.start()
+    assert paused.wait(5)
+
+    found = []
+    errors = []
+
+    def lookup():
+        try:
+            found.extend(index.offers_for({'category': 'clothes', 'quantity': None}, limit=20))
+        except Exception as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=lookup)
+    reader.start()
+    reader.join(0.2)
+    resume.set()
+    syncing.join()
+    reader.join()
+    conn.close()
+    assert errors == []
+    assert sorted(row['id'] for row in found) == list(range(1, 10))
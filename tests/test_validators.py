@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.validators import (
+    validate_many, validate_program_data, validate_request_data, validate_response_data
+)
+
+
+REQUESTS = [
+    {'title': 'Зимняя куртка', 'description': '', 'category': 'clothes', 'urgency': 'urgent',
+     'contact_info': '+7 900 111-11-11', 'quantity': '2'},
+    {'title': '  ', 'description': 'коротко', 'category': 'weapons', 'urgency': 'urgent',
+     'contact_info': '+7', 'quantity': '0'},
+    {'title': 'Продукты', 'category': 'food', 'urgency': 'normal', 'contact_info': 'ivan@example.com'},
+    {'title': 'x' * 201, 'description': 'Описание подлиннее', 'category': '', 'urgency': 'asap',
+     'contact_info': '+7 900 111-11-11', 'quantity': 'много'},
+]
+
+
+def test_bulk_mode_matches_one_by_one():
+    for validator, records in (
+        (validate_request_data, REQUESTS),
+        (validate_program_data, REQUESTS),
+        (validate_response_data, [
+            {'message': 'Готов помочь', 'responder_contact': '', 'donor_contact': '+7 900 222-22-22'},
+            {'message': '', 'responder_name': 'А'},
+        ]),
+    ):
+        expected = [(index, errors) for index, errors in enumerate(map(validator, records)) if errors]
+        assert validate_many(validator, records) == expected
+
+
+def test_bulk_mode_on_valid_columns():
+    records = [REQUESTS[0], REQUESTS[2]] * 100
+    assert validate_many(validate_request_data, records) == []